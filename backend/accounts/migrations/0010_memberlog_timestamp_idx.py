@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_alter_memberlog_options_remove_memberlog_member_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memberlog',
+            index=models.Index(fields=['timestamp', 'id'], name='memberlog_timestamp_idx'),
+        ),
+    ]
@@ -109,6 +109,10 @@ class MemberLog(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            # keyset pagination of /members/logs/?cursor=
+            models.Index(fields=["timestamp", "id"], name="memberlog_timestamp_idx"),
+        ]
 
     def __str__(self):
         return f"{self.action} - {self.member_username}"
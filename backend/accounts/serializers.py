@@ -4,6 +4,11 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
+from django.core.files.base import ContentFile
+import os
+
+from library.images import normalize_image
 
 from .models import User, MemberLog, PasswordResetOTP
 
@@ -189,6 +194,15 @@ class ProfileImageSerializer(serializers.ModelSerializer):
         model = User
         fields = ["profile_image"]
 
+    def validate_profile_image(self, value):
+        """Store a downsized JPEG instead of the phone-camera original."""
+        if not value:
+            return value
+        value.seek(0)
+        data = normalize_image(value.read(), int(getattr(settings, "PROFILE_IMAGE_MAX_SIDE", 512)))
+        stem = os.path.splitext(os.path.basename(value.name))[0] or "avatar"
+        return ContentFile(data, name=f"{stem}.jpg")
+
 
 # =====================================================
 # PASSWORD CHANGE
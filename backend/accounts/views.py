@@ -17,6 +17,7 @@ import csv
 
 
 from .models import User, MemberLog, PasswordResetOTP
+from library.pagination import AdminKeysetResultsSetPagination
 from .serializers import (
     RegisterSerializer,
     LoginSerializer,
@@ -247,10 +248,20 @@ class MemberViewSet(viewsets.ModelViewSet):
 
 
 # Member logs
+class MemberLogPagination(AdminKeysetResultsSetPagination):
+    keyset_ordering = (("timestamp", True), ("id", True))
+
+
 @api_view(["GET"])
 @permission_classes([IsAdminUser])
 def member_logs(request):
-    logs = MemberLog.objects.all()[:500]
+    """Latest 500 logs as a plain list; `?cursor=` switches to keyset pages."""
+    logs = MemberLog.objects.order_by("-timestamp", "-id")
+    paginator = MemberLogPagination()
+    if paginator.is_keyset_request(request):
+        logs = paginator.paginate_queryset(logs, request)
+    else:
+        logs = logs[:500]
 
     data = []
     for log in logs:
@@ -264,6 +275,8 @@ def member_logs(request):
             "timestamp": log.timestamp,
         })
 
+    if paginator.is_keyset_request(request):
+        return paginator.get_paginated_response(data)
     return Response(data)
 
 
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ilas_backend.settings')
 
 application = get_asgi_application()
+
+# Build this worker's type-ahead index in the background
+from library.suggest import warm_up  # noqa: E402
+
+warm_up()
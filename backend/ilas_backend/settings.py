@@ -150,6 +150,18 @@ DATABASES = {
     )
 }
 
+# Cache
+# Generation counters, cached counts/pages and ETags (library/tasks.py) must be shared
+# by every worker: set REDIS_URL in multi-worker deployments. Without it each process
+# gets its own LocMemCache and those features are switched off (check library.W001).
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -223,8 +235,60 @@ LIBRARY_FINE_PER_DAY = "1.00"
 LIBRARY_GRACE_DAYS = 0
 LIBRARY_MAX_FINE = None
 LIBRARY_MAX_ACTIVE_LOANS = 5
+# Circulation desk fuzzy pickers (?mode=fuzzy on admin book/user search)
+LIBRARY_AUTOCOMPLETE_LIMIT = 10
+LIBRARY_AUTOCOMPLETE_BUDGET_MS = 50
+LIBRARY_AUTOCOMPLETE_MIN_SIMILARITY = 0.2
+# Cache shared by all workers? None: any backend but LocMem/Dummy; True for single-process dev servers
+LIBRARY_SHARED_CACHE = None
+# Public type-ahead (per-worker in-memory prefix index, library/suggest.py)
+LIBRARY_SUGGEST_LIMIT = 8
+LIBRARY_SUGGEST_WARMUP = True
+LIBRARY_SUGGEST_REFRESH_SECONDS = 30
+LIBRARY_SUGGEST_MAX_DELTA = 5000
+# Paginated book/transaction lists: cached counts, planner estimates for big unfiltered lists
+LIBRARY_COUNT_CACHE_SECONDS = 300
+LIBRARY_COUNT_ESTIMATE_MIN_ROWS = 100000
+# ?facets= sidebar counts on the book lists
+LIBRARY_FACET_CACHE_SECONDS = 300
+# Public catalog/meta HTTP caching (ETag + Last-Modified from the catalog generation)
+LIBRARY_CATALOG_MAX_AGE = 0
+LIBRARY_CATALOG_PROXY_MAX_AGE = 60
+# Rendered JSON pages of the public book list (first N pages per query/category)
+LIBRARY_PUBLIC_PAGE_CACHE_PAGES = 5
+LIBRARY_PUBLIC_PAGE_CACHE_SECONDS = 300
+# Category dictionary reads (meta endpoint, category filters)
+LIBRARY_CATEGORY_CACHE_SECONDS = 300
+# book_code numbers reserved per process at a time (PostgreSQL sequence; library/codes.py)
+LIBRARY_BOOK_CODE_BLOCK = 20
+# Streaming bulk import (library/importer.py): batch size adapts towards BATCH_SECONDS per batch
+LIBRARY_IMPORT_BATCH_SIZE = 250
+LIBRARY_IMPORT_BATCH_MIN = 100
+LIBRARY_IMPORT_BATCH_MAX = 1000
+LIBRARY_IMPORT_BATCH_SECONDS = 0.5
+LIBRARY_IMPORT_MAX_ERRORS = 1000
+# Import row validation processes (library/import_validation.py); 0 = validate in-process
+LIBRARY_IMPORT_VALIDATION_PROCESSES = 0
+# Bulk import jobs (library/import_jobs.py): Celery when USE_CELERY, else an in-process pool
+LIBRARY_IMPORT_ASYNC = True
+LIBRARY_IMPORT_WORKERS = 2
+LIBRARY_IMPORT_DIR = os.environ.get("LIBRARY_IMPORT_DIR", "")  # default: <tmp>/ilas_imports
+LIBRARY_IMPORT_RETENTION_HOURS = 24
+# Covers from a bulk-upload ZIP (library/covers.py): storage backend, upload threads, row limit
+LIBRARY_COVER_STORAGE = "library.covers.CloudinaryCoverStorage"
+LIBRARY_COVER_UPLOAD_WORKERS = 8
+LIBRARY_IMPORT_ZIP_MAX_ROWS = 1000
+LIBRARY_IMPORT_MAX_IMAGE_BYTES = 25 * 1024 * 1024
+# Image normalization (library/images.py): longest side in px, JPEG quality
+LIBRARY_COVER_MAX_SIDE = 800
+LIBRARY_COVER_THUMB_SIDE = 200
+PROFILE_IMAGE_MAX_SIDE = 512
+LIBRARY_IMAGE_QUALITY = 82
+# Cover-existence index (library/cover_index.py): re-check age, lookup threads, Cloudinary folder
+LIBRARY_COVER_INDEX_TTL_HOURS = 24
+LIBRARY_COVER_INDEX_WORKERS = 4
+LIBRARY_COVER_INDEX_FOLDER = "ilas/book_covers"
 DEFAULT_BOOK_COVER = "https://res.cloudinary.com/dlailcpfy/image/upload/v1767505899/no_cover.jpg"
-CLOUDINARY_BOOK_COVER_BASE = "https://res.cloudinary.com/dlailcpfy/image/upload/v1767503353/ilas/book_covers"
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
 
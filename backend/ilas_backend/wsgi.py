@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ilas_backend.settings')
 
 application = get_wsgi_application()
+
+# Build this worker's type-ahead index in the background
+from library.suggest import warm_up  # noqa: E402
+
+warm_up()
@@ -9,19 +9,18 @@ Implements:
 """
 
 import os
-import zipfile
-import openpyxl
 from django import forms
 from django.contrib import admin, messages
+from django.http import FileResponse, Http404
 from django.urls import path
 from django.shortcuts import render, redirect
-from django.core.files.base import ContentFile
 from django.core.exceptions import ValidationError
 from django.db import transaction
 
 from .models import Book, BookTransaction, AuditLog
-from .serializers import BookTransactionSerializer, BulkBookImportSerializer
-from .models import create_audit
+from .serializers import BookTransactionSerializer
+from .importer import ImportFileError
+from .import_jobs import error_report_path, job_status, start_import_job
 
 
 # ----------------------------------------------------------------------
@@ -91,16 +90,20 @@ class BookAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path("bulk-upload/", self.admin_site.admin_view(self.bulk_upload_view), name="library-book-bulk-upload"),
+            path("bulk-upload/<str:task_id>/", self.admin_site.admin_view(self.bulk_upload_status_view),
+                 name="library-book-bulk-upload-status"),
+            path("bulk-upload/<str:task_id>/errors/", self.admin_site.admin_view(self.bulk_upload_errors_view),
+                 name="library-book-bulk-upload-errors"),
             path("issue-book/", self.admin_site.admin_view(self.issue_book_view), name="library-book-issue-book"),
             path("return-book/", self.admin_site.admin_view(self.return_book_view), name="library-book-return-book"),
         ]
         return custom_urls + urls
 
         # ------------------------------------------------------------------
-    # BULK UPLOAD (Excel + ZIP)
+    # BULK UPLOAD (Excel / CSV / JSON-Lines + ZIP) — same job engine as the API
     # ------------------------------------------------------------------
     def bulk_upload_view(self, request):
-        """Handle Excel + ZIP bulk import with audit suppression."""
+        """Start a bulk import job (library/import_jobs.py) and follow it on the status page."""
         if request.method != "POST":
             return render(request, "admin/library/book_bulk_upload.html")
 
@@ -111,99 +114,43 @@ class BookAdmin(admin.ModelAdmin):
             messages.error(request, "Excel file is required.")
             return redirect("..")
 
-        # ----------------------------------------------------------
-        # Step 1: Load images from ZIP (if provided)
-        # ----------------------------------------------------------
-        images_map = {}
-        if images_zip:
-            try:
-                with zipfile.ZipFile(images_zip) as z:
-                    for name in z.namelist():
-                        base = name.split("/")[-1].lower()
-                        if base.endswith((".jpg", ".jpeg", ".png")):
-                            images_map[base] = z.read(name)
-            except zipfile.BadZipFile:
-                messages.warning(request, "⚠️ Invalid ZIP file uploaded. Skipping images.")
-
-        # ----------------------------------------------------------
-        # Step 2: Parse Excel
-        # ----------------------------------------------------------
         try:
-            wb = openpyxl.load_workbook(excel_file, data_only=True)
-            ws = wb.active
-            header = [str(c.value).strip().lower() if c.value else "" for c in ws[1]]
-
-            # Deduplicate header columns (avoid collisions)
-            seen = {}
-            for i, h in enumerate(header):
-                if h in seen:
-                    seen[h] += 1
-                    header[i] = f"{h}_{seen[h]}"
-                else:
-                    seen[h] = 1
-
-        except Exception as e:
-            messages.error(request, f"Excel error: {e}")
-            return redirect("..")
-
-        # ----------------------------------------------------------
-        # Step 3: Process rows
-        # ----------------------------------------------------------
-        created, errors = 0, []
-        try:
-            with transaction.atomic():
-                for i, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                    if not row or all(v in (None, "") for v in row):
-                        continue
-
-                    data = dict(zip(header, row))
-                    serializer = BulkBookImportSerializer(data=data)
-                    try:
-                        serializer.is_valid(raise_exception=True)
-                        book = Book(**serializer.validated_data, last_modified_by=request.user)
-                        book._suppress_audit = True
-                        book.save()
-
-                        # Optional cover assignment
-                        for key in [
-                            f"{(book.isbn or '').strip().lower()}.jpg",
-                            f"{(book.title or '').strip().lower()}.jpg",
-                        ]:
-                            if key in images_map:
-                                book.cover_image.save(f"{book.book_code}.jpg", ContentFile(images_map[key]), save=True)
-                                break
-
-                        created += 1
-                    except Exception as e:
-                        errors.append(f"Row {i}: {e}")
-                        continue
-
-            # ------------------------------------------------------
-            # Step 4: Single bulk audit entry
-            # ------------------------------------------------------
-            create_audit(
-                actor=request.user,
-                action=AuditLog.ACTION_BULK_UPLOAD,
-                target_type="Book",
-                target_id="BulkImport",
-                new_values={"books_created": created},
-                remarks=f"Bulk uploaded {created} books via admin interface",
-                source="admin-ui",
+            task_id = start_import_job(
+                request.user, excel_file, images_zip,
+                mode=request.POST.get("mode") or "insert",
+                dry_run=bool(request.POST.get("dry_run")),
             )
-
+        except ImportFileError as e:
+            messages.error(request, str(e))
+            return redirect(request.path)
         except Exception as e:
             messages.error(request, f"Bulk upload failed: {e}")
-            return redirect("..")
-
-        # ----------------------------------------------------------
-        # Step 5: Feedback
-        # ----------------------------------------------------------
-        if created:
-            messages.success(request, f"✅ {created} books uploaded successfully.")
-        if errors:
-            sample = errors[:3]
-            messages.warning(request, f"⚠️ {len(errors)} rows failed. Example: {sample}")
-        return redirect("..")
+            return redirect(request.path)
+        return redirect("admin:library-book-bulk-upload-status", task_id=task_id)
+
+    def bulk_upload_status_view(self, request, task_id):
+        """Progress of a bulk import job; reloads itself until the job has finished."""
+        progress = job_status(task_id)
+        if progress is None:
+            raise Http404("Unknown import job")
+        result = progress.get("result") or {}
+        context = {
+            **self.admin_site.each_context(request),
+            "task_id": task_id,
+            "progress": progress,
+            "result": result,
+            "finished": progress.get("status") in ("COMPLETED", "FAILED"),
+            "has_report": bool(result.get("errors_url")) and error_report_path(task_id) is not None,
+        }
+        return render(request, "admin/library/book_bulk_upload_status.html", context)
+
+    def bulk_upload_errors_view(self, request, task_id):
+        """Per-row error report (CSV) of a finished bulk import job."""
+        path = error_report_path(task_id)
+        if not path:
+            raise Http404("No error report for this task.")
+        return FileResponse(open(path, "rb"), as_attachment=True,
+                            filename=f"{task_id}-errors.csv", content_type="text/csv")
 
 
     # ------------------------------------------------------------------
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class LibraryConfig(AppConfig):
@@ -14,3 +15,11 @@ class LibraryConfig(AppConfig):
             # Should never silently fail in production; but keep safe during dev
             # to avoid crashing when signal file temporarily missing.
             pass
+
+        import library.checks  # noqa: F401
+
+        # Re-create full-text / trigram index triggers dropped by SQLite table rebuilds.
+        from library.autocomplete import ensure_autocomplete_index
+        from library.search import ensure_search_index
+        post_migrate.connect(ensure_search_index, sender=self)
+        post_migrate.connect(ensure_autocomplete_index, sender=self)
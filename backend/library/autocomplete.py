@@ -0,0 +1,292 @@
+# library/autocomplete.py
+"""
+ILAS – Typo-Tolerant Autocomplete (circulation desk pickers)
+------------------------------------------------------------
+Backs `?mode=fuzzy` on AdminBookSearchView / AdminUserSearchView.
+
+Backends:
+- PostgreSQL: pg_trgm GIN indexes (gin_trgm_ops) + `%>` word-similarity operator,
+  ranked by word_similarity().
+- SQLite:     FTS5 `trigram` shadow tables (library_book_trgm, library_user_trgm),
+  maintained by DB triggers. Candidates are pulled by shared trigrams (bm25),
+  then re-ranked in Python with pg_trgm-style similarity.
+
+Every lookup runs inside a latency budget (LIBRARY_AUTOCOMPLETE_BUDGET_MS):
+statement_timeout on PostgreSQL, a progress-handler deadline on SQLite. When the
+budget is exceeded (or the backend has no trigram support) we fall back to the
+index-backed prefix search and report mode="prefix".
+"""
+
+import logging
+import re
+import time
+from contextlib import contextmanager
+from functools import reduce
+from operator import or_
+from typing import Iterable, List, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .models import Book
+from .search import repair_sqlite_shadow, search_books
+
+logger = logging.getLogger(__name__)
+
+BOOK_FIELDS = ("title", "author", "book_code", "isbn")
+USER_FIELDS = ("username", "first_name", "last_name", "unique_id", "email")
+
+BOOK_TRGM_TABLE = "library_book_trgm"
+USER_TRGM_TABLE = "library_user_trgm"
+
+# SQLite: candidates fetched per requested result before Python re-ranking
+CANDIDATE_FACTOR = 20
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _budget_ms() -> int:
+    return int(getattr(settings, "LIBRARY_AUTOCOMPLETE_BUDGET_MS", 50))
+
+
+def _min_similarity() -> float:
+    return float(getattr(settings, "LIBRARY_AUTOCOMPLETE_MIN_SIMILARITY", 0.2))
+
+
+def default_limit() -> int:
+    return int(getattr(settings, "LIBRARY_AUTOCOMPLETE_LIMIT", 10))
+
+
+# ----------------------------------------------------------------------
+# Trigram similarity (pg_trgm semantics, used for SQLite re-ranking)
+# ----------------------------------------------------------------------
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigram set: lowercase words padded with two leading / one trailing space."""
+    grams: Set[str] = set()
+    for word in _WORD_RE.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_similarity(query: str, value: str) -> float:
+    """
+    Best Jaccard similarity between the query trigrams and any run of consecutive
+    words in `value` of the same length as the query (approximates pg_trgm word_similarity).
+    """
+    q = trigrams(query)
+    if not q or not value:
+        return 0.0
+    words = _WORD_RE.findall(value.lower())
+    span = max(1, len(_WORD_RE.findall(query)))
+    best = 0.0
+    for i in range(max(1, len(words) - span + 1)):
+        v = trigrams(" ".join(words[i:i + span]))
+        if v:
+            best = max(best, len(q & v) / len(q | v))
+    return best
+
+
+# ----------------------------------------------------------------------
+# Latency budget
+# ----------------------------------------------------------------------
+class BudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def latency_budget(connection, budget_ms: int):
+    """
+    Abort DB work that runs past `budget_ms`. Must wrap an atomic block on PostgreSQL
+    (settings are SET LOCAL). Raises BudgetExceeded on timeout.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true), "
+                "set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(budget_ms), str(_min_similarity())],
+            )
+        try:
+            yield
+        except DatabaseError as e:
+            raise BudgetExceeded(str(e)) from e
+    elif connection.vendor == "sqlite":
+        connection.ensure_connection()
+        raw = connection.connection
+        deadline = time.monotonic() + budget_ms / 1000.0
+        raw.set_progress_handler(lambda: int(time.monotonic() > deadline), 1000)
+        try:
+            yield
+        except DatabaseError as e:
+            if time.monotonic() > deadline:
+                raise BudgetExceeded(str(e)) from e
+            raise
+        finally:
+            raw.set_progress_handler(None, 0)
+    else:
+        yield
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def fuzzy_books(query: str, limit: int = None) -> Tuple[List[Book], str]:
+    """Top-`limit` books by trigram similarity. Returns (books, mode)."""
+    limit = limit or default_limit()
+    results, ok = _fuzzy(Book.objects.all(), query, BOOK_FIELDS, BOOK_TRGM_TABLE, limit)
+    if ok:
+        return results, "fuzzy"
+    books = list(search_books(Book.objects.all(), query)[:limit])
+    for b in books:
+        b.similarity = None
+    return books, "prefix"
+
+
+def fuzzy_members(query: str, limit: int = None) -> Tuple[list, str]:
+    """Top-`limit` members by trigram similarity (username, names, USN, email)."""
+    User = get_user_model()
+    limit = limit or default_limit()
+    results, ok = _fuzzy(User.objects.all(), query, USER_FIELDS, USER_TRGM_TABLE, limit)
+    if ok:
+        return results, "fuzzy"
+    q = query.strip()
+    users = list(
+        User.objects.filter(reduce(or_, (Q(**{f"{f}__istartswith": q}) for f in USER_FIELDS)))
+        .order_by("username")[:limit]
+    )
+    for u in users:
+        u.similarity = None
+    return users, "prefix"
+
+
+def _fuzzy(queryset: QuerySet, query: str, fields: Sequence[str], shadow_table: str, limit: int):
+    """Returns (ranked instances, True) or ([], False) when the caller should fall back."""
+    if not trigrams(query):
+        return [], False
+    connection = connections[queryset.db]
+    try:
+        with transaction.atomic(using=queryset.db):
+            with latency_budget(connection, _budget_ms()):
+                if connection.vendor == "postgresql":
+                    return _fuzzy_postgres(queryset, query, fields, limit), True
+                if connection.vendor == "sqlite":
+                    return _fuzzy_sqlite(queryset, query, fields, shadow_table, limit), True
+    except BudgetExceeded as e:
+        # Timeout, or trigram support missing on this database
+        logger.warning("Autocomplete fell back to prefix search for %r: %s", query, e)
+    return [], False
+
+
+def _fuzzy_postgres(queryset: QuerySet, query: str, fields: Sequence[str], limit: int) -> list:
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db.models.functions import Greatest
+
+    # `field %> query` is served by the gin_trgm_ops indexes (threshold set in latency_budget)
+    match = reduce(or_, (Q(TrigramWordSimilar(F(f), query)) for f in fields))
+    score = Greatest(*(TrigramWordSimilarity(query, f) for f in fields))
+    return list(queryset.filter(match).annotate(similarity=score).order_by("-similarity", "pk")[:limit])
+
+
+def _fuzzy_sqlite(queryset: QuerySet, query: str, fields: Sequence[str], shadow_table: str, limit: int) -> list:
+    # Shadow rows hold " field1 field2 ... " so word-boundary trigrams (" py", "on ") exist too
+    grams = sorted(g for g in trigrams(query) if not g.startswith("  "))
+    if not grams:
+        return []
+    match = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+    candidate_ids = RawSQL(
+        f"SELECT rowid FROM {shadow_table} WHERE {shadow_table} MATCH %s ORDER BY rank LIMIT %s",
+        [match, limit * CANDIDATE_FACTOR],
+    )
+    threshold = _min_similarity()
+    scored = []
+    for obj in queryset.filter(pk__in=candidate_ids):
+        score = max(word_similarity(query, str(getattr(obj, f) or "")) for f in fields)
+        if score >= threshold:
+            obj.similarity = score
+            scored.append(obj)
+    scored.sort(key=lambda o: (-o.similarity, o.pk))
+    return scored[:limit]
+
+
+# ----------------------------------------------------------------------
+# Index maintenance (DDL)
+# ----------------------------------------------------------------------
+def _trgm_document(ref: str, fields: Iterable[str]) -> str:
+    parts = " || ' ' || ".join(f"coalesce({ref}.{f}, '')" for f in fields)
+    return f"' ' || {parts} || ' '"
+
+
+def _sqlite_shadow(shadow_table: str, base_table: str, fields: Sequence[str]):
+    insert = f"INSERT INTO {shadow_table} (rowid, doc)"
+    cols = ", ".join(fields)
+    triggers = {
+        f"{shadow_table}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {shadow_table}_ai AFTER INSERT ON {base_table} BEGIN
+            {insert} VALUES (new.id, {_trgm_document("new", fields)});
+        END;
+        """,
+        f"{shadow_table}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {shadow_table}_au AFTER UPDATE OF {cols} ON {base_table} BEGIN
+            DELETE FROM {shadow_table} WHERE rowid = old.id;
+            {insert} VALUES (new.id, {_trgm_document("new", fields)});
+        END;
+        """,
+        f"{shadow_table}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {shadow_table}_ad AFTER DELETE ON {base_table} BEGIN
+            DELETE FROM {shadow_table} WHERE rowid = old.id;
+        END;
+        """,
+    }
+    install = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {shadow_table} USING fts5(doc, tokenize = 'trigram');",
+        *triggers.values(),
+        f"DELETE FROM {shadow_table};",
+        f"{insert} SELECT {base_table}.id, {_trgm_document(base_table, fields)} FROM {base_table};",
+    ]
+    drop = [*(f"DROP TRIGGER IF EXISTS {name};" for name in triggers), f"DROP TABLE IF EXISTS {shadow_table};"]
+    return triggers, install, drop
+
+
+BOOK_SHADOW = _sqlite_shadow(BOOK_TRGM_TABLE, "library_book", BOOK_FIELDS)
+USER_SHADOW = _sqlite_shadow(USER_TRGM_TABLE, "accounts_user", USER_FIELDS)
+
+PG_TRGM_INDEXES = [
+    *((f"library_book_{f}_trgm", "library_book", f) for f in BOOK_FIELDS),
+    *((f"accounts_user_{f}_trgm", "accounts_user", f) for f in USER_FIELDS),
+]
+
+
+def _execute(connection, statements) -> None:
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_autocomplete_index(connection) -> None:
+    """Create trigram indexes (enables pg_trgm on PostgreSQL; left installed on reverse)."""
+    if connection.vendor == "postgresql":
+        _execute(connection, ["CREATE EXTENSION IF NOT EXISTS pg_trgm;"] + [
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({col} gin_trgm_ops);"
+            for name, table, col in PG_TRGM_INDEXES
+        ])
+    elif connection.vendor == "sqlite":
+        _execute(connection, BOOK_SHADOW[1] + USER_SHADOW[1])
+
+
+def drop_autocomplete_index(connection) -> None:
+    if connection.vendor == "postgresql":
+        _execute(connection, [f"DROP INDEX IF EXISTS {name};" for name, _, _ in PG_TRGM_INDEXES])
+    elif connection.vendor == "sqlite":
+        _execute(connection, BOOK_SHADOW[2] + USER_SHADOW[2])
+
+
+def ensure_autocomplete_index(sender=None, using="default", **kwargs) -> None:
+    """post_migrate receiver: repair the SQLite trigram triggers after table rebuilds."""
+    connection = connections[using]
+    for table, shadow in ((BOOK_TRGM_TABLE, BOOK_SHADOW), (USER_TRGM_TABLE, USER_SHADOW)):
+        repair_sqlite_shadow(connection, table, shadow[0], lambda c, stmts=shadow[1]: _execute(c, stmts))
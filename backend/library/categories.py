@@ -0,0 +1,147 @@
+# library/categories.py
+"""
+ILAS – Category Dictionary
+--------------------------
+`Category` holds one row per distinct Book.category with `book_count` and
+`active_count`. The meta endpoint and the category filters read this small table
+(cached per catalog generation when the cache is shared by all workers, see
+tasks.shared_cache) instead of scanning library_book with DISTINCT.
+
+Maintenance:
+- Book post_save / post_delete (signals.py) apply ±1 deltas with F() updates inside
+  the same DB transaction as the book write. Saves that change neither category nor
+  is_active (circulation status updates) cost no queries.
+- The bulk_create import path calls books_added(); upsert imports call books_moved()
+  for the books whose category changed.
+- `manage.py rebuild_categories` (and migration 0017) recount from scratch.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+
+from .models import Book, Category
+from .tasks import get_catalog_generation, shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------
+# Maintenance
+# ----------------------------------------------------------------------
+def _apply(deltas: Dict[str, List[int]]) -> None:
+    for name, (books, active) in deltas.items():
+        if not (books or active):
+            continue
+        changes = {"book_count": F("book_count") + books, "active_count": F("active_count") + active}
+        if Category.objects.filter(name=name).update(**changes):
+            continue
+        _, created = Category.objects.get_or_create(
+            name=name, defaults={"book_count": max(books, 0), "active_count": max(active, 0)}
+        )
+        if not created:  # another writer created it first
+            Category.objects.filter(name=name).update(**changes)
+
+
+def book_saved(book, created: bool) -> None:
+    """Book post_save: move the book between category counters if category / is_active changed."""
+    stored = getattr(book, "_stored_category", None)
+    if not created and (stored is None or stored[0] is None):
+        # Instance not loaded from the DB (or category deferred): recount what we can see
+        rebuild([book.category])
+        book.remember_category_state()
+        return
+
+    deltas = defaultdict(lambda: [0, 0])
+    if not created:
+        old_category, old_active = stored
+        deltas[old_category][0] -= 1
+        deltas[old_category][1] -= int(bool(old_active))
+    deltas[book.category][0] += 1
+    deltas[book.category][1] += int(bool(book.is_active))
+    _apply(deltas)
+    book.remember_category_state()
+
+
+def book_deleted(book) -> None:
+    category, active = getattr(book, "_stored_category", None) or (book.category, book.is_active)
+    if category is None:
+        category, active = book.category, book.is_active
+    _apply({category: [-1, -int(bool(active))]})
+
+
+def books_added(books: Iterable[Book]) -> None:
+    """bulk_create path (no signals)."""
+    deltas = defaultdict(lambda: [0, 0])
+    for book in books:
+        deltas[book.category][0] += 1
+        deltas[book.category][1] += int(bool(book.is_active))
+    _apply(deltas)
+
+
+def books_moved(moves: Iterable[Tuple[str, str, bool]]) -> None:
+    """bulk_update path (upsert imports): (old category, new category, is_active) per book."""
+    deltas = defaultdict(lambda: [0, 0])
+    for old, new, active in moves:
+        if old == new:
+            continue
+        deltas[old][0] -= 1
+        deltas[old][1] -= int(bool(active))
+        deltas[new][0] += 1
+        deltas[new][1] += int(bool(active))
+    _apply(deltas)
+
+
+def rebuild(names: Iterable[str] = None) -> int:
+    """Recount from library_book (all categories, or just `names`). Returns rows written."""
+    qs = Book.objects.order_by()
+    if names is not None:
+        names = list(names)
+        qs = qs.filter(category__in=names)
+    rows = qs.values("category").annotate(books=Count("id"), active=Count("id", filter=Q(is_active=True)))
+    found = set()
+    for row in rows:
+        found.add(row["category"])
+        Category.objects.update_or_create(
+            name=row["category"], defaults={"book_count": row["books"], "active_count": row["active"]}
+        )
+    stale = Category.objects.exclude(name__in=found)
+    if names is not None:
+        stale = stale.filter(name__in=names)
+    stale.delete()
+    return len(found)
+
+
+# ----------------------------------------------------------------------
+# Reads
+# ----------------------------------------------------------------------
+def category_counts() -> List[Tuple[str, int]]:
+    """[(name, active_count)] for every category in use, sorted by name (cached per generation)."""
+    if not shared_cache():
+        return _read_counts()
+    key = f"ilas_categories:{get_catalog_generation()}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = _read_counts()
+        cache.set(key, rows, timeout=int(getattr(settings, "LIBRARY_CATEGORY_CACHE_SECONDS", 300)))
+    return rows
+
+
+def _read_counts() -> List[Tuple[str, int]]:
+    return sorted(Category.objects.filter(book_count__gt=0).values_list("name", "active_count"))
+
+
+def resolve(value: str, contains: bool = False) -> List[str]:
+    """
+    Stored category names matching `value` case-insensitively (exactly, or as a
+    substring when `contains`), for an indexed `category__in` filter.
+    """
+    needle = value.casefold()
+    return [
+        name for name, _ in category_counts()
+        if (needle in name.casefold() if contains else name.casefold() == needle)
+    ]
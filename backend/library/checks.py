@@ -0,0 +1,27 @@
+# library/checks.py
+"""
+ILAS – System Checks
+--------------------
+library.W001: the default cache is process-local. Generation counters
+(library/tasks.py) would not be seen by other workers, so cached counts, facet
+and page caches, catalog ETags and the cross-worker suggest refresh are off.
+"""
+
+from django.core.checks import Tags, Warning, register
+
+from .tasks import shared_cache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if shared_cache():
+        return []
+    return [
+        Warning(
+            "The default cache is process-local: generation-keyed caches, catalog ETags and "
+            "cross-worker suggest refresh are disabled.",
+            hint="Set REDIS_URL (or CACHES) to a cache shared by every worker, or LIBRARY_SHARED_CACHE = True "
+                 "when a single process serves all requests.",
+            id="library.W001",
+        )
+    ]
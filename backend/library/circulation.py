@@ -0,0 +1,280 @@
+# library/circulation.py
+"""
+ILAS – Circulation Core
+-----------------------
+Issue and return, for one book (Book.mark_issued / Book.mark_returned) or for
+several books of one member at the desk.
+
+Single book, a fixed query budget (enforced by tests with assertNumQueries):
+- issue: lock + read the book row with its active-issue flag, the member summary
+  UPDATE (which is the loan-limit check, member_summary.py), the ISSUE INSERT,
+  its audit row (post_save), one UPDATE of the book;
+- return: lock the active issue (member joined in), one UPDATE closing it, the
+  RETURN INSERT, its audit row, one UPDATE of the book, the member summary UPDATE.
+The book is written with a queryset UPDATE, not Book.save(): no _previous_state
+read and no duplicate "Book updated" audit entry. The catalog generation (status
+is on catalog pages) is bumped here; the category dictionary and the suggest index
+(its own generation, suggest.py) do not depend on status and are left alone. The
+uq_book_active_issue constraint still backs the active-issue check.
+
+Batch (issue_books / return_books): the same rules applied to the whole batch:
+
+- the books are locked with one ordered SELECT ... FOR UPDATE (ordered by id, so
+  two desks locking overlapping batches cannot deadlock);
+- active issues are checked with one query, the loan limit by the member
+  summary UPDATE;
+- the transactions and their audit rows go in with one bulk INSERT each, the
+  books with one UPDATE.
+
+All or nothing: any book that fails a rule rejects the batch (ValueError naming
+the book codes), and nothing is written.
+"""
+
+from datetime import timedelta
+from typing import Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import member_summary
+from .models import AuditLog, Book, BookTransaction, MemberCirculation, overdue_fine
+from .tasks import bump_catalog_generation, bump_transaction_generation, invalidate_dashboard_cache
+
+
+def _lock_books(book_ids: Iterable) -> List[Book]:
+    ids = sorted({int(i) for i in book_ids})
+    if not ids:
+        raise ValueError("No books given.")
+    books = list(Book.objects.select_for_update().filter(pk__in=ids).order_by("pk"))
+    missing = set(ids) - {b.pk for b in books}
+    if missing:
+        raise ValueError(f"Unknown book id(s): {', '.join(map(str, sorted(missing)))}")
+    return books
+
+
+def _codes(books: Iterable[Book]) -> str:
+    return ", ".join(b.book_code for b in books)
+
+
+def _audit_rows(txns: List[BookTransaction], books: dict, actor, action: str, status: str) -> List[AuditLog]:
+    # Same entries as the BookTransaction post_save signal (bulk_create skips signals)
+    return [
+        AuditLog(
+            actor=actor,
+            action=action,
+            target_type="BookTransaction",
+            target_id=str(txn.pk),
+            new_values={
+                "book_id": txn.book_id,
+                "book_code": books[txn.book_id].book_code,
+                "txn_type": txn.txn_type,
+                "member": getattr(txn.member, "username", None),
+                "status": status,
+                "fine": str(txn.fine_amount) if txn.fine_amount else None,
+                "due_date": txn.due_date.isoformat() if txn.due_date else None,
+                "return_date": txn.return_date.isoformat() if txn.return_date else None,
+                "transaction_id": txn.pk,
+            },
+            remarks=f"{txn.txn_type} transaction recorded for book {books[txn.book_id].book_code}",
+            source="transaction-system",
+        )
+        for txn in txns
+    ]
+
+
+def _set_book_state(books: List[Book], status: str, issued_to, actor, now) -> None:
+    """One UPDATE for the books' circulation fields (Book.save() and its signals are skipped)."""
+    Book.objects.filter(pk__in=[b.pk for b in books]).update(
+        status=status, issued_to=issued_to, last_modified_by=actor, updated_at=now,
+    )
+    for book in books:
+        book.status, book.issued_to, book.last_modified_by, book.updated_at = status, issued_to, actor, now
+
+
+def _changed():
+    # Book status is on catalog pages; the suggest index has its own generation and is left alone
+    invalidate_dashboard_cache()
+    bump_transaction_generation()
+    bump_catalog_generation()
+
+
+# ----------------------------------------------------------------------
+# Single book
+# ----------------------------------------------------------------------
+def issue_book(book: Book, member, actor=None, remarks: str = "") -> BookTransaction:
+    """R1.01–R1.04 for one book. Returns the ISSUE transaction."""
+    if member is None or not getattr(member, "is_active", True):
+        raise ValueError("Member is not active.")
+    limit = getattr(settings, "LIBRARY_MAX_ACTIVE_LOANS", 5)
+
+    with transaction.atomic():
+        # Lock the book row first to prevent two concurrent issuances; decide on the locked state
+        held = BookTransaction.objects.filter(book=OuterRef("pk"), txn_type=BookTransaction.TYPE_ISSUE, is_active=True)
+        locked = (
+            Book.objects.select_for_update().annotate(held=Exists(held))
+            .values("status", "is_active", "held").get(pk=book.pk)
+        )
+        book.status, book.is_active = locked["status"], locked["is_active"]
+        if not book.can_be_issued():
+            raise ValueError("Book is not available for issue.")
+        if locked["held"]:
+            raise ValueError("Book already has an active issue transaction.")
+
+        now = timezone.now()
+        due_date = now + timedelta(days=book._member_loan_days(member))
+        if not member_summary.loans_taken(member.pk, 1, due_date, limit):
+            raise ValueError(f"Member has reached max active loans ({limit}).")
+
+        txn = BookTransaction.objects.create(
+            book=book,
+            member=member,
+            actor=actor,
+            txn_type=BookTransaction.TYPE_ISSUE,
+            issue_date=now,
+            due_date=due_date,
+            is_active=True,
+            remarks=remarks,
+        )
+        _set_book_state([book], Book.STATUS_ISSUED, member, actor, now)
+    # The transaction's post_save already bumped the circulation caches
+    bump_catalog_generation()
+    return txn
+
+
+def return_book(book: Book, actor, returned_by=None, remarks: str = "") -> BookTransaction:
+    """R2.01–R2.04 for one book (rules: Book.mark_returned). Returns the RETURN transaction."""
+    if actor is None:
+        raise ValueError("Actor (user performing the return) must be provided.")
+
+    with transaction.atomic():
+        active_txn = (
+            BookTransaction.objects.select_for_update(of=("self",))
+            .select_related("member")
+            .filter(book=book, txn_type=BookTransaction.TYPE_ISSUE, is_active=True)
+            .first()
+        )
+        if not active_txn:
+            raise ValueError("No active issue exists for this book.")
+
+        if not getattr(actor, "is_staff", False):
+            # actor is a normal member returning themselves
+            if active_txn.member_id != actor.pk:
+                raise ValueError("Return must be performed by the member who issued the book.")
+        elif returned_by is not None:
+            # staff may name the member returning the book (id or User)
+            rid = returned_by.id if hasattr(returned_by, "id") else returned_by
+            if str(active_txn.member_id) != str(rid):
+                raise ValueError("The provided returned_by does not match the member who has the active issue.")
+
+        now = timezone.now()
+        fine = overdue_fine(active_txn.due_date, now)  # R2.04
+        BookTransaction.objects.filter(pk=active_txn.pk).update(
+            return_date=now, is_active=False, fine_amount=fine, updated_at=now,
+        )
+        active_txn.return_date, active_txn.is_active, active_txn.fine_amount, active_txn.updated_at = (
+            now, False, fine, now
+        )
+
+        ret_txn = BookTransaction.objects.create(
+            book=book,
+            member=active_txn.member,
+            actor=actor,
+            txn_type=BookTransaction.TYPE_RETURN,
+            return_date=now,
+            fine_amount=fine,
+            is_active=False,
+            remarks=remarks,
+        )
+        _set_book_state([book], Book.STATUS_AVAILABLE, None, actor, now)
+        member_summary.loans_closed(active_txn.member_id, 1, fine)
+    bump_catalog_generation()
+    return ret_txn
+
+
+# ----------------------------------------------------------------------
+# Batch (one member, several books)
+# ----------------------------------------------------------------------
+
+def issue_books(member, book_ids: Iterable, actor=None, remarks: str = "") -> List[BookTransaction]:
+    """Issue every book in `book_ids` to `member` (R1.01–R1.04). Returns the ISSUE transactions."""
+    if member is None or not getattr(member, "is_active", True):
+        raise ValueError("Member is not active.")
+    limit = getattr(settings, "LIBRARY_MAX_ACTIVE_LOANS", 5)
+
+    with transaction.atomic():
+        books = _lock_books(book_ids)
+        unavailable = [b for b in books if not b.can_be_issued()]
+        if unavailable:
+            raise ValueError(f"Not available for issue: {_codes(unavailable)}")
+        held = set(
+            BookTransaction.objects.filter(
+                book__in=books, txn_type=BookTransaction.TYPE_ISSUE, is_active=True
+            ).values_list("book_id", flat=True)
+        )
+        if held:
+            raise ValueError(f"Already has an active issue transaction: {_codes(b for b in books if b.pk in held)}")
+
+        now = timezone.now()
+        due_date = now + timedelta(days=books[0]._member_loan_days(member))
+        if not member_summary.loans_taken(member.pk, len(books), due_date, limit):
+            active = MemberCirculation.objects.filter(member=member).values_list("active_loans", flat=True).first()
+            raise ValueError(f"Member has reached max active loans ({limit}): {active} on loan, {len(books)} requested.")
+        txns = BookTransaction.objects.bulk_create([
+            BookTransaction(
+                book=book, member=member, actor=actor, txn_type=BookTransaction.TYPE_ISSUE,
+                issue_date=now, due_date=due_date, is_active=True, remarks=remarks,
+            )
+            for book in books
+        ])
+        _set_book_state(books, Book.STATUS_ISSUED, member, actor, now)
+        audit_actor = actor or member
+        AuditLog.objects.bulk_create(
+            _audit_rows(txns, {b.pk: b for b in books}, audit_actor, AuditLog.ACTION_BOOK_ISSUE, Book.STATUS_ISSUED)
+        )
+    _changed()
+    return txns
+
+
+def return_books(member, book_ids: Iterable, actor, remarks: str = "") -> List[BookTransaction]:
+    """Return every book in `book_ids`, all on loan to `member` (R2.01–R2.04). Returns the RETURN transactions."""
+    if actor is None:
+        raise ValueError("Actor (user performing the return) must be provided.")
+    if not getattr(actor, "is_staff", False) and actor.pk != member.pk:
+        raise ValueError("Return must be performed by the member who issued the book.")
+
+    with transaction.atomic():
+        books = _lock_books(book_ids)
+        issues = {
+            txn.book_id: txn
+            for txn in BookTransaction.objects.select_for_update().filter(
+                book__in=books, txn_type=BookTransaction.TYPE_ISSUE, is_active=True
+            ).order_by("book_id")
+        }
+        not_issued = [b for b in books if b.pk not in issues]
+        if not_issued:
+            raise ValueError(f"No active issue exists for: {_codes(not_issued)}")
+        others = [b for b in books if issues[b.pk].member_id != member.pk]
+        if others:
+            raise ValueError(f"Not on loan to this member: {_codes(others)}")
+
+        now = timezone.now()
+        for txn in issues.values():
+            txn.return_date, txn.is_active, txn.updated_at = now, False, now
+            txn.fine_amount = overdue_fine(txn.due_date, now)
+        BookTransaction.objects.bulk_update(list(issues.values()), ["return_date", "is_active", "fine_amount", "updated_at"])
+        txns = BookTransaction.objects.bulk_create([
+            BookTransaction(
+                book=book, member=member, actor=actor, txn_type=BookTransaction.TYPE_RETURN,
+                return_date=now, fine_amount=issues[book.pk].fine_amount, is_active=False, remarks=remarks,
+            )
+            for book in books
+        ])
+        _set_book_state(books, Book.STATUS_AVAILABLE, None, actor, now)
+        member_summary.loans_closed(member.pk, len(books), sum(txn.fine_amount for txn in issues.values()))
+        AuditLog.objects.bulk_create(
+            _audit_rows(txns, {b.pk: b for b in books}, actor, AuditLog.ACTION_BOOK_RETURN, Book.STATUS_AVAILABLE)
+        )
+    _changed()
+    return txns
@@ -0,0 +1,85 @@
+# library/codes.py
+"""
+ILAS – Book Code Allocation
+---------------------------
+Every Book is inserted once with its final book_code (ILAS-ET-0001, ...). There is
+no placeholder INSERT followed by an UPDATE, so the unique book_code index is
+written once per book.
+
+Numbers come from:
+- PostgreSQL: the `library_book_code_seq` sequence. nextval() is not rolled back
+  with the caller's transaction, so each process reserves blocks of
+  LIBRARY_BOOK_CODE_BLOCK numbers and hands single codes out locally. Bulk inserts
+  fetch their whole batch in one query.
+- Other backends (SQLite dev/tests): the CodeCounter row, bumped inside the caller's
+  transaction. A rollback hands the numbers back, so nothing is cached.
+
+Codes are unique and increasing per process, but not contiguous and not tied to
+the primary key. Unused numbers from a reserved block are skipped.
+"""
+
+import re
+import threading
+from collections import deque
+from typing import List
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Book, CodeCounter
+
+SEQUENCE_NAME = "library_book_code_seq"
+COUNTER_NAME = "book_code"
+CODE_RE = re.compile(r"^ILAS-ET-(\d+)$")
+
+_block = deque()
+_block_lock = threading.Lock()
+
+
+def highest_code_number(book_model=Book) -> int:
+    """Largest number used by an existing ILAS-ET-nnnn code or primary key (seed for new counters)."""
+    highest = 0
+    for code in book_model.objects.filter(book_code__startswith="ILAS-ET-").values_list("book_code", flat=True).iterator():
+        match = CODE_RE.match(code)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    last_pk = book_model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    return max(highest, last_pk)
+
+
+def _from_sequence(n: int) -> List[int]:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT nextval('{SEQUENCE_NAME}') FROM generate_series(1, %s)", [n])
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def _from_counter(n: int) -> List[int]:
+    with transaction.atomic():
+        counter = CodeCounter.objects.select_for_update().filter(name=COUNTER_NAME).first()
+        if counter is None:
+            counter = CodeCounter.objects.create(name=COUNTER_NAME, value=highest_code_number())
+        first = counter.value + 1
+        counter.value += n
+        counter.save(update_fields=["value"])
+    return list(range(first, first + n))
+
+
+def allocate_numbers(n: int) -> List[int]:
+    if n <= 0:
+        return []
+    return _from_sequence(n) if connection.vendor == "postgresql" else _from_counter(n)
+
+
+def allocate_book_codes(n: int) -> List[str]:
+    """`n` fresh book codes, in increasing order (one round trip)."""
+    return [Book.default_book_code(number) for number in allocate_numbers(n)]
+
+
+def next_book_code() -> str:
+    """One fresh book code; on PostgreSQL served from this process's reserved block."""
+    if connection.vendor != "postgresql":
+        return allocate_book_codes(1)[0]
+    with _block_lock:
+        if not _block:
+            _block.extend(_from_sequence(int(getattr(settings, "LIBRARY_BOOK_CODE_BLOCK", 20))))
+        return Book.default_book_code(_block.popleft())
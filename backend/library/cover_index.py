@@ -0,0 +1,217 @@
+# library/cover_index.py
+"""
+ILAS – Cover-Existence Index
+----------------------------
+Covers uploaded to Cloudinary under the book's ISBN (public_id `<isbn>` or
+`<LIBRARY_COVER_INDEX_FOLDER>/<isbn>`) are tracked in the CoverIndex table, one row
+per normalized ISBN: the public_id and URL when a cover exists, "" when none was
+found, and when it was checked.
+
+Readers never call Cloudinary:
+- the bulk importer takes existing covers from lookup() (one IN query per batch);
+- book list views add each book's entry to the page query (with_entries(), a
+  correlated subquery on the unique isbn), so covers cost no extra query; the
+  serializers read them through page_cover_urls() and return the default cover
+  for ISBNs without one, instead of guessing `<isbn>.jpg` URLs.
+
+ISBNs that are unknown or older than LIBRARY_COVER_INDEX_TTL_HOURS are handed to
+schedule_refresh(): refresh() runs on Celery (USE_CELERY) or a background thread,
+checks them with concurrent resources_by_ids calls (LIBRARY_COVER_INDEX_WORKERS)
+and bumps the catalog generation when a cover appeared or went away. `manage.py
+refresh_cover_index` does the same for the whole catalog (cron).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Replace, Trim, Upper
+from django.utils import timezone
+
+from .models import Book, CoverIndex, clean_isbn
+from .tasks import bump_catalog_generation, is_celery_available, refresh_cover_index, safe_celery_call
+
+logger = logging.getLogger(__name__)
+
+# resources_by_ids takes up to 100 ids: 50 ISBNs × 2 candidate public_ids
+CHUNK = 50
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: set = set()
+_lock = threading.Lock()
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=float(getattr(settings, "LIBRARY_COVER_INDEX_TTL_HOURS", 24)))
+
+
+def _folder() -> str:
+    return getattr(settings, "LIBRARY_COVER_INDEX_FOLDER", "ilas/book_covers").strip("/")
+
+
+def remote_enabled() -> bool:
+    try:
+        import cloudinary
+
+        return bool(cloudinary.config().cloud_name)
+    except Exception:
+        return False
+
+
+# ----------------------------------------------------------------------
+# Reads (local table only)
+# ----------------------------------------------------------------------
+def _entries(isbns: Iterable[str]) -> Dict[str, CoverIndex]:
+    wanted = {clean_isbn(i) for i in isbns} - {""}
+    if not wanted:
+        return {}
+    found = CoverIndex.objects.in_bulk(list(wanted), field_name="isbn")
+    stale = timezone.now() - _ttl()
+    due = [i for i in wanted if i not in found or found[i].checked_at < stale]
+    if due:
+        schedule_refresh(due)
+    return found
+
+
+def with_entries(queryset):
+    """Annotate books with their index entry: indexed_cover_url, indexed_cover_checked_at."""
+    # SQL spelling of clean_isbn()
+    isbn = Upper(Replace(Trim(OuterRef("isbn")), Value("-"), Value("")))
+    entry = CoverIndex.objects.filter(isbn=isbn)
+    return queryset.annotate(
+        indexed_cover_url=Subquery(entry.values("url")[:1]),
+        indexed_cover_checked_at=Subquery(entry.values("checked_at")[:1]),
+    )
+
+
+def lookup(isbns: Iterable[str]) -> Dict[str, str]:
+    """{clean isbn: public_id} for the ISBNs known to have a cover."""
+    return {isbn: e.public_id for isbn, e in _entries(isbns).items() if e.public_id}
+
+
+def cover_urls(isbns: Iterable[str]) -> Dict[str, str]:
+    """{clean isbn: cover URL} for the ISBNs known to have a cover."""
+    return {isbn: e.url for isbn, e in _entries(isbns).items() if e.url}
+
+
+def page_cover_urls(books: Iterable[Book]) -> Dict[str, str]:
+    """cover_urls() for a page of books; no query when they come from with_entries()."""
+    books = [b for b in books if clean_isbn(b.isbn)]
+    if not all(hasattr(b, "indexed_cover_checked_at") for b in books):
+        return cover_urls(b.isbn for b in books)
+    stale = timezone.now() - _ttl()
+    due = {
+        clean_isbn(b.isbn) for b in books
+        if b.indexed_cover_checked_at is None or b.indexed_cover_checked_at < stale
+    }
+    if due:
+        schedule_refresh(due)
+    return {clean_isbn(b.isbn): b.indexed_cover_url for b in books if b.indexed_cover_url}
+
+
+# ----------------------------------------------------------------------
+# Refresh (background)
+# ----------------------------------------------------------------------
+def schedule_refresh(isbns: Iterable[str]) -> None:
+    """Queue a background check of `isbns` (ISBNs already queued in this process are skipped)."""
+    if not remote_enabled():
+        return
+    with _lock:
+        isbns = sorted(set(isbns) - _pending)
+        _pending.update(isbns)
+    if not isbns:
+        return
+    if getattr(settings, "USE_CELERY", False) and is_celery_available():
+        safe_celery_call(refresh_cover_index, isbns)
+        with _lock:
+            _pending.difference_update(isbns)
+    else:
+        _get_executor().submit(_refresh_in_thread, isbns)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ilas-cover-index")
+        return _executor
+
+
+def _refresh_in_thread(isbns: List[str]) -> None:
+    try:
+        refresh(isbns)
+    except Exception:
+        logger.exception("⚠️ Cover index refresh failed")
+    finally:
+        with _lock:
+            _pending.difference_update(isbns)
+        connections.close_all()
+
+
+def _fetch(isbns: List[str]) -> Optional[Dict[str, dict]]:
+    """{isbn: resource} for one chunk; None when the chunk could not be checked."""
+    import cloudinary.api
+
+    folder = _folder()
+    candidates = {isbn: isbn for isbn in isbns}
+    if folder:
+        candidates.update({f"{folder}/{isbn}": isbn for isbn in isbns})
+    try:
+        result = cloudinary.api.resources_by_ids(list(candidates))
+    except Exception as e:
+        logger.warning(f"⚠️ Cloudinary cover check failed: {e}")
+        return None
+    found = {}
+    for res in result.get("resources", []):
+        isbn = candidates.get(res.get("public_id"))
+        if isbn and (isbn not in found or "/" in res["public_id"]):  # folder copy wins
+            found[isbn] = res
+    return found
+
+
+def due_isbns() -> List[str]:
+    """Catalog ISBNs never checked, plus entries past the TTL."""
+    known = set(CoverIndex.objects.values_list("isbn", flat=True))
+    catalog = {clean_isbn(i) for i in Book.objects.order_by().values_list("isbn", flat=True).distinct()} - {""}
+    stale = CoverIndex.objects.filter(checked_at__lt=timezone.now() - _ttl()).values_list("isbn", flat=True)
+    return sorted((catalog - known) | set(stale))
+
+
+def refresh(isbns: Optional[Iterable[str]] = None) -> int:
+    """Check `isbns` (default: due_isbns()) on Cloudinary and store the answers. Returns entries written."""
+    isbns = sorted({clean_isbn(i) for i in (due_isbns() if isbns is None else isbns)} - {""})
+    if not isbns:
+        return 0
+    chunks = [isbns[i:i + CHUNK] for i in range(0, len(isbns), CHUNK)]
+    workers = int(getattr(settings, "LIBRARY_COVER_INDEX_WORKERS", 4))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ilas-cover-check") as pool:
+        results = list(pool.map(_fetch, chunks))
+
+    now = timezone.now()
+    existing = CoverIndex.objects.in_bulk(isbns, field_name="isbn")
+    new, changed, moved = [], [], False
+    for chunk, found in zip(chunks, results):
+        if found is None:
+            continue  # keep the old answer; retried on the next refresh
+        for isbn in chunk:
+            res = found.get(isbn) or {}
+            public_id, url = res.get("public_id", ""), res.get("secure_url") or res.get("url") or ""
+            entry = existing.get(isbn)
+            if entry is None:
+                new.append(CoverIndex(isbn=isbn, public_id=public_id, url=url, checked_at=now))
+                moved |= bool(public_id)
+            else:
+                moved |= public_id != entry.public_id
+                entry.public_id, entry.url, entry.checked_at = public_id, url, now
+                changed.append(entry)
+    CoverIndex.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+    CoverIndex.objects.bulk_update(changed, ["public_id", "url", "checked_at"], batch_size=500)
+    if moved:
+        # Cached catalog pages still show the old cover (or the default one)
+        bump_catalog_generation()
+    return len(new) + len(changed)
@@ -0,0 +1,64 @@
+# library/covers.py
+"""
+ILAS – Cover Image Storage
+--------------------------
+Destination of the cover images that come with a bulk upload (importer.py pushes
+them from a thread pool after the rows are inserted, then back-fills
+Book.cover_image in bulk). LIBRARY_COVER_STORAGE names the backend class:
+
+- CloudinaryCoverStorage (default): one Cloudinary upload per image; the stored
+  value is the public_id, like the covers listed in the cover index (cover_index.py).
+- LocalCoverStorage: Django's default storage (MEDIA_ROOT) under covers/; the
+  stand-in for development and tests.
+
+Images are normalized first (images.py): store_cover() keeps a downsized cover in
+Book.cover_image and a list thumbnail in Book.cover_thumbnail.
+
+`save(name, data) -> stored value` is called from several threads at once;
+`url(stored value)` serves the thumbnail URL.
+"""
+
+from typing import Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils.module_loading import import_string
+
+from .images import cover_variants
+
+
+class CloudinaryCoverStorage:
+    def save(self, name: str, data: bytes) -> str:
+        import cloudinary.uploader
+
+        result = cloudinary.uploader.upload(data, public_id=name, overwrite=True, resource_type="image")
+        return result["public_id"]
+
+    def url(self, value: str) -> str:
+        import cloudinary
+
+        return cloudinary.CloudinaryImage(value).build_url(secure=True)
+
+
+class LocalCoverStorage:
+    def save(self, name: str, data: bytes) -> str:
+        from django.core.files.storage import default_storage
+
+        return default_storage.save(f"covers/{name}.jpg", ContentFile(data))
+
+    def url(self, value: str) -> str:
+        from django.core.files.storage import default_storage
+
+        return default_storage.url(value)
+
+
+def get_cover_storage():
+    path = getattr(settings, "LIBRARY_COVER_STORAGE", "library.covers.CloudinaryCoverStorage")
+    return import_string(path)()
+
+
+def store_cover(name: str, data: bytes, storage=None) -> Tuple[str, str]:
+    """Normalize an uploaded cover and store it plus its thumbnail. Returns both stored values."""
+    storage = storage or get_cover_storage()
+    cover, thumbnail = cover_variants(data)
+    return storage.save(name, cover), storage.save(f"{name}_thumb", thumbnail)
@@ -0,0 +1,68 @@
+# library/facets.py
+"""
+ILAS – Catalog Facet Counts
+---------------------------
+Sidebar counts (category, status, language, library_section) for the current
+filter set, opt-in via `?facets=1` (all) or `?facets=category,status`.
+
+All requested facets come from ONE grouped query over the combination of facet
+columns (a few hundred groups at most), rolled up per facet in Python. That works
+on every backend, unlike GROUPING SETS. Results are cached per filter hash (the
+compiled WHERE clause) until the next catalog or circulation change, when the
+cache is shared by all workers (tasks.shared_cache).
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Count, QuerySet
+
+from .tasks import generation_cache_key, shared_cache
+
+FACET_FIELDS = ("category", "status", "language", "library_section")
+
+
+def requested_facets(request) -> Optional[Tuple[str, ...]]:
+    """Facet fields asked for by `?facets=`; None when facets were not requested."""
+    raw = (request.query_params.get("facets") or "").strip().lower()
+    if not raw or raw in ("0", "false", "no"):
+        return None
+    if raw in ("1", "true", "yes", "all"):
+        return FACET_FIELDS
+    fields = tuple(f for f in FACET_FIELDS if f in {p.strip() for p in raw.split(",")})
+    return fields or None
+
+
+def facet_counts(queryset: QuerySet, fields: Sequence[str] = FACET_FIELDS) -> Dict[str, List[dict]]:
+    """
+    {facet: [{"value": ..., "count": n}, ...]} for the books in `queryset`,
+    each facet ordered by count (desc) then value.
+    """
+    fields = tuple(fields)
+    qs = queryset.order_by()
+    try:
+        sql, params = qs.query.sql_with_params()
+    except EmptyResultSet:
+        return {f: [] for f in fields}
+
+    key = generation_cache_key("ilas_facets", fields, sql, params) if shared_cache() else None
+    cached = cache.get(key) if key else None
+    if cached is not None:
+        return cached
+
+    counters = {f: Counter() for f in fields}
+    for row in qs.values_list(*fields).annotate(n=Count("id")):
+        n = row[-1]
+        for field, value in zip(fields, row):
+            counters[field][value or ""] += n
+
+    facets = {
+        field: [{"value": v, "count": n} for v, n in sorted(c.items(), key=lambda kv: (-kv[1], kv[0]))]
+        for field, c in counters.items()
+    }
+    if key:
+        cache.set(key, facets, timeout=int(getattr(settings, "LIBRARY_FACET_CACHE_SECONDS", 300)))
+    return facets
@@ -0,0 +1,114 @@
+# library/http_cache.py
+"""
+ILAS – HTTP Caching for the Public Catalog
+------------------------------------------
+Conditional GET driven by the catalog generation (bumped by the Book signals and
+bulk imports, see tasks.py):
+
+- Strong ETag   = hash(catalog generation, path, query string, Accept).
+- Last-Modified = time of the last catalog change.
+- A matching If-None-Match / If-Modified-Since gets 304 before the view body runs:
+  two cache reads, no database queries, no serialization.
+- Cache-Control: public. Browsers revalidate after LIBRARY_CATALOG_MAX_AGE;
+  reverse proxies may reuse a response for LIBRARY_CATALOG_PROXY_MAX_AGE (s-maxage).
+- The generation must be shared by all workers (tasks.shared_cache). With a
+  process-local cache a worker that did not handle a change would keep its old
+  ETag and answer 304 to stale validators, so no ETag / Last-Modified is sent.
+
+Rendered-page cache (PublicBookListView): the JSON bytes of the first
+LIBRARY_PUBLIC_PAGE_CACHE_PAGES pages are cached per (host, query, category, page,
+page_size, facets, catalog generation). A hit skips the ORM and DRF serialization;
+a catalog change moves the generation and orphans the old entries. Like the
+ETags, this needs a cache shared by all workers: otherwise pages are not cached.
+"""
+
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .tasks import get_catalog_generation, get_catalog_modified, shared_cache
+
+
+def catalog_etag(request, *args, **kwargs) -> str:
+    query = sorted(request.GET.lists())
+    raw = f"{get_catalog_generation()}|{request.path}|{query}|{request.META.get('HTTP_ACCEPT', '')}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def catalog_last_modified(request, *args, **kwargs) -> datetime:
+    return datetime.fromtimestamp(int(get_catalog_modified()), tz=dt_timezone.utc)
+
+
+def conditional_catalog_get(view_method):
+    """Decorate an APIView `get`: ETag / Last-Modified / 304 plus proxy-friendly Cache-Control."""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if shared_cache():
+            conditional = condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified)(
+                lambda req, *a, **kw: view_method(self, req, *a, **kw)
+            )
+            response = conditional(request, *args, **kwargs)
+        else:
+            response = view_method(self, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=int(getattr(settings, "LIBRARY_CATALOG_MAX_AGE", 0)),
+                s_maxage=int(getattr(settings, "LIBRARY_CATALOG_PROXY_MAX_AGE", 60)),
+            )
+            patch_vary_headers(response, ["Accept"])
+        return response
+
+    return wrapper
+
+
+# ----------------------------------------------------------------------
+# Rendered-page cache
+# ----------------------------------------------------------------------
+PAGE_CACHE_PARAMS = ("q", "category", "page", "page_size", "facets")
+
+
+def public_page_cache_key(request) -> Optional[str]:
+    """Key for this request's rendered JSON page; None when not cacheable (no shared cache, browsable API, deep page)."""
+    if not shared_cache():
+        return None
+    if getattr(getattr(request, "accepted_renderer", None), "format", None) != "json":
+        return None
+    try:
+        page = int(request.query_params.get("page") or 1)
+    except ValueError:
+        return None
+    if page > int(getattr(settings, "LIBRARY_PUBLIC_PAGE_CACHE_PAGES", 5)):
+        return None
+    params = [request.query_params.get(p, "").strip() for p in PAGE_CACHE_PARAMS]
+    # Host and scheme are part of the key: next/previous links are absolute
+    raw = f"{request.scheme}://{request.get_host()}{request.path}|{params}"
+    return f"ilas_public_page:{get_catalog_generation()}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def cached_page_response(key: str) -> Optional[HttpResponse]:
+    content = cache.get(key)
+    if content is None:
+        return None
+    return HttpResponse(content, content_type="application/json")
+
+
+def cache_page_response(key: str, response):
+    """Store the bytes DRF renders for `response` (a miss still returns a normal Response)."""
+    timeout = int(getattr(settings, "LIBRARY_PUBLIC_PAGE_CACHE_SECONDS", 300))
+
+    def store(rendered):
+        if rendered.status_code == 200:
+            cache.set(key, rendered.content, timeout=timeout)
+
+    response.add_post_render_callback(store)
+    return response
@@ -0,0 +1,72 @@
+# library/images.py
+"""
+ILAS – Image Normalization
+--------------------------
+Phone-camera photos arrive as 3–8 MB, 12+ megapixel files. Before anything is
+stored, covers and profile images go through Pillow:
+
+- EXIF orientation applied, transparency flattened onto white, converted to RGB;
+- JPEGs are decoded at reduced scale (Image.draft), so a 12 MP photo never
+  becomes a full-size bitmap in memory;
+- downsized to fit a square box and re-encoded as progressive JPEG.
+
+At most one decode per CPU runs at a time, whatever the number of upload threads
+(Pillow releases the GIL while decoding, so these run in parallel).
+
+Sizes: covers LIBRARY_COVER_MAX_SIDE, list thumbnails LIBRARY_COVER_THUMB_SIDE,
+avatars PROFILE_IMAGE_MAX_SIDE; quality LIBRARY_IMAGE_QUALITY.
+"""
+
+import io
+import os
+import threading
+from typing import Tuple
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+_decode_slots = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+
+def _setting(name: str, default: int) -> int:
+    return int(getattr(settings, name, default))
+
+
+def _load(data: bytes, box: int) -> Image.Image:
+    """Decode `data` already reduced to fit a box × box square, as RGB."""
+    image = Image.open(io.BytesIO(data))
+    width, height = image.size
+    scale = min(1.0, box / max(width, height, 1))
+    # JPEG: the decoder scales down by 1/2, 1/4 or 1/8 while staying above the target size
+    image.draft("RGB", (max(1, round(width * scale)), max(1, round(height * scale))))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((box, box), Image.LANCZOS)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def _encode(image: Image.Image) -> bytes:
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=_setting("LIBRARY_IMAGE_QUALITY", 82), optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def normalize_image(data: bytes, max_side: int) -> bytes:
+    """`data` (any format Pillow reads) as a JPEG no larger than max_side × max_side."""
+    with _decode_slots:
+        return _encode(_load(data, max_side))
+
+
+def cover_variants(data: bytes) -> Tuple[bytes, bytes]:
+    """(cover, list thumbnail) JPEGs from one decode of an uploaded cover."""
+    thumb_side = _setting("LIBRARY_COVER_THUMB_SIDE", 200)
+    with _decode_slots:
+        image = _load(data, _setting("LIBRARY_COVER_MAX_SIDE", 800))
+        cover = _encode(image)
+        image.thumbnail((thumb_side, thumb_side), Image.LANCZOS)
+        return cover, _encode(image)
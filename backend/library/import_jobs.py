@@ -0,0 +1,328 @@
+# library/import_jobs.py
+"""
+ILAS – Background Bulk-Import Jobs
+----------------------------------
+The bulk upload endpoint stores the upload (.xlsx, .csv or .jsonl), checks that it
+can be read and returns a task id at once. The import (importer.py) then runs:
+- on Celery through safe_celery_call when USE_CELERY is on, or
+- on a small in-process thread pool (LIBRARY_IMPORT_WORKERS) otherwise, or
+- inline when LIBRARY_IMPORT_ASYNC is False (tests, one-off scripts).
+
+Progress and the final summary are published with publish_progress(task_id)
+and read back by task_status_view (GET /api/tasks/status/<task_id>/, admins only).
+When the cache is not shared between processes (shared_cache(), no REDIS_URL) the
+status is also written to LIBRARY_IMPORT_DIR/<task_id>/status.json, so a poll that
+lands on another worker still sees the job.
+
+Upsert jobs (mode="upsert", importer.py) hash the upload first: a file whose exact
+content was already applied without errors (ImportedFile) completes at once with
+every row counted as unchanged, unless force=True.
+
+Dry runs (dry_run=True, POST /api/v1/library/books/bulk-upload/validate/) go
+through the same job: the whole file is validated and checked for header problems
+and duplicate ISBN + accession numbers, nothing is written, and the summary and
+error report say what a real import would do.
+
+Files live in LIBRARY_IMPORT_DIR/<task_id>/, a volume shared with the workers.
+Uploads are removed when the job ends. The status file and the per-row error
+report (errors.csv) are kept for LIBRARY_IMPORT_RETENTION_HOURS and served by
+GET /api/v1/library/books/bulk-upload/<task_id>/errors/.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.urls import reverse
+
+from .importer import (
+    IMPORT_MODES,
+    BookImporter,
+    ImportFileError,
+    ImportLimitError,
+    ZipImageIndex,
+    open_row_reader,
+    upload_extension,
+    zip_max_rows,
+)
+from .models import AuditLog, ImportedFile, create_audit
+from .tasks import (
+    create_task_id,
+    is_celery_available,
+    run_book_import,
+    safe_celery_call,
+    shared_cache,
+    task_progress_key,
+    update_task_progress,
+)
+
+logger = logging.getLogger(__name__)
+
+TASK_PREFIX = "IMPORT"
+TASK_ID_RE = re.compile(rf"^{TASK_PREFIX}-[0-9a-f-]{{36}}$")
+ERROR_REPORT = "errors.csv"
+STATUS_FILE = "status.json"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def import_dir() -> str:
+    return getattr(settings, "LIBRARY_IMPORT_DIR", None) or os.path.join(tempfile.gettempdir(), "ilas_imports")
+
+
+def job_dir(task_id: str) -> str:
+    if not TASK_ID_RE.match(task_id or ""):
+        raise ValueError("Invalid import task id")
+    return os.path.join(import_dir(), task_id)
+
+
+def error_report_path(task_id: str) -> Optional[str]:
+    """Path of the job's error report, or None when the id is unknown / report is gone."""
+    try:
+        path = os.path.join(job_dir(task_id), ERROR_REPORT)
+    except ValueError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+# ----------------------------------------------------------------------
+# Status
+# ----------------------------------------------------------------------
+def publish_progress(task_id: str, progress: int, message: str = "", status: str = "IN_PROGRESS",
+                     result=None) -> None:
+    """update_task_progress, plus the job's status.json when workers don't share the cache."""
+    data = update_task_progress(task_id, progress, message, status=status, result=result)
+    if shared_cache():
+        return
+    directory = job_dir(task_id)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, os.path.join(directory, STATUS_FILE))
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def job_status(task_id: str) -> Optional[dict]:
+    """Latest published status of an import job, or None when the id is invalid or unknown."""
+    if not TASK_ID_RE.match(task_id or ""):
+        return None
+    if not shared_cache():
+        try:
+            with open(os.path.join(job_dir(task_id), STATUS_FILE), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            pass
+    data = cache.get(task_progress_key(task_id))
+    return data if isinstance(data, dict) and "status" in data else None
+
+
+# ----------------------------------------------------------------------
+# Enqueue (request side)
+# ----------------------------------------------------------------------
+def _store(uploaded, path: str) -> str:
+    with open(path, "wb") as fh:
+        for chunk in uploaded.chunks():
+            fh.write(chunk)
+    return path
+
+
+def _check_upload(upload_path: str, images_path: Optional[str]) -> None:
+    """Cheap up-front checks so unreadable files still get an immediate 400."""
+    reader = open_row_reader(upload_path, upload_path)
+    try:
+        if images_path:
+            # Cover uploads dominate the job's run time: bound the rows (zip_max_rows)
+            limit = zip_max_rows()
+            rows = sum(1 for _ in islice(reader, limit + 1))
+            if rows > limit:
+                row_count = reader.estimated_rows or f"more than {limit}"
+                raise ImportLimitError(
+                    f"Bulk upload with ZIP images is limited to {limit} books (you have {row_count}). "
+                    "Use Excel-only upload for larger datasets."
+                )
+    finally:
+        reader.close()
+    if images_path and not zipfile.is_zipfile(images_path):
+        raise ImportFileError("Invalid ZIP file: File is not a zip file")
+
+
+def start_import_job(user, excel_file, images_zip=None, mode: str = "insert", force: bool = False,
+                     dry_run: bool = False) -> str:
+    """Store the upload, validate it cheaply and dispatch the import. Returns the task id."""
+    if mode not in IMPORT_MODES:
+        raise ImportFileError(f"Unknown import mode '{mode}' (expected one of: {', '.join(IMPORT_MODES)}).")
+    if mode == "upsert" and images_zip:
+        raise ImportFileError("Upsert imports do not accept a cover images ZIP.")
+    if dry_run and images_zip:
+        raise ImportFileError("Dry runs check the rows only; leave out the cover images ZIP.")
+    prune_old_jobs()
+    task_id = create_task_id(TASK_PREFIX)
+    directory = job_dir(task_id)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        # The stored name keeps the source format (.xlsx / .csv / .jsonl)
+        upload_path = _store(excel_file, os.path.join(directory, "upload" + upload_extension(excel_file.name)))
+        images_path = _store(images_zip, os.path.join(directory, "images.zip")) if images_zip else None
+        _check_upload(upload_path, images_path)
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    publish_progress(task_id, 0, "Queued", status="PENDING")
+    args = (task_id, user.pk, upload_path, images_path, mode, force, dry_run)
+    if getattr(settings, "USE_CELERY", False) and is_celery_available():
+        dispatched = safe_celery_call(run_book_import, *args)
+        if "error" in dispatched:
+            raise RuntimeError(dispatched["error"])
+    elif getattr(settings, "LIBRARY_IMPORT_ASYNC", True):
+        _get_executor().submit(_run_in_thread, *args)
+    else:
+        run_import_job(*args)
+    return task_id
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(getattr(settings, "LIBRARY_IMPORT_WORKERS", 2)),
+                thread_name_prefix="ilas-import",
+            )
+        return _executor
+
+
+def _run_in_thread(*args):
+    try:
+        run_import_job(*args)
+    finally:
+        # Pool threads outlive the job: don't leak their DB connections
+        connections.close_all()
+
+
+def prune_old_jobs() -> None:
+    """Remove job directories (and their error reports) past the retention window."""
+    root = import_dir()
+    cutoff = time.time() - float(getattr(settings, "LIBRARY_IMPORT_RETENTION_HOURS", 24)) * 3600
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir() and TASK_ID_RE.match(entry.name) and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# ----------------------------------------------------------------------
+# Run (worker side)
+# ----------------------------------------------------------------------
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def run_import_job(task_id: str, user_id: int, upload_path: str, images_path: Optional[str] = None,
+                   mode: str = "insert", force: bool = False, dry_run: bool = False) -> dict:
+    """Import (or dry-run) the stored upload, streaming row errors into errors.csv. Returns the summary."""
+    report_path = os.path.join(job_dir(task_id), ERROR_REPORT)
+
+    def progress(processed, estimated):
+        pct = min(99, processed * 100 // estimated) if estimated else 0
+        publish_progress(task_id, pct, f"{processed} rows processed")
+
+    try:
+        user = get_user_model().objects.get(pk=user_id)
+        digest = file_sha256(upload_path) if mode == "upsert" and not dry_run else None
+        seen = ImportedFile.objects.filter(sha256=digest).first() if digest and not force else None
+        if seen:
+            summary = {
+                "created": 0, "updated": 0, "unchanged": seen.rows, "failed": 0, "errors": [],
+                "already_imported_at": seen.created_at.isoformat(),
+            }
+            publish_progress(task_id, 100, "File already imported", status="COMPLETED", result=summary)
+            return summary
+
+        publish_progress(task_id, 0, "Dry run started" if dry_run else "Import started")
+        images = None
+        if images_path:
+            images = ZipImageIndex(images_path)
+            logger.warning(f"🖼️ Indexed {len(images)} images in ZIP")
+
+        reader = open_row_reader(upload_path, upload_path)
+        with open(report_path, "w", newline="", encoding="utf-8") as report:
+            writer = csv.writer(report)
+            writer.writerow(["row", "message"])
+            try:
+                importer = BookImporter(
+                    user, images=images, progress=progress, mode=mode, dry_run=dry_run,
+                    on_error=lambda row, message: writer.writerow([row, message]),
+                )
+                if dry_run:
+                    importer.check_header(reader.header)
+                result = importer.run(reader, total=reader.estimated_rows)
+            finally:
+                reader.close()
+                if images is not None:
+                    images.close()
+
+        counts = (f"{result.created} created, {result.updated} updated, "
+                  f"{result.unchanged} unchanged, {result.failed} failed")
+        summary = result.as_dict()
+        if result.errors:
+            summary["errors_url"] = reverse("library:books-bulk-upload-errors", args=[task_id])
+        else:
+            os.remove(report_path)
+        if dry_run:
+            publish_progress(task_id, 100, f"Dry run: {counts}", status="COMPLETED", result=summary)
+            return summary
+
+        create_audit(
+            user,
+            AuditLog.ACTION_BULK_UPLOAD,
+            "Book",
+            "BulkImport",
+            new_values={
+                "created": result.created, "updated": result.updated,
+                "unchanged": result.unchanged, "failed": result.failed,
+            },
+            remarks=f"Bulk upload ({mode}): {counts}",
+            source="admin-ui",
+        )
+        if digest and not result.failed:
+            ImportedFile.objects.update_or_create(
+                sha256=digest,
+                defaults={"rows": result.created + result.updated + result.unchanged, "imported_by": user},
+            )
+        publish_progress(task_id, 100, counts, status="COMPLETED", result=summary)
+        return summary
+    except Exception as e:
+        logger.exception("🔥 BULK IMPORT JOB CRASHED (%s)", task_id)
+        publish_progress(task_id, 100, f"Bulk upload failed: {e}", status="FAILED")
+        return {"error": str(e)}
+    finally:
+        for path in (upload_path, images_path):
+            if path and os.path.exists(path):
+                os.remove(path)
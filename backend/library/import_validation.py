@@ -0,0 +1,169 @@
+# library/import_validation.py
+"""
+ILAS – Compiled Row Validation for Bulk Imports
+-----------------------------------------------
+`BulkBookImportSerializer(data=row).is_valid()` deep-copies 21 fields and walks
+the whole DRF machinery for every row. `RowValidator` is built once from that
+serializer's field declarations and validates plain row dicts:
+
+- plain string / empty / missing cells (nearly every cell) are checked inline:
+  required, null, blank, trimming, max_length;
+- anything else (numbers in text columns, publication_year, book_cost, NUL or
+  surrogate characters) goes through the serializer's own field objects;
+- the serializer's validate_<field>() hooks and validate() then run as usual.
+
+Results and error messages are therefore exactly the serializer's: each row
+yields (validated_data, None) or (None, {field: [messages]}).
+
+validate_rows() validates a batch, fanned out over LIBRARY_IMPORT_VALIDATION_PROCESSES
+worker processes when set (0 = in-process). Rows are pickled both ways, so the
+pool only pays off for large batches on multi-core workers.
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty, get_error_detail
+from rest_framework.serializers import as_serializer_error
+
+from .serializers import BulkBookImportSerializer
+
+RowOutcome = Tuple[Optional[dict], Optional[Dict[str, list]]]
+
+# Below this a batch is validated in-process even when a pool is configured
+PARALLEL_MIN_ROWS = 200
+
+_SURROGATES = re.compile("[\ud800-\udfff]")
+
+
+class _FieldRule:
+    """One serializer field, with the inline fast path when it is a plain CharField."""
+
+    def __init__(self, serializer, name: str, field):
+        self.name = name
+        self.field = field
+        self.hook = getattr(serializer, f"validate_{name}", None)
+        self.fast = (
+            type(field) is serializers.CharField
+            and field.trim_whitespace
+            and field.min_length is None
+            and len(field.validators) == 2 + (field.max_length is not None)
+        )
+        if not self.fast:
+            return
+        self.max_length = field.max_length
+        messages = field.error_messages
+        self.msg_required = messages["required"]
+        self.msg_null = messages["null"]
+        self.msg_blank = messages["blank"]
+        self.msg_max_length = (
+            str(messages["max_length"]).format(max_length=field.max_length) if field.max_length is not None else None
+        )
+
+    def run(self, value):
+        if self.fast:
+            if value is empty:
+                if self.field.required:
+                    raise serializers.ValidationError(self.msg_required, code="required")
+                return self.field.get_default()  # raises SkipField when there is none
+            if value is None:
+                if not self.field.allow_null:
+                    raise serializers.ValidationError(self.msg_null, code="null")
+                return None
+            if type(value) is str:
+                value = value.strip()
+                if not value:
+                    if not self.field.allow_blank:
+                        raise serializers.ValidationError(self.msg_blank, code="blank")
+                    return ""
+                if "\x00" not in value and not _SURROGATES.search(value):
+                    if self.max_length is not None and len(value) > self.max_length:
+                        raise serializers.ValidationError(self.msg_max_length, code="max_length")
+                    return value
+        return self.field.run_validation(value)
+
+
+class RowValidator:
+    """
+    Validates import rows with BulkBookImportSerializer's rules.
+
+        validator = RowValidator()
+        data, errors = validator.validate({"title": "...", ...})
+    """
+
+    def __init__(self, serializer_class=BulkBookImportSerializer):
+        self.serializer = serializer_class()
+        self.rules = [
+            _FieldRule(self.serializer, name, field)
+            for name, field in self.serializer.fields.items()
+            if not field.read_only
+        ]
+
+    def validate(self, data: dict) -> RowOutcome:
+        attrs, errors = {}, {}
+        for rule in self.rules:
+            try:
+                value = rule.run(data.get(rule.name, empty))
+                if rule.hook is not None:
+                    value = rule.hook(value)
+            except serializers.ValidationError as exc:
+                errors[rule.name] = exc.detail
+            except DjangoValidationError as exc:
+                errors[rule.name] = get_error_detail(exc)
+            except SkipField:
+                pass
+            else:
+                attrs[rule.name] = value
+        if errors:
+            return None, errors
+        try:
+            return self.serializer.validate(attrs), None
+        except (serializers.ValidationError, DjangoValidationError) as exc:
+            return None, as_serializer_error(exc)
+
+    def validate_many(self, rows: List[dict]) -> List[RowOutcome]:
+        return [self.validate(row) for row in rows]
+
+
+# ----------------------------------------------------------------------
+# Batch entry point (optionally multi-process)
+# ----------------------------------------------------------------------
+_validator: Optional[RowValidator] = None
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_validator() -> RowValidator:
+    global _validator
+    if _validator is None:
+        _validator = RowValidator()
+    return _validator
+
+
+def _validate_chunk(rows: List[dict]) -> List[RowOutcome]:
+    # Runs in pool workers too: each process compiles its own validator once
+    return get_validator().validate_many(rows)
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=processes)
+    return _pool
+
+
+def validate_rows(rows: List[dict], processes: Optional[int] = None) -> List[RowOutcome]:
+    """Validate a batch of row dicts; outcomes come back in input order."""
+    if processes is None:
+        processes = int(getattr(settings, "LIBRARY_IMPORT_VALIDATION_PROCESSES", 0))
+    if processes <= 1 or len(rows) < PARALLEL_MIN_ROWS:
+        return _validate_chunk(rows)
+    size = -(-len(rows) // processes)
+    chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+    outcomes: List[RowOutcome] = []
+    for part in _get_pool(processes).map(_validate_chunk, chunks):
+        outcomes.extend(part)
+    return outcomes
@@ -0,0 +1,705 @@
+# library/importer.py
+"""
+ILAS – Streaming Book Import
+----------------------------
+Bounded-memory engine behind the bulk upload endpoint.
+
+- Rows are streamed from the upload and never collected: memory is one insert
+  batch plus a capped error list, whatever the file size. Sources: .xlsx (openpyxl
+  read-only), .csv and .jsonl / .ndjson (stdlib streaming parsers, several times
+  faster than xlsx); see open_row_reader(). All use the same header normalization
+  (strip + lowercase) and empty-cell -> None rules.
+- Rows are buffered and validated a batch at a time with BulkBookImportSerializer's
+  rules (compiled once, optionally over a process pool; import_validation.py).
+- Excel-only uploads: each valid batch goes in with one bulk_create (final book
+  codes included, codes.py) inside one transaction. When a write fails (a
+  constraint on one row), the batch is bisected in savepoints down to the
+  offending rows, which are reported with their row numbers; the rest is kept. The batch size adapts so that a batch takes about
+  LIBRARY_IMPORT_BATCH_SECONDS, clamped to [LIBRARY_IMPORT_BATCH_MIN,
+  LIBRARY_IMPORT_BATCH_MAX]. Existing covers come from the local cover index
+  (cover_index.py), one query per batch.
+- Upsert mode (mode="upsert") matches rows on normalized ISBN + accession number
+  (Book.import_key): one SELECT per batch splits it into new / changed / unchanged
+  books; changes go in with INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and
+  bulk_create + bulk_update elsewhere. Rows without an accession number are inserted.
+- Uploads with a ZIP of covers insert rows the same way. The ZIP is indexed, not
+  loaded (ZipImageIndex); matched images are decompressed, downsized to a cover
+  plus a list thumbnail (images.py) and pushed to cover storage (covers.py) by a
+  bounded thread pool
+  (LIBRARY_COVER_UPLOAD_WORKERS) while the next batches are inserted, and
+  Book.cover_image is back-filled with one bulk_update at the end. Covers are
+  queued from transaction.on_commit, so rows of a rolled-back batch get none
+  (inside a caller's transaction they wait for its commit).
+- Dry runs (dry_run=True) stream the whole file through the same validation and
+  write nothing: each batch's ISBN + accession numbers are checked against the
+  catalog with one IN query and against the earlier rows of the file; header
+  problems come from header_problems(). The counts say what a real run would do.
+- Progress goes to an optional callback `progress(processed_rows, estimated_total)`
+  after every batch; every row error also goes to `on_error(row, message)` (the
+  job runner streams them into the downloadable report, import_jobs.py).
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import openpyxl
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .categories import books_added, books_moved
+from . import cover_index
+from .covers import get_cover_storage, store_cover
+from .import_validation import validate_rows
+from .models import Book, clean_isbn
+from .serializers import BulkBookImportSerializer
+from .tasks import bump_catalog_generation, bump_suggest_generation
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, Optional[int]], None]
+ErrorCallback = Callable[[int, str], None]
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def zip_max_rows() -> int:
+    """
+    Most rows accepted with a covers ZIP. Every matched image is decoded, resized
+    and uploaded, and the covered books wait for the final back-fill: the cap bounds
+    the job's run time and cover-storage traffic.
+    """
+    return int(_setting("LIBRARY_IMPORT_ZIP_MAX_ROWS", 1000))
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be read at all (reported as 400)."""
+
+
+class ImportLimitError(ImportFileError):
+    """The upload is readable but exceeds a size limit (reported as 400)."""
+
+
+class RowParseError:
+    """Yielded by a reader in place of a row dict for a line it could not parse."""
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+# ----------------------------------------------------------------------
+# Sources
+# ----------------------------------------------------------------------
+class ExcelRowReader:
+    """Streams (row_number, {header: value}) from the active sheet of a workbook."""
+
+    def __init__(self, file):
+        try:
+            # data_only=True to get values not formulas
+            self.workbook = openpyxl.load_workbook(file, data_only=True, read_only=True)
+            sheet = self.workbook.active
+            self._rows = sheet.iter_rows(values_only=True)
+            header_row = next(self._rows, None)
+        except Exception as e:
+            raise ImportFileError(f"Excel parsing error: {e}")
+        if header_row is None:
+            self.workbook.close()
+            raise ImportFileError("Empty Excel file.")
+
+        self.header = [str(c).strip().lower() if c else "" for c in header_row]
+        try:
+            # From the sheet's <dimension> record; None when the writer left it out
+            self.estimated_rows = max(sheet.max_row - 1, 0) if sheet.max_row else None
+        except Exception:
+            self.estimated_rows = None
+
+    def __iter__(self) -> Iterator[Tuple[int, dict]]:
+        for number, row in enumerate(self._rows, start=2):
+            yield number, dict(zip(self.header, row or ()))
+
+    def close(self):
+        self.workbook.close()
+
+
+def _normalize_header(value) -> str:
+    return str(value).strip().lower() if value else ""
+
+
+def _estimate_lines(fh, sample_bytes: int = 65536) -> Optional[int]:
+    """Line count estimated from file size and the line length in the first 64 KB."""
+    try:
+        start = fh.tell()
+        size = os.fstat(fh.fileno()).st_size if hasattr(fh, "fileno") else None
+        sample = fh.read(sample_bytes)
+        fh.seek(start)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        return None
+    if not sample:
+        return 0
+    lines = sample.count(b"\n") or 1
+    if size is None or len(sample) >= size - start:
+        return lines
+    return int((size - start) * lines / len(sample))
+
+
+class _TextRowReader:
+    """Common part of the CSV / JSON-Lines readers (path or binary file)."""
+
+    label = "text"
+
+    def __init__(self, file):
+        self._owned = isinstance(file, (str, os.PathLike))
+        self._binary = open(file, "rb") if self._owned else file
+        estimated = _estimate_lines(self._binary)
+        self.estimated_rows = max(estimated - 1, 0) if estimated is not None else None
+        self._text = io.TextIOWrapper(self._binary, encoding="utf-8-sig", newline="")
+        try:
+            self.header = self._read_header()
+        except ImportFileError:
+            self.close()
+            raise
+        except Exception as e:
+            self.close()
+            raise ImportFileError(f"{self.label} parsing error: {e}")
+
+    def close(self):
+        try:
+            self._text.detach()
+        except Exception:
+            pass
+        if self._owned:
+            self._binary.close()
+
+
+class CsvRowReader(_TextRowReader):
+    """Streams (row_number, {header: value}) from a UTF-8 CSV file with a header row."""
+
+    label = "CSV"
+
+    def _read_header(self) -> List[str]:
+        self._rows = csv.reader(self._text)
+        header_row = next(self._rows, None)
+        if header_row is None:
+            raise ImportFileError("Empty CSV file.")
+        return [_normalize_header(c) for c in header_row]
+
+    def __iter__(self) -> Iterator[Tuple[int, dict]]:
+        header = self.header
+        for number, row in enumerate(self._rows, start=2):
+            yield number, {k: (v if v != "" else None) for k, v in zip(header, row)}
+
+
+class JsonLinesRowReader(_TextRowReader):
+    """Streams (line_number, {key: value}) from a JSON-Lines file (one object per line)."""
+
+    label = "JSON-Lines"
+
+    def _read_header(self) -> List[str]:
+        # No header line: the first object's keys stand in for it
+        self._first = self._text.readline()
+        if not self._first.strip():
+            raise ImportFileError("Empty JSON-Lines file.")
+        first = json.loads(self._first)
+        if not isinstance(first, dict):
+            raise ImportFileError("JSON-Lines parsing error: line 1 is not a JSON object")
+        if self.estimated_rows is not None:
+            self.estimated_rows += 1  # every line is a row
+        return [_normalize_header(k) for k in first]
+
+    def __iter__(self) -> Iterator[Tuple[int, object]]:
+        yield 1, self._parse(self._first)
+        for number, line in enumerate(self._text, start=2):
+            if line.strip():
+                yield number, self._parse(line)
+
+    @staticmethod
+    def _parse(line: str):
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            return RowParseError(f"Invalid JSON: {e}")
+        if not isinstance(obj, dict):
+            return RowParseError("Expected a JSON object")
+        return {_normalize_header(k): (v if v != "" else None) for k, v in obj.items()}
+
+
+READERS = {
+    ".xlsx": ExcelRowReader,
+    ".csv": CsvRowReader,
+    ".jsonl": JsonLinesRowReader,
+    ".ndjson": JsonLinesRowReader,
+}
+
+
+def upload_extension(filename: str) -> str:
+    """Normalized source extension for an uploaded file name ('.xlsx' when unknown)."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if ext in READERS else ".xlsx"
+
+
+def open_row_reader(file, filename: str):
+    """Reader for `file` (path or binary file) picked by the upload's file name."""
+    return READERS[upload_extension(filename)](file)
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+class ZipImageIndex:
+    """
+    Cover images of a ZIP by lowercase file name. Only the central directory is
+    read up front; a member is decompressed when read() asks for it (safe from
+    several threads: ZipFile serializes access to the shared file).
+    """
+
+    def __init__(self, file):
+        try:
+            self._zip = zipfile.ZipFile(file)
+        except Exception as e:
+            raise ImportFileError(f"Invalid ZIP file: {e}")
+        self.max_bytes = int(_setting("LIBRARY_IMPORT_MAX_IMAGE_BYTES", 25 * 1024 * 1024))
+        self._members = {}
+        for info in self._zip.infolist():
+            if info.is_dir() or "__MACOSX" in info.filename:
+                continue
+            base = info.filename.split("/")[-1].lower().strip()
+            if base.endswith(IMAGE_EXTENSIONS):
+                self._members[base] = info
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def read(self, name: str) -> bytes:
+        info = self._members[name]
+        if info.file_size > self.max_bytes:
+            raise ImportFileError(f"{info.filename} is larger than {self.max_bytes // 1048576} MB")
+        return self._zip.read(info)
+
+    def close(self):
+        self._zip.close()
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+IMPORT_MODES = ("insert", "upsert")
+
+# Columns an upsert may overwrite (only those present in the row's source)
+UPSERT_FIELDS = tuple(BulkBookImportSerializer._declared_fields)
+
+
+def header_problems(header: List[str]) -> List[str]:
+    """Messages for missing required, repeated and unknown columns of an upload's header."""
+    fields = BulkBookImportSerializer._declared_fields
+    named = [h for h in header if h]
+    problems = []
+    missing = [name for name, f in fields.items() if f.required and name not in named]
+    if missing:
+        problems.append(f"Missing required column(s): {', '.join(missing)}")
+    repeated = sorted({h for h in named if named.count(h) > 1})
+    if repeated:
+        problems.append(f"Repeated column(s), only the last is used: {', '.join(repeated)}")
+    unknown = [h for h in dict.fromkeys(named) if h not in fields]
+    if unknown:
+        problems.append(f"Unknown column(s), ignored: {', '.join(unknown)}")
+    return problems
+
+
+def _same(stored, imported) -> bool:
+    if stored in (None, "") and imported in (None, ""):
+        return True
+    return stored == imported
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    processed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    dry_run: bool = False
+    header_problems: List[str] = field(default_factory=list)
+
+    def as_dict(self, max_errors: int = 50) -> dict:
+        summary = {
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "errors": self.errors[:max_errors],
+        }
+        if self.dry_run:
+            summary.update(dry_run=True, header_problems=self.header_problems)
+        return summary
+
+
+class BookImporter:
+    """
+    Imports validated rows as Books.
+
+        importer = BookImporter(user, progress=callback)
+        result = importer.run(ExcelRowReader(file), total=reader.estimated_rows)
+
+    mode="upsert" matches rows to existing books on normalized ISBN + accession
+    number (Book.import_key) instead of always inserting. dry_run=True only
+    validates and counts; nothing is written.
+    """
+
+    def __init__(self, user, images: Optional[ZipImageIndex] = None,
+                 progress: Optional[ProgressCallback] = None, on_error: Optional[ErrorCallback] = None,
+                 batch_size: Optional[int] = None, mode: str = "insert", dry_run: bool = False):
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"Unknown import mode: {mode}")
+        if dry_run and images is not None:
+            raise ValueError("Dry runs do not take cover images")
+        self.user = user
+        self.mode = mode
+        self.dry_run = dry_run
+        self.images = images
+        self.progress = progress
+        self.on_error = on_error
+        self.batch_min = int(_setting("LIBRARY_IMPORT_BATCH_MIN", 100))
+        self.batch_max = int(_setting("LIBRARY_IMPORT_BATCH_MAX", 1000))
+        self.batch_seconds = float(_setting("LIBRARY_IMPORT_BATCH_SECONDS", 0.5))
+        self.max_errors = int(_setting("LIBRARY_IMPORT_MAX_ERRORS", 1000))
+        self.batch_size = batch_size or int(_setting("LIBRARY_IMPORT_BATCH_SIZE", 250))
+        self.cover_workers = int(_setting("LIBRARY_COVER_UPLOAD_WORKERS", 8))
+        self.result = ImportResult(dry_run=dry_run)
+        self._seen_keys: Dict[str, int] = {}
+        self._uploads: List[Tuple[int, Book, Future]] = []
+        self._covered: List[Tuple[int, Book]] = []
+        self._cover_pool: Optional[ThreadPoolExecutor] = None
+        self._cover_storage = None
+        self._pending: List[Tuple[int, dict]] = []
+        self._total: Optional[int] = None
+
+    def check_header(self, header: List[str]) -> List[str]:
+        """Report header_problems() against row 1 (dry runs list them in the summary too)."""
+        problems = header_problems(header)
+        for message in problems:
+            self._error(1, message)
+        self.result.header_problems = problems
+        return problems
+
+    def run(self, rows: Iterable[Tuple[int, dict]], total: Optional[int] = None) -> ImportResult:
+        self._total = total
+        for number, data in rows:
+            self.result.processed += 1
+            if isinstance(data, RowParseError):
+                self.result.failed += 1
+                self._error(number, data.message)
+                continue
+            if not data or all(v in (None, "") for v in data.values()):
+                continue
+            self._pending.append((number, data))
+            if len(self._pending) >= self.batch_size:
+                self._process()
+
+        self._process()
+        # Runs after the covers queued by the batches' on_commit hooks
+        transaction.on_commit(self._finish_covers)
+        # bulk_create / bulk_update skip post_save: tell per-worker catalog caches to refresh
+        if not self.dry_run and (self.result.created or self.result.updated):
+            bump_catalog_generation()
+            bump_suggest_generation()
+        return self.result
+
+    # -- rows -----------------------------------------------------------
+    def _process(self):
+        """Validate the pending rows as one batch, then insert them (or save row by row with covers)."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        started = time.perf_counter()
+        outcomes = validate_rows([data for _, data in pending])
+        batch: List[Tuple[int, Book]] = []
+        for (number, raw), (data, errors) in zip(pending, outcomes):
+            if errors:
+                self.result.failed += 1
+                self._error(number, "; ".join(f"{k}: {v[0]}" for k, v in errors.items()))
+                continue
+            try:
+                book = self._build(data)
+                book._import_fields = tuple(f for f in UPSERT_FIELDS if f in raw)
+                batch.append((number, book))
+            except Exception as row_err:
+                self.result.failed += 1
+                self._error(number, str(row_err)[:200])
+                logger.error(f"Row {number} fatal: {row_err}")
+
+        if self.dry_run:
+            self._check(batch)
+        elif self.mode == "upsert":
+            self._upsert(batch)
+        else:
+            self._insert(batch)
+        self._adapt(len(pending), time.perf_counter() - started)
+        self._report()
+
+    def _build(self, data: dict) -> Book:
+        book = Book(**data)
+        book.last_modified_by = self.user
+        book._suppress_audit = True
+        return book
+
+    def _error(self, number: int, message: str):
+        if self.on_error:
+            self.on_error(number, message)
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append({"row": number, "message": message})
+
+    def _report(self):
+        if self.progress:
+            self.progress(self.result.processed, self._total)
+
+    # -- Dry run: duplicate checks, one SELECT per batch, no writes --------
+    def _check(self, batch: List[Tuple[int, Book]]):
+        """Count what the batch would do; report ISBN + accession numbers seen earlier or (insert) already stored."""
+        keyed: List[Tuple[int, Book]] = []
+        for number, book in batch:
+            key = Book.make_import_key(book.isbn, book.accession_no)
+            if key is None:
+                self.result.created += 1
+            elif key in self._seen_keys:
+                self.result.failed += 1
+                self._error(number, f"Duplicate of row {self._seen_keys[key]} (same ISBN and accession number)")
+            else:
+                self._seen_keys[key] = number
+                book.import_key = key
+                keyed.append((number, book))
+
+        existing = Book.objects.in_bulk([book.import_key for _, book in keyed], field_name="import_key")
+        for number, book in keyed:
+            current = existing.get(book.import_key)
+            if current is None:
+                self.result.created += 1
+            elif self.mode == "insert":
+                self.result.failed += 1
+                self._error(number, f"Already in the catalog as {current.book_code} (same ISBN and accession "
+                                    "number); import in upsert mode to update it")
+            elif all(_same(getattr(current, f), getattr(book, f)) for f in book._import_fields):
+                self.result.unchanged += 1
+            else:
+                self.result.updated += 1
+
+    # -- Excel-only: batched bulk_create ----------------------------------
+    @staticmethod
+    def _attach_covers(books: List[Book]):
+        covers = cover_index.lookup(b.isbn for b in books)
+        for book in books:
+            cover = covers.get(clean_isbn(book.isbn))
+            if cover:
+                book.cover_image = cover
+
+    def _isolate(self, rows: list, write: Callable[[list], None]) -> list:
+        """
+        write(rows) in a savepoint. If it fails, retry each half in its own savepoint,
+        down to single rows: the failing rows are reported and the others written.
+        `rows` are tuples starting with the row number. Returns the rows written.
+        """
+        try:
+            with transaction.atomic():
+                write(rows)
+            return rows
+        except Exception as e:
+            if len(rows) == 1:
+                self.result.failed += 1
+                self._error(rows[0][0], f"Not saved: {e}"[:200])
+                logger.error(f"❌ Row {rows[0][0]} rejected: {e}")
+                return []
+        middle = len(rows) // 2
+        return self._isolate(rows[:middle], write) + self._isolate(rows[middle:], write)
+
+    def _insert(self, batch: List[Tuple[int, Book]]):
+        if not batch:
+            return
+        books = [book for _, book in batch]
+        self._attach_covers(books)
+
+        try:
+            with transaction.atomic():
+                # Final book codes for the whole batch, outside the savepoints: a rolled-back
+                # attempt must not give its codes back to the counter (library/codes.py)
+                Book.objects.assign_book_codes(books)
+                written = self._isolate(batch, lambda rows: Book.objects.bulk_create([b for _, b in rows]))
+                books_added(book for _, book in written)
+                if self.images:
+                    transaction.on_commit(partial(self._queue_covers, written))
+            self.result.created += len(written)
+        except Exception as e:
+            logger.error(f"❌ Batch insert failed (rows {batch[0][0]}–{batch[-1][0]}): {e}")
+            self.result.failed += len(batch)
+            self._error(batch[0][0], "Batch insert failed (check logs)")
+
+    # -- Upsert mode: one SELECT per batch, then bulk writes ---------------
+    def _upsert(self, batch: List[Tuple[int, Book]]):
+        """Split the batch into new / changed / unchanged books by import_key and write it in bulk."""
+        plain: List[Tuple[int, Book]] = []
+        keyed: Dict[str, Tuple[int, Book]] = {}
+        for number, book in batch:
+            book.import_key = Book.make_import_key(book.isbn, book.accession_no)
+            if book.import_key is None:
+                plain.append((number, book))  # no accession number: nothing to match on
+                continue
+            if book.import_key in keyed:
+                self.result.failed += 1
+                self._error(keyed[book.import_key][0], f"Superseded by row {number} (same ISBN and accession number)")
+            keyed[book.import_key] = (number, book)
+
+        existing = Book.objects.in_bulk(list(keyed), field_name="import_key")
+        new, changed = [], []
+        for key, (number, book) in keyed.items():
+            current = existing.get(key)
+            if current is None:
+                new.append((number, book))
+            elif all(_same(getattr(current, f), getattr(book, f)) for f in book._import_fields):
+                self.result.unchanged += 1
+            else:
+                changed.append((number, book, current))
+
+        if connection.vendor == "postgresql":
+            self._insert(plain)
+            self._upsert_postgres(new, changed)
+        else:
+            self._insert(plain + new)
+            self._update(changed)
+
+    def _upsert_postgres(self, new: List[Tuple[int, Book]], changed: List[Tuple[int, Book, Book]]):
+        """INSERT ... ON CONFLICT (import_key) DO UPDATE: race-safe against a concurrent import."""
+        if not (new or changed):
+            return
+        self._attach_covers([book for _, book in new])
+        groups = defaultdict(list)
+        for number, book in new:
+            groups[book._import_fields].append((number, book, None))
+        for number, book, current in changed:
+            book.book_code = current.book_code  # kept on conflict; don't allocate a new one
+            groups[book._import_fields].append((number, book, current))
+        rows = [n for n, _ in new] + [n for n, _, _ in changed]
+        try:
+            with transaction.atomic():
+                Book.objects.assign_book_codes([book for _, book in new])
+                written = []
+                for fields, group in groups.items():
+                    write = partial(self._write_upserts, [*fields, "last_modified_by", "updated_at"])
+                    written += self._isolate(group, write)
+                books_added(book for _, book, current in written if current is None)
+                books_moved(
+                    (current.category, book.category, current.is_active) for _, book, current in written if current
+                )
+            self.result.created += sum(1 for _, _, current in written if current is None)
+            self.result.updated += sum(1 for _, _, current in written if current)
+        except Exception as e:
+            logger.error(f"❌ Batch upsert failed (rows {min(rows)}–{max(rows)}): {e}")
+            self.result.failed += len(rows)
+            self._error(min(rows), "Batch upsert failed (check logs)")
+
+    @staticmethod
+    def _write_upserts(update_fields: List[str], rows: List[Tuple[int, Book, Optional[Book]]]):
+        Book.objects.bulk_create(
+            [book for _, book, _ in rows], update_conflicts=True, unique_fields=["import_key"],
+            update_fields=update_fields,
+        )
+
+    def _update(self, changed: List[Tuple[int, Book, Book]]):
+        """bulk_update of the matched books (one UPDATE per chunk of rows)."""
+        if not changed:
+            return
+        now = timezone.now()
+        moves, fields = {}, {"last_modified_by", "updated_at"}
+        for number, book, current in changed:
+            moves[number] = (current.category, book.category, current.is_active)
+            for f in book._import_fields:
+                setattr(current, f, getattr(book, f))
+            fields.update(book._import_fields)
+            current.last_modified_by = self.user
+            current.updated_at = now  # bulk_update does not apply auto_now
+        fields = sorted(fields)
+        try:
+            with transaction.atomic():
+                written = self._isolate(
+                    changed, lambda rows: Book.objects.bulk_update([c for _, _, c in rows], fields, batch_size=500)
+                )
+                books_moved(moves[number] for number, _, _ in written)
+            self.result.updated += len(written)
+        except Exception as e:
+            rows = [n for n, _, _ in changed]
+            logger.error(f"❌ Batch update failed (rows {min(rows)}–{max(rows)}): {e}")
+            self.result.failed += len(rows)
+            self._error(min(rows), "Batch update failed (check logs)")
+
+    def _adapt(self, rows: int, elapsed: float):
+        """Scale the next batch towards batch_seconds (at most ×2 / ÷2 per step)."""
+        scale = 2.0 if elapsed <= 0 else min(2.0, max(0.5, self.batch_seconds / elapsed))
+        self.batch_size = int(min(self.batch_max, max(self.batch_min, rows * scale)))
+
+    # -- Excel + ZIP: covers uploaded concurrently, back-filled in bulk -----
+    def _match_image(self, book: Book) -> Optional[str]:
+        raw_isbn = (book.isbn or "").strip()
+        stems = (raw_isbn.lower(), (book.title or "").strip().lower(), clean_isbn(raw_isbn).lower())
+        return next((f"{s}{ext}" for s in stems for ext in IMAGE_EXTENSIONS if f"{s}{ext}" in self.images), None)
+
+    def _upload_cover(self, name: str, image: str) -> Tuple[str, str]:
+        # Pool thread: decompress, normalize and store one cover (nothing kept in memory afterwards)
+        return store_cover(name, self.images.read(image), self._cover_storage)
+
+    def _queue_covers(self, batch: List[Tuple[int, Book]]):
+        """Push the covers of the committed books to storage on a bounded thread pool."""
+        for number, book in batch:
+            image = self._match_image(book)
+            if image is None:
+                continue
+            if self._cover_pool is None:
+                self._cover_storage = get_cover_storage()
+                self._cover_pool = ThreadPoolExecutor(max_workers=self.cover_workers, thread_name_prefix="ilas-cover")
+            # Bounded backlog: wait for the oldest upload before queueing more
+            if len(self._uploads) >= self.cover_workers * 4:
+                self._collect(self._uploads.pop(0))
+            self._uploads.append((number, book, self._cover_pool.submit(self._upload_cover, book.book_code, image)))
+
+    def _collect(self, upload: Tuple[int, Book, Future]):
+        number, book, future = upload
+        try:
+            book.cover_image, book.cover_thumbnail = future.result()
+            self._covered.append((number, book))
+        except Exception as img_err:
+            logger.warning(f"Row {number}: Image save failed: {img_err}")
+            self._error(number, "Book created, image upload failed")
+
+    def _finish_covers(self):
+        """Wait for the outstanding uploads, then write every cover_image in one bulk_update."""
+        for upload in self._uploads:
+            self._collect(upload)
+        self._uploads = []
+        if self._cover_pool is not None:
+            self._cover_pool.shutdown()
+            self._cover_pool = None
+        covered, self._covered = self._covered, []
+        if not covered:
+            return
+        try:
+            with transaction.atomic():
+                Book.objects.bulk_update(
+                    [book for _, book in covered], ["cover_image", "cover_thumbnail"], batch_size=500
+                )
+            logger.warning(f"🖼️ {len(covered)} covers uploaded")
+        except Exception as e:
+            logger.error(f"❌ Cover back-fill failed: {e}")
+            self._error(covered[0][0], f"Books created, saving {len(covered)} uploaded covers failed (check logs)")
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from library.views import BookViewSet
+
+# Columns the admin books table renders
+TABLE_FIELDS = "id,book_code,title,author,category,shelf_location,status,is_active"
+
+
+class Command(BaseCommand):
+    help = "Measures BookViewSet.list payload size and throughput, full vs ?fields= sparse."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fields", default=TABLE_FIELDS, help="Sparse field list to compare against.")
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        view = BookViewSet.as_view({"get": "list"})
+        host = next((h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")), "localhost")
+        factory = APIRequestFactory(HTTP_HOST=host)
+        variants = (("full", {}), ("sparse", {"fields": options["fields"]}))
+
+        self.stdout.write(f"{'variant':<8} {'bytes/page':>12} {'rows/s':>10} {'ms/page':>9} {'queries':>8}")
+        for label, extra in variants:
+            params = {"page_size": options["page_size"], **extra}
+            rows = size = queries = 0
+            started = time.perf_counter()
+            for _ in range(options["repeat"]):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = view(factory.get("/api/v1/library/books/", params)).render()
+                queries = len(ctx.captured_queries)
+                size = len(response.content)
+                rows += len(response.data["results"])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:<8} {size:>12,} {rows / elapsed:>10,.0f} "
+                f"{elapsed / options['repeat'] * 1000:>9.1f} {queries:>8}"
+            )
@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from library.circulation import issue_books, return_books
+from library.models import Book
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures a desk visit (issue N books, then return them) book by book (mark_issued / "
+        "mark_returned) vs one batch (library/circulation.py). Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=5, help="Books per visit.")
+        parser.add_argument("--visits", type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(), override_settings(LIBRARY_MAX_ACTIVE_LOANS=options["books"]):
+                self._run(options["books"], options["visits"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, per_visit, visits):
+        User = get_user_model()
+        staff = User.objects.create_user(username="bench-desk", email="bench-desk@example.com", is_staff=True)
+        member = User.objects.create_user(username="bench-member", email="bench-member@example.com")
+        books = Book.objects.bulk_create([
+            Book(title=f"Bench {i}", author="Bench", isbn=f"BENCH{i}", category="Bench", shelf_location="B")
+            for i in range(per_visit)
+        ])
+        ids = [b.pk for b in books]
+
+        def one_by_one():
+            for book in Book.objects.filter(pk__in=ids):
+                book.mark_issued(member=member, actor=staff)
+            for book in Book.objects.filter(pk__in=ids):
+                book.mark_returned(actor=staff, returned_by=member)
+
+        def batch():
+            issue_books(member, ids, actor=staff)
+            return_books(member, ids, actor=staff)
+
+        self.stdout.write(f"{'variant':<12} {'ms/visit':>9} {'books/s':>9} {'queries/visit':>14}")
+        for label, visit in (("per-book", one_by_one), ("batch", batch)):
+            with CaptureQueriesContext(connection) as ctx:
+                visit()
+            queries = len(ctx.captured_queries)
+            started = time.perf_counter()
+            for _ in range(visits):
+                visit()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:<12} {elapsed / visits * 1000:>9.1f} {visits * per_visit * 2 / elapsed:>9,.0f} {queries:>14}"
+            )
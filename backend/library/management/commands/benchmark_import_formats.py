@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+import tempfile
+import time
+
+import openpyxl
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from library.import_validation import validate_rows
+from library.importer import BookImporter, open_row_reader
+from library.serializers import BulkBookImportSerializer
+
+HEADER = ["Title", "Author", "ISBN", "Category", "Shelf_Location", "Publisher", "Publication_Year", "Description"]
+
+
+def _row(i):
+    return [f"Benchmark Book {i}", f"Author {i % 500}", f"978{i:010d}", f"Category {i % 40}",
+            f"R{i % 90}", "ILAS Press", 1990 + i % 30, "Synthetic description " * 4]
+
+
+class Command(BaseCommand):
+    help = "Compares bulk-import throughput (rows/s) for .xlsx vs .csv vs .jsonl sources."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument(
+            "--mode", choices=("parse", "validate", "compiled", "import"), default="validate",
+            help="parse: read rows only; validate: + BulkBookImportSerializer per row; "
+                 "compiled: + batched RowValidator (import_validation.py); "
+                 "import: full BookImporter run (rolled back).",
+        )
+        parser.add_argument("--processes", type=int, default=0, help="Validation processes for --mode compiled.")
+        parser.add_argument("--batch", type=int, default=1000, help="Rows per batch for --mode compiled.")
+
+    def handle(self, *args, **options):
+        n, mode = options["rows"], options["mode"]
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self._write_files(tmp, n)
+            self.stdout.write(f"{n:,} rows, mode={mode}")
+            self.stdout.write(f"{'format':<8} {'size':>10} {'seconds':>9} {'rows/s':>10}")
+            for ext, path in paths.items():
+                started = time.perf_counter()
+                rows = self._run(path, mode, options)
+                elapsed = time.perf_counter() - started
+                size = os.path.getsize(path) / 1048576
+                self.stdout.write(f"{ext:<8} {size:>8.1f}MB {elapsed:>9.2f} {rows / elapsed:>10,.0f}")
+
+    def _write_files(self, tmp, n):
+        paths = {ext: os.path.join(tmp, f"books{ext}") for ext in (".xlsx", ".csv", ".jsonl")}
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(HEADER)
+        with open(paths[".csv"], "w", newline="", encoding="utf-8") as fc, \
+                open(paths[".jsonl"], "w", encoding="utf-8") as fj:
+            writer = csv.writer(fc)
+            writer.writerow(HEADER)
+            for i in range(n):
+                row = _row(i)
+                ws.append(row)
+                writer.writerow(row)
+                fj.write(json.dumps(dict(zip(HEADER, row))) + "\n")
+        wb.save(paths[".xlsx"])
+        return paths
+
+    def _run(self, path, mode, options):
+        reader = open_row_reader(path, path)
+        try:
+            if mode == "parse":
+                return sum(1 for _ in reader)
+            if mode == "validate":
+                count = 0
+                for _, data in reader:
+                    BulkBookImportSerializer(data=data).is_valid()
+                    count += 1
+                return count
+            if mode == "compiled":
+                count, batch = 0, []
+                for _, data in reader:
+                    batch.append(data)
+                    if len(batch) >= options["batch"]:
+                        count += len(validate_rows(batch, processes=options["processes"]))
+                        batch = []
+                return count + len(validate_rows(batch, processes=options["processes"]))
+            with transaction.atomic():
+                result = BookImporter(None).run(reader, total=reader.estimated_rows)
+                transaction.set_rollback(True)
+            return result.processed
+        finally:
+            reader.close()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from library.categories import rebuild
+from library.tasks import bump_catalog_generation
+
+
+class Command(BaseCommand):
+    help = "Recounts the Category dictionary (book_count / active_count) from the books table."
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        bump_catalog_generation()
+        self.stdout.write(self.style.SUCCESS(f"✅ Category dictionary rebuilt: {count} categories"))
@@ -0,0 +1,66 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from library import suggest
+from library.tasks import bump_suggest_generation
+
+WORDS = (
+    "introduction advanced principles modern applied engineering digital systems analysis design "
+    "theory practice computer networks data structures algorithms machine learning signals control "
+    "electrical mechanical thermodynamics fluid dynamics circuits embedded programming python java "
+    "mathematics calculus linear algebra discrete probability statistics physics chemistry materials "
+    "handbook fundamentals essentials concepts methods techniques management communication wireless"
+).split()
+NAMES = (
+    "ravi kumar sharma anil gupta priya rao suresh reddy lakshmi iyer david smith john miller "
+    "robert martin andrew tanenbaum thomas cormen charles leiserson ronald rivest clifford stein "
+    "mahesh biradar deepa nair arjun patil kavya hegde"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the in-memory type-ahead index and reports its memory footprint."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--synthetic", type=int, default=0,
+            help="Build from N generated books instead of the database (footprint estimate only).",
+        )
+
+    def handle(self, *args, **options):
+        n = options["synthetic"]
+        started = time.perf_counter()
+        if n:
+            rng = random.Random(42)
+            rows = [
+                (
+                    pk,
+                    " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 7))),
+                    " ".join(rng.choice(NAMES).title() for _ in range(rng.randint(2, 3))),
+                    f"ILAS-ET-{pk:04d}",
+                )
+                for pk in range(1, n + 1)
+            ]
+            index = suggest.PrefixIndex(rows)
+        else:
+            index = suggest.rebuild()
+            # Running workers rebuild their own copies on their next request
+            bump_suggest_generation()
+        elapsed = time.perf_counter() - started
+
+        probes = ("py", "data str", "robert", "0042", "thermo")
+        started = time.perf_counter()
+        for q in probes * 200:
+            index.suggest(q)
+        lookup_us = (time.perf_counter() - started) / (len(probes) * 200) * 1e6
+
+        stats = index.footprint()
+        source = f"{n} synthetic books" if n else "database"
+        self.stdout.write(self.style.SUCCESS(f"✅ Suggest index built from {source} in {elapsed:.1f}s"))
+        for label in ("books", "keys"):
+            self.stdout.write(f"   {label:<12} {stats[label]:>12,}")
+        for label in ("key_bytes", "doc_bytes", "array_bytes", "delta_bytes", "total_bytes"):
+            self.stdout.write(f"   {label:<12} {stats[label] / 1048576:>9.1f} MB")
+        self.stdout.write(f"   lookup       {lookup_us:>9.1f} µs (mean)")
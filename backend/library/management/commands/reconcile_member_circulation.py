@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from library.member_summary import rebuild
+from library.models import MemberCirculation
+
+
+class Command(BaseCommand):
+    help = "Recounts the member circulation summary (loans, returns, fines) from the transactions table."
+
+    def handle(self, *args, **options):
+        corrected = rebuild()
+        total = MemberCirculation.objects.count()
+        if corrected:
+            self.stdout.write(self.style.WARNING(f"⚠️ Member circulation reconciled: {corrected} of {total} rows corrected"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Member circulation up to date ({total} rows)"))
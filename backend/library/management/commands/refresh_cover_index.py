@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from library.cover_index import refresh, remote_enabled
+from library.models import Book
+
+
+class Command(BaseCommand):
+    help = "Checks book covers on Cloudinary and updates the cover index (new and stale ISBNs, or --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-check every ISBN in the catalog")
+
+    def handle(self, *args, **options):
+        if not remote_enabled():
+            self.stdout.write(self.style.WARNING("⚠️ Cloudinary is not configured; nothing to check"))
+            return
+        isbns = Book.objects.order_by().values_list("isbn", flat=True).distinct() if options["all"] else None
+        count = refresh(isbns)
+        self.stdout.write(self.style.SUCCESS(f"✅ Cover index refreshed: {count} ISBNs checked"))
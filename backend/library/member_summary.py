@@ -0,0 +1,125 @@
+# library/member_summary.py
+"""
+ILAS – Member Circulation Summary
+---------------------------------
+`MemberCirculation` holds one row per member: active loans, returned count,
+fines charged and the earliest due date among the active loans. The circulation
+desk member search and the member dashboard read this row (a join / one
+primary-key read) instead of counting the member's transactions.
+
+Maintenance:
+- library/circulation.py calls loans_taken() / loans_closed() inside the same DB
+  transaction as the issue / return. loans_taken() is a conditional UPDATE
+  (active_loans + n <= LIBRARY_MAX_ACTIVE_LOANS), so it is also the loan-limit
+  check, and its row lock serializes concurrent issues to one member.
+- Every new member gets an all-zero row (signals.py); a member without one is
+  counted from scratch (rebuild) on first use, and a missing row reads as zero.
+- `manage.py reconcile_member_circulation` (and migration 0022) recount from
+  library_booktransaction and report the rows that had drifted.
+
+Overdue loans depend on the clock, not on a circulation event, so the row keeps
+next_due_date instead: MemberCirculation.overdue_loans() costs no query for a
+member with nothing past due.
+"""
+
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db.models import Case, Count, F, Min, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from .models import BookTransaction, MemberCirculation
+
+FIELDS = ("active_loans", "returned_count", "unpaid_fines", "next_due_date")
+
+
+# ----------------------------------------------------------------------
+# Maintenance
+# ----------------------------------------------------------------------
+def loans_taken(member_id, count: int, due_date, limit: int) -> bool:
+    """Add `count` loans due `due_date`; False (nothing written) when that would pass `limit`."""
+    for _ in range(2):
+        updated = MemberCirculation.objects.filter(member_id=member_id, active_loans__lte=limit - count).update(
+            active_loans=F("active_loans") + count,
+            next_due_date=Case(When(next_due_date__lte=due_date, then=F("next_due_date")), default=Value(due_date)),
+            updated_at=timezone.now(),
+        )
+        if updated:
+            return True
+        if MemberCirculation.objects.filter(member_id=member_id).exists():
+            return False
+        rebuild([member_id])
+    return False
+
+
+def loans_closed(member_id, count: int, fines: Decimal) -> None:
+    """Close `count` loans charging `fines`; call after the ISSUE rows were closed."""
+    next_due = BookTransaction.objects.filter(
+        member_id=member_id, txn_type=BookTransaction.TYPE_ISSUE, is_active=True
+    ).order_by("due_date").values("due_date")[:1]
+    updated = MemberCirculation.objects.filter(member_id=member_id).update(
+        active_loans=F("active_loans") - count,
+        returned_count=F("returned_count") + count,
+        unpaid_fines=F("unpaid_fines") + fines,
+        next_due_date=Subquery(next_due),
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        rebuild([member_id])
+
+
+def rebuild(member_ids: Optional[Iterable] = None) -> int:
+    """
+    Recount from library_booktransaction: every member with transactions, or just
+    `member_ids` (rows are created for them either way). Returns rows corrected.
+    """
+    txns = BookTransaction.objects.order_by().filter(member__isnull=False)
+    rows = MemberCirculation.objects.all()
+    if member_ids is not None:
+        member_ids = list(member_ids)
+        txns = txns.filter(member_id__in=member_ids)
+        rows = rows.filter(member_id__in=member_ids)
+    active = Q(txn_type=BookTransaction.TYPE_ISSUE, is_active=True)
+    returned = Q(txn_type=BookTransaction.TYPE_RETURN)
+    counted = {
+        row["member_id"]: MemberCirculation(
+            member_id=row["member_id"],
+            active_loans=row["active"],
+            returned_count=row["returned"],
+            unpaid_fines=row["fines"] or Decimal("0.00"),
+            next_due_date=row["next_due"],
+        )
+        for row in txns.values("member_id").annotate(
+            active=Count("id", filter=active),
+            returned=Count("id", filter=returned),
+            fines=Sum("fine_amount", filter=returned),
+            next_due=Min("due_date", filter=active),
+        )
+    }
+    for member_id in member_ids or ():
+        counted.setdefault(member_id, MemberCirculation(member_id=member_id))
+    stored = {row.member_id: row for row in rows}
+    now = timezone.now()
+    changed = []
+    for member_id, row in counted.items():
+        old = stored.get(member_id)
+        if old is None or any(getattr(old, f) != getattr(row, f) for f in FIELDS):
+            row.updated_at = now
+            changed.append(row)
+    MemberCirculation.objects.bulk_create(
+        changed, batch_size=500, update_conflicts=True, unique_fields=["member"], update_fields=[*FIELDS, "updated_at"],
+    )
+    # Rows of members whose transactions are gone
+    gone = [pk for pk, old in stored.items() if pk not in counted and any(getattr(old, f) for f in FIELDS)]
+    MemberCirculation.objects.filter(member_id__in=gone).update(
+        active_loans=0, returned_count=0, unpaid_fines=Decimal("0.00"), next_due_date=None, updated_at=now,
+    )
+    return len(changed) + len(gone)
+
+
+# ----------------------------------------------------------------------
+# Reads
+# ----------------------------------------------------------------------
+def summary_for(member) -> MemberCirculation:
+    """The member's row (an unsaved zero row when there is none)."""
+    return MemberCirculation.objects.filter(member=member).first() or MemberCirculation(member=member)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 09:00
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def install_index(apps, schema_editor):
+    from library.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    from library.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0013_alter_book_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_index, drop_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:30
+
+from django.db import migrations
+
+
+def install_index(apps, schema_editor):
+    from library.autocomplete import install_autocomplete_index
+    install_autocomplete_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    from library.autocomplete import drop_autocomplete_index
+    drop_autocomplete_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_alter_memberlog_options_remove_memberlog_member_and_more'),
+        ('library', '0014_book_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_index, drop_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0015_autocomplete_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booktransaction',
+            index=models.Index(fields=['member', 'created_at', 'id'], name='txn_member_created_idx'),
+        ),
+    ]
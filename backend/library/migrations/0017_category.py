@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:26
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_categories(apps, schema_editor):
+    Book = apps.get_model("library", "Book")
+    Category = apps.get_model("library", "Category")
+    rows = (
+        Book.objects.order_by().values("category")
+        .annotate(books=Count("id"), active=Count("id", filter=Q(is_active=True)))
+    )
+    Category.objects.bulk_create([
+        Category(name=row["category"], book_count=row["books"], active_count=row["active"])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0016_booktransaction_txn_member_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128, unique=True)),
+                ('book_count', models.IntegerField(default=0)),
+                ('active_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'categories',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.RunPython(backfill_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:55
+
+import re
+
+from django.db import migrations, models
+
+CODE_RE = re.compile(r"^ILAS-ET-(\d+)$")
+
+
+def seed_book_code_counter(apps, schema_editor):
+    """Start numbering after every existing ILAS-ET-nnnn code (codes used to follow the pk)."""
+    Book = apps.get_model("library", "Book")
+    highest = Book.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    for code in Book.objects.filter(book_code__startswith="ILAS-ET-").values_list("book_code", flat=True).iterator():
+        match = CODE_RE.match(code)
+        if match:
+            highest = max(highest, int(match.group(1)))
+
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS library_book_code_seq START WITH {highest + 1}")
+    else:
+        CodeCounter = apps.get_model("library", "CodeCounter")
+        CodeCounter.objects.update_or_create(name="book_code", defaults={"value": highest})
+
+
+def drop_book_code_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP SEQUENCE IF EXISTS library_book_code_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0017_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_book_code_counter, drop_book_code_sequence),
+    ]
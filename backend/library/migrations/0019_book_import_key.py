@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_import_keys(apps, schema_editor):
+    """Key every book with an accession number; the oldest copy wins when ISBN + accession repeat."""
+    Book = apps.get_model("library", "Book")
+    seen, batch = set(), []
+    rows = Book.objects.exclude(accession_no__isnull=True).exclude(accession_no="").order_by("pk")
+    for book in rows.only("pk", "isbn", "accession_no").iterator(chunk_size=2000):
+        accession = str(book.accession_no or "").strip().upper()
+        if not accession:
+            continue
+        key = f"{str(book.isbn or '').strip().replace('-', '').upper()}|{accession}"
+        if key in seen:
+            continue
+        seen.add(key)
+        book.import_key = key
+        batch.append(book)
+        if len(batch) >= 1000:
+            Book.objects.bulk_update(batch, ["import_key"])
+            batch = []
+    if batch:
+        Book.objects.bulk_update(batch, ["import_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0018_book_code_allocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='import_key',
+            field=models.CharField(blank=True, editable=False, max_length=200, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_import_keys, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('imported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0019_book_import_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_thumbnail',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
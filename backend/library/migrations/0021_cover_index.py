@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0020_book_cover_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoverIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('isbn', models.CharField(max_length=64, unique=True)),
+                ('public_id', models.CharField(blank=True, default='', max_length=255)),
+                ('url', models.URLField(blank=True, default='', max_length=500)),
+                ('checked_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name_plural': 'cover index',
+            },
+        ),
+    ]
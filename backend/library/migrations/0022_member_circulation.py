@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:30
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def backfill_member_circulation(apps, schema_editor):
+    BookTransaction = apps.get_model("library", "BookTransaction")
+    MemberCirculation = apps.get_model("library", "MemberCirculation")
+    active = Q(txn_type="ISSUE", is_active=True)
+    returned = Q(txn_type="RETURN")
+    rows = (
+        BookTransaction.objects.order_by().filter(member__isnull=False).values("member_id")
+        .annotate(
+            active=Count("id", filter=active),
+            returned=Count("id", filter=returned),
+            fines=Sum("fine_amount", filter=returned),
+            next_due=Min("due_date", filter=active),
+        )
+    )
+    MemberCirculation.objects.bulk_create([
+        MemberCirculation(
+            member_id=row["member_id"], active_loans=row["active"], returned_count=row["returned"],
+            unpaid_fines=row["fines"] or Decimal("0.00"), next_due_date=row["next_due"],
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_memberlog_timestamp_idx'),
+        ('library', '0021_cover_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberCirculation',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='circulation', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('active_loans', models.IntegerField(default=0)),
+                ('returned_count', models.IntegerField(default=0)),
+                ('unpaid_fines', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('next_due_date', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'member circulation',
+            },
+        ),
+        migrations.RunPython(backfill_member_circulation, migrations.RunPython.noop),
+    ]
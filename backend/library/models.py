@@ -2,12 +2,12 @@
 from __future__ import annotations
 import uuid
 import logging
-from datetime import timedelta
 from decimal import Decimal
 from typing import Optional, Dict, Any, Union
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models, transaction
 from django.utils import timezone
@@ -91,6 +91,58 @@ def create_audit(
 # ----------------------------------------------------------------------
 # Book model
 # ----------------------------------------------------------------------
+def clean_isbn(value) -> str:
+    return str(value or "").strip().replace("-", "").upper()
+
+
+def overdue_fine(due_date, returned_at) -> Decimal:
+    """R2.04: LIBRARY_FINE_PER_DAY for every day past due_date beyond LIBRARY_FINE_GRACE_DAYS."""
+    grace = int(getattr(settings, "LIBRARY_FINE_GRACE_DAYS", 0))
+    per_day = Decimal(str(getattr(settings, "LIBRARY_FINE_PER_DAY", 1)))  # default 1 per day
+    if not due_date:
+        return Decimal("0.00")
+    try:
+        overdue_days = (returned_at.date() - due_date.date()).days
+    except Exception:
+        # fallback: if dates weird, leave fine 0
+        return Decimal("0.00")
+    if overdue_days > grace:
+        return (Decimal(overdue_days - grace) * per_day).quantize(Decimal("0.01"))
+    return Decimal("0.00")
+
+
+class BookQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Give code-less books their final book_code up front (one INSERT, no follow-up UPDATE)."""
+        objs = list(objs)
+        self.assign_book_codes(objs)
+        self._claim_import_keys([b for b in objs if b.import_key is None])
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def assign_book_codes(self, objs):
+        """Set book_code on the books that have none (one allocation for all of them)."""
+        missing = [b for b in objs if not b.book_code]
+        if missing:
+            from .codes import allocate_book_codes
+
+            for book, code in zip(missing, allocate_book_codes(len(missing))):
+                book.book_code = code
+
+    def _claim_import_keys(self, objs):
+        """Set import_key on new books whose ISBN + accession number is still free (one query)."""
+        keyed = [(b, Book.make_import_key(b.isbn, b.accession_no)) for b in objs]
+        keyed = [(b, key) for b, key in keyed if key]
+        if not keyed:
+            return
+        taken = set(
+            Book.objects.filter(import_key__in={key for _, key in keyed}).values_list("import_key", flat=True)
+        )
+        for book, key in keyed:
+            if key not in taken:
+                book.import_key = key
+                taken.add(key)
+
+
 class Book(models.Model):
     id = models.BigAutoField(primary_key=True)
     uid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
@@ -109,6 +161,9 @@ class Book(models.Model):
     description = models.TextField(blank=True, default="", null=True)
 
     accession_no = models.CharField(max_length=128, blank=True, null=True)
+    # Normalized "ISBN|ACCESSION" identity for upsert imports (library/importer.py). NULL without an
+    # accession number, and on duplicates of a copy that already holds the key.
+    import_key = models.CharField(max_length=200, unique=True, null=True, blank=True, editable=False)
     shelf_location = models.CharField(max_length=128)
     condition = models.CharField(max_length=64, blank=True, default="Good", null=True)
     book_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -120,6 +175,8 @@ class Book(models.Model):
     remarks = models.TextField(blank=True, default="", null=True)
 
     cover_image = CloudinaryField("book_cover", blank=True, null=True,)
+    # Stored value of the list-size cover made by bulk imports (library/covers.py); "" when none
+    cover_thumbnail = models.CharField(max_length=255, blank=True, default="")
 
     STATUS_AVAILABLE = "AVAILABLE"
     STATUS_ISSUED = "ISSUED"
@@ -149,14 +206,64 @@ class Book(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True,db_index=True)
 
+    # Full-text document for catalog search (PostgreSQL only; kept current by a DB trigger,
+    # GIN indexed). SQLite uses the library_book_fts shadow table instead — see library/search.py.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = BookQuerySet.as_manager()
+
     class Meta:
         ordering = ("-created_at",)
 
     def __str__(self):
         return f"{self.book_code or '(no-code)'} — {self.title}"
 
+    # Snapshot of the stored (category, is_active) for the category dictionary
+    # (library/categories.py): lets the post_save signal apply deltas without a re-read.
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_category_state()
+        instance.remember_suggest_state()
+        instance.remember_import_identity()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_category_state()
+        self.remember_suggest_state()
+        self.remember_import_identity()
+
+    def remember_category_state(self):
+        # __dict__ lookups: never trigger a deferred-field load
+        self._stored_category = (self.__dict__.get("category"), self.__dict__.get("is_active"))
+
+    def suggest_state(self) -> tuple:
+        # Fields the type-ahead index shows (library/suggest.py); None for deferred fields
+        return tuple(self.__dict__.get(f) for f in ("title", "author", "book_code", "is_active"))
+
+    def remember_suggest_state(self):
+        self._stored_suggest = self.suggest_state()
+
+    def remember_import_identity(self):
+        # Stored ISBN + accession number: save() only re-derives import_key when they change
+        state = self.__dict__
+        loaded = "isbn" in state and "accession_no" in state
+        self._stored_import_identity = self.make_import_key(state["isbn"], state["accession_no"]) if loaded else None
+
+    @staticmethod
+    def make_import_key(isbn, accession_no) -> Optional[str]:
+        """Upsert identity: normalized ISBN + accession number (None without an accession number)."""
+        accession = str(accession_no or "").strip().upper()
+        return f"{clean_isbn(isbn)}|{accession}" if accession else None
+
+    @staticmethod
+    def default_book_code(number: int) -> str:
+        """Canonical accession barcode for an allocated code number (ILAS-ET-0001)."""
+        return f"ILAS-ET-{number:04d}"
+
     # --- Save behaviour:
-    # Keep the pattern: auto-generate book_code after initial save using update() to avoid double-save signal recursion.
+    # New books get their final book_code before the INSERT (library/codes.py), so there is no follow-up UPDATE.
     def save(self, *args, **kwargs):
         creating = self.pk is None
         if not creating and not hasattr(self, "_previous_state"):
@@ -165,15 +272,19 @@ class Book(models.Model):
                 .values("title", "isbn", "status")
                 .first()
             ) or {}
+        if creating and not self.book_code:
+            from .codes import next_book_code
+
+            self.book_code = next_book_code()
+        key = self.make_import_key(self.isbn, self.accession_no)
+        if key != self.import_key and (creating or key != getattr(self, "_stored_import_identity", None)):
+            # A copy that duplicates another book's ISBN + accession number keeps no key
+            if key and Book.objects.filter(import_key=key).exclude(pk=self.pk).exists():
+                key = None
+            self.import_key = key
         # NOTE: callers may set _suppress_audit on the instance to avoid immediate audit creation by signals;
         # we do not force that flag here — it must be set by the caller when needed.
         super().save(*args, **kwargs)
-        # Post-create: ensure a canonical book_code exists. Use update() to avoid triggering additional model save signals.
-        if creating and not self.book_code:
-            code = f"ILAS-ET-{self.pk:04d}"
-            Book.objects.filter(pk=self.pk).update(book_code=code)
-            # keep the field on the in-memory instance for immediate use
-            self.book_code = code
 
     # Business helpers
     def can_be_issued(self) -> bool:
@@ -195,50 +306,11 @@ class Book(models.Model):
         """
         Implements R1.01-R1.04.
         Creates an ISSUE transaction and updates book status, with atomic locking to prevent races.
+        (Lean path with a fixed query budget: library/circulation.py.)
         """
-        if member is None or not getattr(member, "is_active", True):
-            raise ValueError("Member is not active.")
-
-        limit = getattr(settings, "LIBRARY_MAX_ACTIVE_LOANS", 5)
-
-        with transaction.atomic():
-            # Lock the book row first to prevent two concurrent issuances
-            Book.objects.select_for_update().get(pk=self.pk)
-
-            # re-check availability and active issue under lock
-            if not self.can_be_issued():
-                raise ValueError("Book is not available for issue.")
+        from .circulation import issue_book
 
-            from django.db.models import Q
-
-            if BookTransaction.objects.filter(book=self, txn_type=BookTransaction.TYPE_ISSUE, is_active=True).exists():
-                raise ValueError("Book already has an active issue transaction.")
-
-            if BookTransaction.objects.filter(member=member, txn_type=BookTransaction.TYPE_ISSUE, is_active=True).count() >= limit:
-                raise ValueError(f"Member has reached max active loans ({limit}).")
-
-            issue_date = timezone.now()
-            due_date = issue_date + timedelta(days=self._member_loan_days(member))
-
-            # Create the issue transaction (is_active=True)
-            txn = BookTransaction.objects.create(
-                book=self,
-                member=member,
-                actor=actor,
-                txn_type=BookTransaction.TYPE_ISSUE,
-                issue_date=issue_date,
-                due_date=due_date,
-                is_active=True,
-                remarks=remarks,
-            )
-
-            # update book state and persist
-            self.status = self.STATUS_ISSUED
-            self.issued_to = member
-            self.last_modified_by = actor
-            # update_fields avoids touching other fields
-            self.save(update_fields=["status", "issued_to", "last_modified_by", "updated_at"])
-            return txn
+        return issue_book(self, member, actor=actor, remarks=remarks)
 
     def mark_returned(self, actor=None, returned_by: Optional[Union[int, object]] = None, remarks=""):
         """
@@ -253,73 +325,9 @@ class Book(models.Model):
         Returns:
             the created RETURN BookTransaction object
         """
-        if actor is None:
-            raise ValueError("Actor (user performing the return) must be provided.")
+        from .circulation import return_book
 
-        with transaction.atomic():
-            # lock the relevant issue transaction rows
-            active_txn = (
-                BookTransaction.objects.select_for_update()
-                .filter(book=self, txn_type=BookTransaction.TYPE_ISSUE, is_active=True)
-                .first()
-            )
-            if not active_txn:
-                raise ValueError("No active issue exists for this book.")
-
-            # actor is a normal member returning themselves
-            if not getattr(actor, "is_staff", False):
-                if active_txn.member != actor:
-                    raise ValueError("Return must be performed by the member who issued the book.")
-            else:
-                # Actor is staff/admin: optional returned_by param may be provided (id or User)
-                if returned_by is not None:
-                    # normalize returned_by to a user id
-                    rid = returned_by.id if hasattr(returned_by, "id") else returned_by
-                    if str(active_txn.member.id) != str(rid):
-                        raise ValueError("The provided returned_by does not match the member who has the active issue.")
-
-            # Set return date and mark issue txn inactive
-            now = timezone.now()
-            active_txn.return_date = now
-            active_txn.is_active = False
-
-            # Fine calculation using configurable rate/grace (R2.04)
-            grace = int(getattr(settings, "LIBRARY_FINE_GRACE_DAYS", 0))
-            per_day = Decimal(str(getattr(settings, "LIBRARY_FINE_PER_DAY", 1)))  # default 1 per day
-
-            fine = Decimal("0.00")
-            if active_txn.due_date:
-                try:
-                    overdue_days = (now.date() - active_txn.due_date.date()).days
-                    if overdue_days > grace:
-                        fine = (Decimal(overdue_days - grace) * per_day).quantize(Decimal("0.01"))
-                except Exception:
-                    # fallback: if dates weird, leave fine 0
-                    fine = Decimal("0.00")
-
-            # set fine and persist the issue transaction update
-            active_txn.fine_amount = fine
-            active_txn.save(update_fields=["return_date", "is_active", "fine_amount", "updated_at"])
-
-            # Create a return transaction (non-active)
-            ret_txn = BookTransaction.objects.create(
-                book=self,
-                member=active_txn.member,
-                actor=actor or active_txn.member,
-                txn_type=BookTransaction.TYPE_RETURN,
-                return_date=now,
-                fine_amount=fine,
-                is_active=False,
-                remarks=remarks,
-            )
-
-            # Update book state back to AVAILABLE (unless we plan to mark DAMAGED/LOST separately)
-            self.status = Book.STATUS_AVAILABLE
-            self.issued_to = None
-            self.last_modified_by = actor
-            self.save(update_fields=["status", "issued_to", "last_modified_by", "updated_at"])
-
-            return ret_txn
+        return return_book(self, actor, returned_by=returned_by, remarks=remarks)
 
     def mark_status(self, status_key, actor=None, remarks=""):
         """
@@ -364,6 +372,65 @@ class Book(models.Model):
             return txn
 
 
+# ----------------------------------------------------------------------
+# Category dictionary (maintained by signals / bulk import; see library/categories.py)
+# ----------------------------------------------------------------------
+class Category(models.Model):
+    """One row per distinct Book.category with live counts (replaces DISTINCT scans)."""
+
+    name = models.CharField(max_length=128, unique=True)
+    book_count = models.IntegerField(default=0)
+    active_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("name",)
+        verbose_name_plural = "categories"
+
+    def __str__(self):
+        return f"{self.name} ({self.active_count})"
+
+
+# ----------------------------------------------------------------------
+# Code counters (book_code numbers on backends without sequences; see library/codes.py)
+# ----------------------------------------------------------------------
+class CodeCounter(models.Model):
+    name = models.CharField(max_length=32, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
+# ----------------------------------------------------------------------
+# Cover-existence index (ISBN-named covers on Cloudinary; see library/cover_index.py)
+# ----------------------------------------------------------------------
+class CoverIndex(models.Model):
+    isbn = models.CharField(max_length=64, unique=True)  # clean_isbn()
+    public_id = models.CharField(max_length=255, blank=True, default="")  # "" = no cover found
+    url = models.URLField(max_length=500, blank=True, default="")
+    checked_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name_plural = "cover index"
+
+    def __str__(self):
+        return f"{self.isbn}: {self.public_id or '-'}"
+
+
+# ----------------------------------------------------------------------
+# Imported files (upsert imports skip a file whose content was already applied; library/import_jobs.py)
+# ----------------------------------------------------------------------
+class ImportedFile(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    rows = models.PositiveIntegerField(default=0)
+    imported_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.rows} rows, {self.created_at:%Y-%m-%d %H:%M})"
+
+
 # ----------------------------------------------------------------------
 # BookTransaction model
 # ----------------------------------------------------------------------
@@ -411,6 +478,8 @@ class BookTransaction(models.Model):
             models.Index(fields=["due_date"], name="txn_due_date_idx"),
             models.Index(fields=["member", "txn_type"], name="txn_member_txn_idx"),
             models.Index(fields=["created_at"], name="txn_created_at_idx"),
+            # keyset pages of one member's history: WHERE member_id = ? AND (created_at, id) < (?, ?)
+            models.Index(fields=["member", "created_at", "id"], name="txn_member_created_idx"),
         ]
 
         # PostgreSQL partial unique constraint for one active issue per book
@@ -437,3 +506,34 @@ class BookTransaction(models.Model):
                 ):
                     raise ValueError("Fine amount is immutable once set.")
         super().save(*args, **kwargs)
+
+
+# ----------------------------------------------------------------------
+# Member circulation summary (maintained by library/circulation.py; see library/member_summary.py)
+# ----------------------------------------------------------------------
+class MemberCirculation(models.Model):
+    """One row per member with loan counters (replaces COUNTs over library_booktransaction)."""
+
+    member = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, on_delete=models.CASCADE,
+                                  related_name="circulation")
+    active_loans = models.IntegerField(default=0)
+    returned_count = models.IntegerField(default=0)
+    # Fines charged on returns (ILAS records no payments yet)
+    unpaid_fines = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    # Earliest due date among the active loans; overdue_loans() needs no query while it is in the future
+    next_due_date = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "member circulation"
+
+    def __str__(self):
+        return f"{self.member_id}: {self.active_loans} active, {self.returned_count} returned"
+
+    def overdue_loans(self, now=None) -> int:
+        now = now or timezone.now()
+        if self.next_due_date is None or self.next_due_date >= now:
+            return 0
+        return BookTransaction.objects.filter(
+            member_id=self.member_id, txn_type=BookTransaction.TYPE_ISSUE, is_active=True, due_date__lt=now
+        ).count()
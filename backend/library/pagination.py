@@ -1,13 +1,162 @@
-from typing import Optional
+import base64
+import json
+from functools import partial
+from typing import Optional, Tuple
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
-class StandardResultsSetPagination(PageNumberPagination):
+# ----------------------------------------------------------------------
+# Cached / estimated counts
+# ----------------------------------------------------------------------
+def estimate_count(queryset) -> Optional[int]:
+    """
+    Planner row estimate (pg_class.reltuples) for an unfiltered queryset on PostgreSQL.
+    None when filtered, on other backends, or below LIBRARY_COUNT_ESTIMATE_MIN_ROWS
+    (small tables are cheap to count exactly and their estimates are the least reliable).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.where or queryset.query.distinct:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    threshold = int(getattr(settings, "LIBRARY_COUNT_ESTIMATE_MIN_ROWS", 100000))
+    if not row or row[0] is None or row[0] < threshold:
+        return None
+    return int(row[0])
+
+
+class _ApproximatePage(Page):
+    def __init__(self, object_list, number, paginator, has_more: bool):
+        super().__init__(object_list, number, paginator)
+        self._has_more = has_more
+
+    def has_next(self):
+        return self._has_more
+
+
+class CachedCountPaginator(DjangoPaginator):
+    """
+    Django paginator whose `count` is read from the cache under `count_key`
+    (computed once per generation), or taken from the planner estimate.
+    With an estimated count, page bounds are checked against the rows actually
+    fetched instead of num_pages.
+    """
+
+    def __init__(self, object_list, per_page, count_key: str = None, estimate: bool = False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.estimate = estimate
+        self.approximate = False
+
+    @cached_property
+    def count(self):
+        if self.estimate:
+            estimated = estimate_count(self.object_list)
+            if estimated is not None:
+                self.approximate = True
+                return estimated
+        if self.count_key:
+            cached = cache.get(self.count_key)
+            if cached is not None:
+                return cached
+        value = DjangoPaginator.count.func(self)
+        if self.count_key:
+            cache.set(self.count_key, value, timeout=int(getattr(settings, "LIBRARY_COUNT_CACHE_SECONDS", 300)))
+        return value
+
+    def validate_number(self, number):
+        self.count  # noqa: B018 – decides `approximate`
+        if not self.approximate:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        return _ApproximatePage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+
+class CachedCountPaginationMixin:
+    """
+    Avoids an exact COUNT(*) per request for catalog and circulation lists.
+
+    - Counts are cached per (endpoint, normalized filters). The filters are
+      normalized as the compiled WHERE clause, which also captures per-user
+      scoping. Keys embed the catalog and transaction generations (tasks.py),
+      so any book or transaction write invalidates them. Without a cache shared
+      by all workers (tasks.shared_cache) counts are not cached: a worker would
+      never see the other workers' bumps.
+    - An unfiltered list over a large table on PostgreSQL uses the planner
+      estimate instead. The response then carries `"count_approximate": true`.
+    Other models keep exact counts.
+    """
+
+    cached_count_models = ("library.book", "library.booktransaction")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = DjangoPaginator
+        model = getattr(queryset, "model", None)
+        if model is not None and model._meta.label_lower in self.cached_count_models:
+            key = self._count_key(queryset, request)
+            self.django_paginator_class = partial(CachedCountPaginator, count_key=key, estimate=True)
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def _count_key(self, queryset, request) -> Optional[str]:
+        from .tasks import generation_cache_key, shared_cache
+
+        if not shared_cache():
+            return None
+        try:
+            # values("pk"): the key depends on the filters, not on the selected columns
+            sql, params = queryset.order_by().values("pk").query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        return generation_cache_key("ilas_count", request.path, sql, params)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if getattr(self.page.paginator, "approximate", False):
+            response.data["count_approximate"] = True
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count_approximate"] = {"type": "boolean", "example": True}
+        return schema
+
+
+class StandardResultsSetPagination(CachedCountPaginationMixin, PageNumberPagination):
     """
     Default pagination for ILAS APIs.
     - Page size 20 (matches REST_FRAMEWORK settings)
     - Clients can request a custom page size up to 100 via ?page_size=
+    - Book / transaction counts are cached or estimated (CachedCountPaginationMixin)
     """
 
     page_size = 20
@@ -38,3 +187,114 @@ class AdminResultsSetPagination(StandardResultsSetPagination):
         return super().get_page_size(request)
 
 
+class KeysetPaginationMixin:
+    """
+    Opt-in keyset (cursor) mode for newest-first history lists.
+
+    Page-number pagination needs OFFSET scans plus COUNT(*), so deep pages get
+    slower. When the request carries `?cursor=` (empty for the first page), the
+    page is fetched with `WHERE (created_at, id) < (last seen)` over
+    `keyset_ordering` instead. Page 500 then costs the same as page 1.
+
+    The response keeps the paginated shape (`count`, `next`, `previous`,
+    `results`); `count` is null in cursor mode and `next` / `previous` carry
+    opaque cursors. Requests without `cursor` keep page numbers.
+    """
+
+    cursor_query_param = "cursor"
+    # (field, descending) pairs; must be a unique ordering (end with the pk)
+    keyset_ordering: Tuple[Tuple[str, bool], ...] = (("created_at", True), ("id", True))
+
+    def is_keyset_request(self, request) -> bool:
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_keyset_request(request):
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view=view)
+
+        self.keyset = True
+        self.request = request
+        size = self.get_page_size(request)
+        position, reverse = self._decode_cursor(queryset, request.query_params.get(self.cursor_query_param))
+
+        qs = queryset.order_by(*(
+            f"{'-' if desc != reverse else ''}{name}" for name, desc in self.keyset_ordering
+        ))
+        if position is not None:
+            qs = qs.filter(self._after(position, reverse))
+        rows = list(qs[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        # The page we came from always lies on the other side of the cursor
+        has_next = has_more if not reverse else True
+        has_previous = (has_more if reverse else position is not None) and bool(rows)
+        self.next_cursor = self._encode_cursor(rows[-1], reverse=False) if has_next and rows else None
+        self.previous_cursor = self._encode_cursor(rows[0], reverse=True) if has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not getattr(self, "keyset", False):
+            return super().get_paginated_response(data)
+        return Response({
+            "count": None,
+            "next": self._cursor_link(self.next_cursor),
+            "previous": self._cursor_link(self.previous_cursor),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count"]["nullable"] = True
+        return schema
+
+    # -- cursor helpers -------------------------------------------------
+    def _after(self, position, reverse: bool) -> Q:
+        """Rows strictly past `position` in the (possibly reversed) keyset order."""
+        cond, equal = Q(), {}
+        for (name, desc), value in zip(self.keyset_ordering, position):
+            op = "lt" if desc != reverse else "gt"
+            cond |= Q(**equal, **{f"{name}__{op}": value})
+            equal[name] = value
+        return cond
+
+    def _encode_cursor(self, obj, reverse: bool) -> str:
+        values = []
+        for name, _ in self.keyset_ordering:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        raw = json.dumps({"p": values, "r": reverse}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def _decode_cursor(self, queryset, token: Optional[str]):
+        if not token:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            meta = queryset.model._meta
+            position = [
+                meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.keyset_ordering, data["p"])
+            ]
+            if len(position) != len(self.keyset_ordering) or None in position:
+                raise ValueError("incomplete cursor")
+            return position, bool(data.get("r"))
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound("Invalid cursor")
+
+    def _cursor_link(self, cursor: Optional[str]) -> Optional[str]:
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+class KeysetResultsSetPagination(KeysetPaginationMixin, StandardResultsSetPagination):
+    """StandardResultsSetPagination with opt-in `?cursor=` keyset mode."""
+
+
+class AdminKeysetResultsSetPagination(KeysetPaginationMixin, AdminResultsSetPagination):
+    """AdminResultsSetPagination with opt-in `?cursor=` keyset mode."""
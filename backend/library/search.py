@@ -0,0 +1,246 @@
+# library/search.py
+"""
+ILAS – Catalog Full-Text Search
+-------------------------------
+One ranked search path shared by every catalog endpoint.
+
+Backends:
+- PostgreSQL: `Book.search_vector` (tsvector) maintained by a DB trigger, GIN indexed.
+- SQLite:     FTS5 shadow table `library_book_fts` maintained by DB triggers.
+- Others:     falls back to the legacy icontains chain (rank 0).
+
+Triggers (not signals) keep the index current, so bulk_create / queryset.update()
+paths stay in sync too. Installed by migration 0014 and re-checked on post_migrate
+(SQLite drops triggers whenever a migration rebuilds library_book).
+
+Query terms are matched as prefixes ("pyth" → "python"), combined with AND,
+and results are ordered by relevance (`search_rank`, higher is better).
+"""
+
+import logging
+import re
+from typing import List
+
+from django.db import connections
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+BOOK_TABLE = "library_book"
+FTS_TABLE = "library_book_fts"
+
+# FTS5 column weights, in column order: title, author, codes, extra
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+# Used only by the fallback path (non-PostgreSQL, non-SQLite backends)
+FALLBACK_FIELDS = ("title", "author", "isbn", "book_code", "accession_no", "shelf_location")
+
+_TERM_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+# ----------------------------------------------------------------------
+# Query side
+# ----------------------------------------------------------------------
+def tokenize(query: str) -> List[str]:
+    """Split free text into lowercase search terms (punctuation-insensitive)."""
+    return [t.lower() for t in _TERM_RE.findall(query or "")]
+
+
+def search_books(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Filter a Book queryset by `query` and order it by relevance.
+    Adds a `search_rank` annotation. Returns an empty queryset when
+    the query has no searchable terms.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        qs = _search_postgres(queryset, terms)
+    elif vendor == "sqlite":
+        qs = _search_sqlite(queryset, terms)
+    else:
+        qs = _search_fallback(queryset, query.strip())
+    return qs.order_by("-search_rank", "-id")
+
+
+def _search_postgres(queryset: QuerySet, terms: List[str]) -> QuerySet:
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    tsquery = SearchQuery(" & ".join(f"{t}:*" for t in terms), search_type="raw", config="simple")
+    return queryset.filter(search_vector=tsquery).annotate(
+        search_rank=SearchRank(F("search_vector"), tsquery)
+    )
+
+
+def _search_sqlite(queryset: QuerySet, terms: List[str]) -> QuerySet:
+    match = " ".join(f'"{t}"*' for t in terms)
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    ).annotate(
+        # bm25() is lower-is-better; negate so callers can sort "-search_rank" everywhere
+        search_rank=RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {BOOK_TABLE}.id",
+            [match],
+            output_field=FloatField(),
+        )
+    )
+
+
+def _search_fallback(queryset: QuerySet, query: str) -> QuerySet:
+    cond = Q()
+    for field in FALLBACK_FIELDS:
+        cond |= Q(**{f"{field}__icontains": query})
+    return queryset.filter(cond).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+# ----------------------------------------------------------------------
+# Index maintenance (DDL)
+# ----------------------------------------------------------------------
+# Only columns that feed the document; status/issued_to updates during circulation skip the triggers.
+INDEXED_COLUMNS = (
+    "title, subtitle, author, book_code, isbn, accession_no, keywords, category, shelf_location, publisher"
+)
+
+PG_DOCUMENT = """
+    setweight(to_tsvector('simple', coalesce(NEW.title, '') || ' ' || coalesce(NEW.subtitle, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(NEW.author, '')), 'B') ||
+    setweight(to_tsvector('simple',
+        coalesce(NEW.book_code, '') || ' ' || coalesce(NEW.isbn, '') || ' ' ||
+        replace(coalesce(NEW.isbn, ''), '-', '') || ' ' || coalesce(NEW.accession_no, '')), 'C') ||
+    setweight(to_tsvector('simple',
+        coalesce(NEW.keywords, '') || ' ' || coalesce(NEW.category, '') || ' ' ||
+        coalesce(NEW.shelf_location, '') || ' ' || coalesce(NEW.publisher, '')), 'D')
+"""
+
+PG_INSTALL = [
+    f"""
+    CREATE OR REPLACE FUNCTION library_book_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {PG_DOCUMENT};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    f"DROP TRIGGER IF EXISTS library_book_search_vector_trg ON {BOOK_TABLE};",
+    f"""
+    CREATE TRIGGER library_book_search_vector_trg
+    BEFORE INSERT OR UPDATE OF {INDEXED_COLUMNS} ON {BOOK_TABLE}
+    FOR EACH ROW EXECUTE FUNCTION library_book_search_vector_update();
+    """,
+    # Backfill existing rows through the trigger
+    f"UPDATE {BOOK_TABLE} SET title = title;",
+    f"CREATE INDEX IF NOT EXISTS library_book_search_vector_gin ON {BOOK_TABLE} USING GIN (search_vector);",
+]
+
+PG_DROP = [
+    "DROP INDEX IF EXISTS library_book_search_vector_gin;",
+    f"DROP TRIGGER IF EXISTS library_book_search_vector_trg ON {BOOK_TABLE};",
+    "DROP FUNCTION IF EXISTS library_book_search_vector_update();",
+]
+
+
+def _fts_values(ref: str) -> str:
+    return (
+        f"{ref}.id, "
+        f"coalesce({ref}.title, '') || ' ' || coalesce({ref}.subtitle, ''), "
+        f"coalesce({ref}.author, ''), "
+        f"coalesce({ref}.book_code, '') || ' ' || coalesce({ref}.isbn, '') || ' ' || "
+        f"replace(coalesce({ref}.isbn, ''), '-', '') || ' ' || coalesce({ref}.accession_no, ''), "
+        f"coalesce({ref}.keywords, '') || ' ' || coalesce({ref}.category, '') || ' ' || "
+        f"coalesce({ref}.shelf_location, '') || ' ' || coalesce({ref}.publisher, '')"
+    )
+
+
+_FTS_INSERT = f"INSERT INTO {FTS_TABLE} (rowid, title, author, codes, extra)"
+
+SQLITE_TRIGGERS = {
+    "library_book_fts_ai": f"""
+    CREATE TRIGGER IF NOT EXISTS library_book_fts_ai AFTER INSERT ON {BOOK_TABLE} BEGIN
+        {_FTS_INSERT} SELECT {_fts_values("new")};
+    END;
+    """,
+    "library_book_fts_au": f"""
+    CREATE TRIGGER IF NOT EXISTS library_book_fts_au AFTER UPDATE OF {INDEXED_COLUMNS} ON {BOOK_TABLE} BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {_FTS_INSERT} SELECT {_fts_values("new")};
+    END;
+    """,
+    "library_book_fts_ad": f"""
+    CREATE TRIGGER IF NOT EXISTS library_book_fts_ad AFTER DELETE ON {BOOK_TABLE} BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END;
+    """,
+}
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5(title, author, codes, extra, tokenize = 'unicode61 remove_diacritics 2');
+    """,
+    *SQLITE_TRIGGERS.values(),
+    # Rebuild contents from the base table
+    f"DELETE FROM {FTS_TABLE};",
+    f"{_FTS_INSERT} SELECT {_fts_values(BOOK_TABLE)} FROM {BOOK_TABLE};",
+]
+
+SQLITE_DROP = [
+    *(f"DROP TRIGGER IF EXISTS {name};" for name in SQLITE_TRIGGERS),
+    f"DROP TABLE IF EXISTS {FTS_TABLE};",
+]
+
+
+def _execute(connection, statements) -> None:
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_search_index(connection) -> None:
+    """Create (or rebuild) the full-text index objects for this connection's backend."""
+    if connection.vendor == "postgresql":
+        _execute(connection, PG_INSTALL)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_INSTALL)
+
+
+def drop_search_index(connection) -> None:
+    """Remove the full-text index objects (migration reverse)."""
+    if connection.vendor == "postgresql":
+        _execute(connection, PG_DROP)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_DROP)
+
+
+def repair_sqlite_shadow(connection, shadow_table: str, trigger_names, install) -> None:
+    """
+    SQLite rebuilds tables on AlterField and silently drops their triggers. Re-run
+    `install(connection)` when `shadow_table` exists but any of its triggers has gone
+    missing (a missing shadow table means its migration is not applied).
+    """
+    if connection.vendor != "sqlite":
+        return
+    expected = {shadow_table, *trigger_names}
+    try:
+        with connection.cursor() as cursor:
+            placeholders = ", ".join(["%s"] * len(expected))
+            cursor.execute(
+                f"SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name IN ({placeholders})",
+                list(expected),
+            )
+            present = {row[0] for row in cursor.fetchall()}
+        if shadow_table in present and present != expected:
+            logger.warning("Shadow index %s incomplete (%s); rebuilding.", shadow_table, sorted(present))
+            install(connection)
+    except Exception as e:
+        logger.warning("Shadow index check failed for %s: %s", shadow_table, e)
+
+
+def ensure_search_index(sender=None, using="default", **kwargs) -> None:
+    """post_migrate receiver: repair the SQLite FTS triggers after table rebuilds."""
+    repair_sqlite_shadow(connections[using], FTS_TABLE, SQLITE_TRIGGERS, install_search_index)
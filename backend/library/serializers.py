@@ -1,21 +1,111 @@
 # library/serializers.py
 from decimal import Decimal
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 
 from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Book, BookTransaction, AuditLog
+from . import cover_index
+from .covers import get_cover_storage
+from .models import Book, BookTransaction, AuditLog, clean_isbn
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from rest_framework.exceptions import ValidationError as DRFValidationError
 User = get_user_model()
 
 
-class BookSerializer(serializers.ModelSerializer):
+def cover_thumb_url(obj, cover_url):
+    """List-size cover made by bulk imports (library/covers.py); otherwise the full cover."""
+    if obj.cover_thumbnail:
+        try:
+            return get_cover_storage().url(obj.cover_thumbnail)
+        except Exception:
+            pass
+    return cover_url(obj)
+
+
+def book_cover_url(serializer, obj):
+    """
+    Stored cover, else the cover the index (library/cover_index.py) has for the ISBN,
+    else the default cover. Under many=True the whole page is resolved at once, from
+    the page query itself when the view used cover_index.with_entries().
+    """
+    if obj.cover_image:
+        try:
+            return obj.cover_image.url
+        except Exception:
+            pass
+
+    isbn = (obj.isbn or "").strip()
+    if not isbn:
+        return settings.DEFAULT_BOOK_COVER
+    covers = serializer.context.get("cover_index_urls")
+    if covers is None:
+        parent = serializer.parent
+        if isinstance(parent, serializers.ListSerializer) and parent.instance is not None:
+            covers = cover_index.page_cover_urls(parent.instance)
+            serializer.context["cover_index_urls"] = covers
+        else:
+            covers = cover_index.cover_urls([isbn])
+    return covers.get(clean_isbn(isbn)) or settings.DEFAULT_BOOK_COVER
+
+
+class SparseFieldsetMixin:
+    """
+    `?fields=a,b` / `?omit=c,d` on GET requests trims the representation to the
+    named fields. `project()` pushes the same selection into the queryset
+    (`.only()` + `select_related()`), so columns that are not rendered are not read.
+    """
+
+    # Serializer field -> ORM paths it reads, when not simply the column of the same name
+    sparse_field_columns: Dict[str, Tuple[str, ...]] = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.requested_fields(self.context.get("request"))
+        if selected is not None:
+            for name in [f for f in self.fields if f not in selected]:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request) -> Optional[List[str]]:
+        """Fields selected by ?fields= / ?omit= (Meta.fields order); None when neither is given."""
+        if request is None or request.method not in ("GET", "HEAD"):
+            return None
+        params = getattr(request, "query_params", request.GET)
+        wanted, omitted = (
+            [f.strip() for f in (params.get(p) or "").split(",") if f.strip()] for p in ("fields", "omit")
+        )
+        if not wanted and not omitted:
+            return None
+        available = list(cls.Meta.fields)
+        unknown = [f for f in wanted + omitted if f not in available]
+        if unknown:
+            raise DRFValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}"})
+        return [f for f in available if (not wanted or f in wanted) and f not in omitted]
+
+    @classmethod
+    def project(cls, queryset, request):
+        """Restrict `queryset` to the columns the requested fields read."""
+        selected = cls.requested_fields(request)
+        if selected is None:
+            return queryset
+        columns, related = {queryset.model._meta.pk.name}, set()
+        for name in selected:
+            for path in cls.sparse_field_columns.get(name, (name,)):
+                columns.add(path)
+                if "__" in path:
+                    related.add(path.split("__", 1)[0])
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        return queryset.only(*sorted(columns))
+
+
+class BookSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     issued_to_name = serializers.ReadOnlyField(source="issued_to.username", default=None)
     last_modified_by_name = serializers.ReadOnlyField(source="last_modified_by.username", default=None)
     cover_url = serializers.SerializerMethodField()
+    cover_thumb_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Book
@@ -25,7 +115,7 @@ class BookSerializer(serializers.ModelSerializer):
             "isbn", "language", "category", "keywords", "description",
             "accession_no", "shelf_location", "condition", "book_cost",
             "vendor_name", "source", "library_section", "dewey_decimal",
-            "cataloger", "remarks", "cover_image", "cover_url",
+            "cataloger", "remarks", "cover_image", "cover_url", "cover_thumb_url",
             "status", "issued_to", "issued_to_name",
             "last_modified_by", "last_modified_by_name",
             "created_at", "updated_at", "is_active",
@@ -36,26 +126,22 @@ class BookSerializer(serializers.ModelSerializer):
             "created_at", "updated_at",
         ]
 
+    sparse_field_columns = {
+        "issued_to_name": ("issued_to__username",),
+        "last_modified_by_name": ("last_modified_by__username",),
+        "cover_url": ("cover_image", "isbn"),
+        "cover_thumb_url": ("cover_thumbnail", "cover_image", "isbn"),
+    }
+
     def to_representation(self, instance):
         ret = super().to_representation(instance)
         return ret
 
     def get_cover_url(self, obj):
-        # 1. Single book upload (already stored in DB)
-        if obj.cover_image:
-            try:
-                return obj.cover_image.url
-            except Exception:
-                pass
-
-        # 2. Bulk upload (resolve via ISBN)
-        if obj.isbn:
-            isbn = obj.isbn.strip()
-            return f"{settings.CLOUDINARY_BOOK_COVER_BASE}/{isbn}.jpg"
-
-        # 3. Final fallback
-        return settings.DEFAULT_BOOK_COVER
+        return book_cover_url(self, obj)
 
+    def get_cover_thumb_url(self, obj):
+        return cover_thumb_url(obj, self.get_cover_url)
 
     def validate(self, attrs):
         # Ensure API create has defaults for required fields
@@ -282,9 +368,10 @@ class BulkBookImportSerializer(serializers.Serializer):
     remarks = serializers.CharField(required=False, allow_blank=True, allow_null=True)
 
     def validate(self, attrs):
-        """Normalize None -> '' and ensure required fields present."""
+        """Normalize None -> '' (text fields) and ensure required fields present."""
         for field, value in list(attrs.items()):
-            if value is None:
+            # publication_year / book_cost stay None: '' is not a valid number for the model
+            if value is None and isinstance(self.fields[field], serializers.CharField):
                 attrs[field] = ""
         if not attrs.get("title"):
             raise serializers.ValidationError({"title": "Title is required."})
@@ -328,29 +415,20 @@ class BulkBookImportSerializer(serializers.Serializer):
 class PublicBookSerializer(serializers.ModelSerializer):
     issued_to_name = serializers.SerializerMethodField()
     cover_url = serializers.SerializerMethodField()
+    cover_thumb_url = serializers.SerializerMethodField()
 
 
     class Meta:
         model = Book
         fields = [
             "id", "book_code", "title", "author", "isbn", "category",
-            "status", "shelf_location", "issued_to_name","cover_url",
+            "status", "shelf_location", "issued_to_name","cover_url", "cover_thumb_url",
         ]
 
     def get_issued_to_name(self, obj):
         return obj.issued_to.username if obj.issued_to else None
     def get_cover_url(self, obj):
-        # 1. Preserve single book uploads
-        if obj.cover_image:
-            try:
-                return obj.cover_image.url
-            except Exception:
-                pass
-
-        # 2. Resolve bulk-uploaded books via ISBN
-        if obj.isbn:
-            isbn = obj.isbn.strip()
-            return f"{settings.CLOUDINARY_BOOK_COVER_BASE}/{isbn}.jpg"
-
-        # 3. Fallback to default cover
-        return settings.DEFAULT_BOOK_COVER
+        return book_cover_url(self, obj)
+
+    def get_cover_thumb_url(self, obj):
+        return cover_thumb_url(obj, self.get_cover_url)
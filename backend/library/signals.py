@@ -6,17 +6,23 @@ ILAS v5 – Thread-Safe, Audit-Safe Signals
 ✅ Prevents deletion of issued books (R6.01)
 ✅ Logs Book and BookTransaction events (R7.01–R7.03)
 ✅ Thread-local reentrant lock for non-recursive audit safety
+✅ Bumps the catalog generation (ETags, count/facet caches) and keeps the
+   in-process suggest index current (library/suggest.py)
+✅ Keeps the Category dictionary counts current (library/categories.py)
+✅ Gives every new member a circulation summary row (library/member_summary.py)
 """
-from .tasks import invalidate_dashboard_cache
+from .tasks import invalidate_dashboard_cache, bump_catalog_generation, bump_transaction_generation
+from . import suggest, categories
 
 import logging
 import threading
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.core.files.storage import default_storage
 
-from .models import Book, BookTransaction, AuditLog, create_audit
+from .models import Book, BookTransaction, AuditLog, MemberCirculation, create_audit
 
 
 
@@ -91,6 +97,7 @@ def prevent_delete_if_active(sender, instance, **kwargs):
 def log_transaction_activity(sender, instance, created, **kwargs):
     """Create AuditLog for BookTransaction (R7.01–R7.03)."""
     invalidate_dashboard_cache()
+    bump_transaction_generation()
 
     if not created:
         return
@@ -137,6 +144,9 @@ def log_transaction_activity(sender, instance, created, **kwargs):
 def log_book_activity(sender, instance, created, **kwargs):
     """Create AuditLog when a Book is added or edited."""
     invalidate_dashboard_cache()
+    categories.book_saved(instance, created)
+    bump_catalog_generation()
+    suggest.book_saved(instance, created)
     if getattr(instance, "_suppress_audit", False):
         return
     if _audit_locked():
@@ -179,6 +189,9 @@ def log_book_activity(sender, instance, created, **kwargs):
 def log_book_delete(sender, instance, **kwargs):
     """Record audit entry when a Book is deleted."""
     invalidate_dashboard_cache()
+    categories.book_deleted(instance)
+    bump_catalog_generation()
+    suggest.book_deleted(instance.pk)
     actor = getattr(instance, "last_modified_by", None)
     if not actor:
         return
@@ -196,17 +209,11 @@ def log_book_delete(sender, instance, **kwargs):
         logger.exception("Book deletion audit failed for %s: %s", instance.book_code, e)
 
 
-from django.core.cache import cache
-from .tasks import recompute_dashboard_stats
-
-class DashboardStats(APIView):
-    permission_classes = [IsAdminUser]
-
-    def get(self, request):
-        cache_key = "ilas_dashboard_stats"
-        data = cache.get(cache_key)
-
-        if not data:
-            data = recompute_dashboard_stats()
-
-        return Response(data)
+# ----------------------------------------------------------------------
+# Member circulation summary row
+# ----------------------------------------------------------------------
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_member_circulation(sender, instance, created, raw=False, **kwargs):
+    """New members start with an all-zero row, so their first issue is a plain UPDATE."""
+    if created and not raw:
+        MemberCirculation.objects.create(member=instance)
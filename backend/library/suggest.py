@@ -0,0 +1,408 @@
+# library/suggest.py
+"""
+ILAS – In-Process Type-Ahead Index
+----------------------------------
+Backs GET /api/v1/public/books/suggest/?q=<prefix>. Completes titles, authors and
+book codes from worker memory: no database round trip on the request path.
+
+Layout (one index per worker process):
+- Base segment: immutable sorted arrays. Every key lives in one UTF-8 `bytes` blob
+  addressed by an `array('I')` of offsets; display strings live in a second blob.
+  Lookups bisect the offsets and scan forward while keys share the prefix.
+- Delta: a small sorted list for books saved since the base was built, plus a set
+  of base ids that are superseded (edited) or deleted.
+
+Keys are normalized (NFKD, accents stripped, casefolded, punctuation → one space)
+and indexed from every word start, so "prog" completes "Python Programming" and
+"0042" completes "ILAS-ET-0042".
+
+Freshness:
+- The index has its own generation (tasks.get_suggest_generation), bumped only when
+  a suggested field (title, author, book_code, is_active) changes. Circulation
+  status updates move the catalog generation but leave this one alone, so they
+  never trigger rebuilds.
+- signals.py applies Book post_save / post_delete to this worker's index at once
+  (book_saved skips saves that change no suggested field).
+- Other workers see the suggest generation move and rebuild in a background
+  thread, at most every LIBRARY_SUGGEST_REFRESH_SECONDS. bulk_create imports (no
+  signals) bump the generation explicitly.
+- That cross-worker refresh requires a cache shared by all workers (REDIS_URL,
+  tasks.shared_cache). With a process-local cache each worker only sees its own
+  saves until it restarts or `manage.py rebuild_suggest_index` runs there.
+- The delta is folded into a fresh base once it passes LIBRARY_SUGGEST_MAX_DELTA.
+
+Footprint for 200k synthetic books (`manage.py rebuild_suggest_index --synthetic 200000`):
+1.8M keys; 28 MB key blob + 14 MB display blob + 18 MB arrays ≈ 60 MB per worker
+(the same data as Python str/tuple objects is ~5x that). Built in ~12 s off the
+request path; lookups take ~0.02–0.15 ms.
+"""
+
+import bisect
+import logging
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+from .tasks import bump_suggest_generation, get_suggest_generation
+
+logger = logging.getLogger(__name__)
+
+# Key kinds: field id, plus MID_WORD when the key starts at a later word of the field
+FIELD_TITLE, FIELD_AUTHOR, FIELD_CODE = 0, 1, 2
+FIELD_NAMES = ("title", "author", "book_code")
+MID_WORD = 4
+
+# Keys are truncated to this many bytes; longer queries are verified against the full text
+KEY_BYTES = 32
+# Inner words shorter than this ("of", "a") do not start keys
+MIN_WORD_CHARS = 3
+# Matching keys examined per requested suggestion before ranking
+SCAN_FACTOR = 8
+
+_SEP = "\x1f"
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+Row = Tuple[int, str, str, str]  # (book id, title, author, book_code)
+
+
+def _refresh_seconds() -> float:
+    return float(getattr(settings, "LIBRARY_SUGGEST_REFRESH_SECONDS", 30))
+
+
+def _max_delta() -> int:
+    return int(getattr(settings, "LIBRARY_SUGGEST_MAX_DELTA", 5000))
+
+
+def default_limit() -> int:
+    return int(getattr(settings, "LIBRARY_SUGGEST_LIMIT", 8))
+
+
+# ----------------------------------------------------------------------
+# Keys
+# ----------------------------------------------------------------------
+def normalize(text) -> str:
+    """Accent-free, casefolded words joined by single spaces ("Café-Noir" → "cafe noir")."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(_WORD_RE.findall(text))
+
+
+def _keys(row: Row) -> set:
+    """(key bytes, kind) pairs for one book."""
+    keys = set()
+    for field in (FIELD_TITLE, FIELD_AUTHOR, FIELD_CODE):
+        norm = normalize(row[1 + field])
+        if not norm:
+            continue
+        keys.add((norm.encode()[:KEY_BYTES], field))
+        words = norm.split(" ")
+        start = 0
+        for prev, word in zip(words, words[1:]):
+            start += len(prev) + 1
+            if field == FIELD_CODE:
+                if not any(c.isdigit() for c in word):
+                    continue
+            elif len(word) < MIN_WORD_CHARS:
+                continue
+            keys.add((norm[start:].encode()[:KEY_BYTES], field | MID_WORD))
+    return keys
+
+
+def _clean(value) -> str:
+    return str(value or "").replace(_SEP, " ")
+
+
+# ----------------------------------------------------------------------
+# Immutable sorted-array segment
+# ----------------------------------------------------------------------
+class _Segment:
+    __slots__ = ("ids", "doc_offsets", "docs", "key_offsets", "keys", "key_docs", "kinds")
+
+    def __init__(self, rows: Iterable[Row]):
+        self.ids = array("q")
+        self.doc_offsets = array("I", [0])
+        docs, entries = [], []
+        for doc, row in enumerate(sorted(rows)):
+            self.ids.append(row[0])
+            blob = _SEP.join(_clean(v) for v in row[1:]).encode()
+            docs.append(blob)
+            self.doc_offsets.append(self.doc_offsets[-1] + len(blob))
+            entries.extend((key, doc, kind) for key, kind in _keys(row))
+        entries.sort()
+        self.docs = b"".join(docs)
+        self.keys = b"".join(e[0] for e in entries)
+        self.key_offsets = array("I", [0])
+        pos = 0
+        for e in entries:
+            pos += len(e[0])
+            self.key_offsets.append(pos)
+        self.key_docs = array("I", (e[1] for e in entries))
+        self.kinds = bytes(e[2] for e in entries)
+
+    def key(self, i: int) -> bytes:
+        return self.keys[self.key_offsets[i]:self.key_offsets[i + 1]]
+
+    def scan(self, prefix: bytes):
+        """Yield (key, book id, kind) for keys starting with `prefix`, in key order."""
+        lo, hi = 0, len(self.key_docs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        for i in range(lo, len(self.key_docs)):
+            key = self.key(i)
+            if not key.startswith(prefix):
+                return
+            yield key, self.ids[self.key_docs[i]], self.kinds[i]
+
+    def find(self, book_id: int) -> Optional[int]:
+        doc = bisect.bisect_left(self.ids, book_id)
+        return doc if doc < len(self.ids) and self.ids[doc] == book_id else None
+
+    def row(self, doc: int) -> Row:
+        values = self.docs[self.doc_offsets[doc]:self.doc_offsets[doc + 1]].decode().split(_SEP)
+        return (self.ids[doc], *values)
+
+    def nbytes(self) -> Dict[str, int]:
+        arrays = (self.ids, self.doc_offsets, self.key_offsets, self.key_docs)
+        return {
+            "key_bytes": sys.getsizeof(self.keys),
+            "doc_bytes": sys.getsizeof(self.docs),
+            "array_bytes": sum(a.buffer_info()[1] * a.itemsize for a in arrays) + sys.getsizeof(self.kinds),
+        }
+
+
+# ----------------------------------------------------------------------
+# Index = base segment + delta
+# ----------------------------------------------------------------------
+class PrefixIndex:
+    """Prefix index over normalized titles, authors and book codes (thread-safe)."""
+
+    def __init__(self, rows: Iterable[Row] = (), generation: int = 0):
+        self._base = _Segment(rows)
+        self._dead = set()                                  # base ids superseded or deleted
+        self._delta_rows: Dict[int, Row] = {}
+        self._delta_keys: List[Tuple[bytes, int, int]] = []  # sorted (key, book id, kind)
+        self._lock = threading.Lock()
+        self.generation = generation
+
+    def __len__(self) -> int:
+        return len(self._base.ids) - len(self._dead) + len(self._delta_rows)
+
+    @property
+    def pending(self) -> int:
+        """Changes held outside the base segment."""
+        return len(self._dead) + len(self._delta_rows)
+
+    def upsert(self, row: Row) -> None:
+        row = (row[0], *(_clean(v) for v in row[1:]))
+        with self._lock:
+            self._discard(row[0])
+            self._delta_rows[row[0]] = row
+            for key, kind in _keys(row):
+                bisect.insort(self._delta_keys, (key, row[0], kind))
+
+    def remove(self, book_id: int) -> None:
+        with self._lock:
+            self._discard(book_id)
+
+    def _discard(self, book_id: int) -> None:
+        if self._base.find(book_id) is not None:
+            self._dead.add(book_id)
+        old = self._delta_rows.pop(book_id, None)
+        if old:
+            for key, kind in _keys(old):
+                i = bisect.bisect_left(self._delta_keys, (key, book_id, kind))
+                del self._delta_keys[i]
+
+    def _row(self, book_id: int) -> Row:
+        row = self._delta_rows.get(book_id)
+        return row if row else self._base.row(self._base.find(book_id))
+
+    def suggest(self, query: str, limit: int = 8) -> List[dict]:
+        """
+        Up to `limit` completions for `query`, one per distinct (field, text).
+        Field starts rank above inner-word matches; titles above authors above codes.
+        """
+        norm = normalize(query)
+        if not norm or limit <= 0:
+            return []
+        full = norm.encode()
+        prefix = full[:KEY_BYTES]
+        cap = limit * SCAN_FACTOR
+
+        with self._lock:
+            hits = []
+            for key, book_id, kind in self._base.scan(prefix):
+                if book_id not in self._dead:
+                    hits.append((kind & MID_WORD, kind & ~MID_WORD, key, book_id))
+                    if len(hits) >= cap:
+                        break
+            i = bisect.bisect_left(self._delta_keys, (prefix,))
+            for key, book_id, kind in self._delta_keys[i:i + cap]:
+                if not key.startswith(prefix):
+                    break
+                hits.append((kind & MID_WORD, kind & ~MID_WORD, key, book_id))
+            hits.sort()
+
+            results, seen = [], set()
+            for _, field, _, book_id in hits:
+                row = self._row(book_id)
+                text = row[1 + field]
+                if len(full) > KEY_BYTES and f" {norm}" not in f" {normalize(text)}":
+                    continue  # matched only on the truncated key
+                if (field, text.casefold()) in seen:
+                    continue
+                seen.add((field, text.casefold()))
+                results.append({
+                    "text": text,
+                    "field": FIELD_NAMES[field],
+                    "book_id": book_id,
+                    "book_code": row[3],
+                })
+                if len(results) >= limit:
+                    break
+        return results
+
+    def footprint(self) -> Dict[str, int]:
+        """Approximate resident bytes (base blobs/arrays + delta estimate)."""
+        stats = self._base.nbytes()
+        stats["delta_bytes"] = sum(
+            sys.getsizeof(k) + 72 for k, _, _ in self._delta_keys
+        ) + sum(sum(sys.getsizeof(v) for v in row) + 72 for row in self._delta_rows.values())
+        stats["total_bytes"] = sum(stats.values())
+        stats["books"] = len(self)
+        stats["keys"] = len(self._base.key_docs) + len(self._delta_keys)
+        return stats
+
+
+# ----------------------------------------------------------------------
+# Per-worker singleton
+# ----------------------------------------------------------------------
+_index: Optional[PrefixIndex] = None
+_journal: Optional[list] = None      # changes seen while a rebuild is loading rows
+_state_lock = threading.Lock()       # guards _index / _journal hand-over
+_build_lock = threading.Lock()       # one build at a time
+_last_refresh = 0.0
+
+
+def _load_rows() -> Iterable[Row]:
+    from .models import Book
+
+    return (
+        Book.objects.filter(is_active=True)
+        .values_list("id", "title", "author", "book_code")
+        .iterator(chunk_size=5000)
+    )
+
+
+def rebuild(rows: Iterable[Row] = None) -> PrefixIndex:
+    """Build a fresh index (from the database unless `rows` is given) and swap it in."""
+    global _index, _journal, _last_refresh
+    with _build_lock:
+        generation = get_suggest_generation()
+        with _state_lock:
+            _journal = []
+        try:
+            index = PrefixIndex(_load_rows() if rows is None else rows, generation)
+        except Exception:
+            with _state_lock:
+                _journal = None
+            raise
+        with _state_lock:
+            # Replay saves/deletes that raced with the load
+            for op, arg in _journal:
+                index.upsert(arg) if op == "upsert" else index.remove(arg)
+            _journal = None
+            _index = index
+        _last_refresh = time.monotonic()
+    logger.info("Suggest index built: %s books, %s keys", len(index), index.footprint()["keys"])
+    return index
+
+
+def get_index() -> PrefixIndex:
+    """This worker's index; built synchronously on first use (or waits for warm-up)."""
+    if _index is None:
+        with _build_lock:
+            pass  # a warm-up build in flight finishes first
+        if _index is None:
+            rebuild()
+    return _index
+
+
+def _background_rebuild() -> None:
+    try:
+        rebuild()
+    except Exception as e:
+        logger.warning("Suggest index rebuild failed: %s", e)
+    finally:
+        connection.close()
+
+
+def _maybe_refresh(index: PrefixIndex) -> None:
+    """Schedule a background rebuild when another worker (or a bulk import) changed a suggested field."""
+    global _last_refresh
+    stale = index.pending > _max_delta() or index.generation != get_suggest_generation()
+    if not stale or _build_lock.locked() or time.monotonic() - _last_refresh < _refresh_seconds():
+        return
+    _last_refresh = time.monotonic()
+    threading.Thread(target=_background_rebuild, name="ilas-suggest-rebuild", daemon=True).start()
+
+
+def warm_up() -> None:
+    """Start building this worker's index in the background (called from wsgi/asgi)."""
+    if getattr(settings, "LIBRARY_SUGGEST_WARMUP", True):
+        threading.Thread(target=_background_rebuild, name="ilas-suggest-warmup", daemon=True).start()
+
+
+def suggest(query: str, limit: int = None) -> List[dict]:
+    index = get_index()
+    _maybe_refresh(index)
+    return index.suggest(query, limit or default_limit())
+
+
+# ----------------------------------------------------------------------
+# Signal hooks (library/signals.py)
+# ----------------------------------------------------------------------
+def _apply(op: str, arg, generation: int) -> None:
+    with _state_lock:
+        index = _index
+        if _journal is not None:
+            _journal.append((op, arg))
+    if index is None:
+        return
+    index.upsert(arg) if op == "upsert" else index.remove(arg)
+    if index.generation == generation - 1:
+        index.generation = generation  # this was the only change since we were current
+
+
+def book_saved(book, created: bool = False) -> None:
+    """Apply a Book post_save; saves that change no suggested field (status, shelf, ...) cost nothing."""
+    stored = getattr(book, "_stored_suggest", None)
+    if not created and stored is not None and stored == book.suggest_state():
+        return
+    try:
+        generation = bump_suggest_generation()
+        if book.is_active:
+            _apply("upsert", (book.pk, book.title, book.author, book.book_code or ""), generation)
+        else:
+            _apply("remove", book.pk, generation)
+    except Exception as e:
+        logger.warning("Suggest index update failed for book %s: %s", book.pk, e)
+    book.remember_suggest_state()
+
+
+def book_deleted(book_id: int) -> None:
+    try:
+        _apply("remove", book_id, bump_suggest_generation())
+    except Exception as e:
+        logger.warning("Suggest index removal failed for book %s: %s", book_id, e)
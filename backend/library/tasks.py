@@ -6,6 +6,8 @@ Safe background task helpers for ILAS.
 - Small helpers for task id and progress (cache-based).
 """
 
+import hashlib
+import time
 import uuid
 import traceback
 from typing import Any, Callable, Dict
@@ -27,15 +29,24 @@ def create_task_id(prefix: str = "TASK") -> str:
     return f"{prefix}-{uuid.uuid4()}"
 
 
-def update_task_progress(task_id: str, progress: int, message: str = "", status: str = "IN_PROGRESS") -> None:
-    """Store task progress in Django cache (useful for polled UI)."""
+def task_progress_key(task_id: str) -> str:
+    """Cache key of a task's progress entry (kept apart from every other cache key)."""
+    return f"ilas_task_progress:{task_id}"
+
+
+def update_task_progress(task_id: str, progress: int, message: str = "", status: str = "IN_PROGRESS",
+                         result: Any = None) -> Dict[str, Any]:
+    """Store task progress in Django cache (useful for polled UI); `result` is the final summary."""
     data = {"progress": int(progress), "status": status, "message": message}
-    cache.set(task_id, data, timeout=3600)
+    if result is not None:
+        data["result"] = result
+    cache.set(task_progress_key(task_id), data, timeout=3600)
+    return data
 
 
 def get_task_progress(task_id: str) -> Dict[str, Any]:
     """Retrieve progress data for a given task id (returns a default if none)."""
-    return cache.get(task_id, {"progress": 0, "status": "PENDING", "message": ""})
+    return cache.get(task_progress_key(task_id), {"progress": 0, "status": "PENDING", "message": ""})
 
 
 def is_celery_available() -> bool:
@@ -112,4 +123,109 @@ def recompute_dashboard_stats():
     return data
 
 def invalidate_dashboard_cache():
-    cache.delete("ilas_dashboard_stats")
\ No newline at end of file
+    cache.delete("ilas_dashboard_stats")
+
+
+# ----------------------------------------------------------------------
+# Generations (shared change counters; cache keys embed them to invalidate)
+#
+# The counters live in the default cache, so they are only shared when every
+# worker talks to the same cache (Redis via REDIS_URL). With a process-local
+# LocMemCache a worker never sees another worker's bumps: shared_cache() is then
+# False and the generation-keyed caches, ETags and cross-worker suggest refresh
+# are switched off (system check library.W001).
+# ----------------------------------------------------------------------
+CATALOG_GENERATION_KEY = "ilas_catalog_generation"
+TRANSACTION_GENERATION_KEY = "ilas_transaction_generation"
+SUGGEST_GENERATION_KEY = "ilas_suggest_generation"
+
+
+def shared_cache() -> bool:
+    """Whether the default cache is shared by all workers (LIBRARY_SHARED_CACHE; default: not LocMem/Dummy)."""
+    configured = getattr(settings, "LIBRARY_SHARED_CACHE", None)
+    if configured is not None:
+        return bool(configured)
+    backend = settings.CACHES["default"]["BACKEND"]
+    return not backend.endswith(("LocMemCache", "DummyCache"))
+
+
+def get_generation(key: str) -> int:
+    """Current value of a generation counter; seeded from the clock so it never rewinds after eviction."""
+    gen = cache.get(key)
+    if gen is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        gen = cache.get(key, 0)
+    return int(gen)
+
+
+def bump_generation(key: str) -> int:
+    """Advance a generation counter (and its change time). Returns the new value."""
+    cache.set(f"{key}:at", time.time(), timeout=None)
+    try:
+        return int(cache.incr(key))
+    except ValueError:
+        get_generation(key)
+        return int(cache.incr(key))
+
+
+def get_generation_time(key: str) -> float:
+    """Unix time of the last bump (seeded to now if unknown, e.g. after eviction)."""
+    cache.add(f"{key}:at", time.time(), timeout=None)
+    return float(cache.get(f"{key}:at") or time.time())
+
+
+def get_catalog_generation() -> int:
+    return get_generation(CATALOG_GENERATION_KEY)
+
+
+def get_catalog_modified() -> float:
+    return get_generation_time(CATALOG_GENERATION_KEY)
+
+
+def bump_catalog_generation() -> int:
+    """Mark the catalog as changed (book saved/deleted, bulk import)."""
+    return bump_generation(CATALOG_GENERATION_KEY)
+
+
+def get_transaction_generation() -> int:
+    return get_generation(TRANSACTION_GENERATION_KEY)
+
+
+def bump_transaction_generation() -> int:
+    """Mark circulation as changed (BookTransaction saved)."""
+    return bump_generation(TRANSACTION_GENERATION_KEY)
+
+
+def get_suggest_generation() -> int:
+    return get_generation(SUGGEST_GENERATION_KEY)
+
+
+def bump_suggest_generation() -> int:
+    """Mark a suggested field (title, author, book_code, is_active) as changed; see library/suggest.py."""
+    return bump_generation(SUGGEST_GENERATION_KEY)
+
+
+def generation_cache_key(namespace: str, *parts) -> str:
+    """Cache key that goes stale on the next catalog or circulation change."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f"{namespace}:{get_catalog_generation()}:{get_transaction_generation()}:{digest}"
+
+# ----------------------------------------------------------------------
+# Bulk import jobs (library/import_jobs.py) and the cover index (library/cover_index.py)
+# ----------------------------------------------------------------------
+def run_book_import(task_id: str, user_id: int, upload_path: str, images_path: str = None,
+                    mode: str = "insert", force: bool = False, dry_run: bool = False):
+    from .import_jobs import run_import_job
+
+    return run_import_job(task_id, user_id, upload_path, images_path, mode, force, dry_run)
+
+
+def refresh_cover_index(isbns=None):
+    from .cover_index import refresh
+
+    return refresh(isbns)
+
+
+if CELERY_AVAILABLE:
+    run_book_import = shared_task(name="library.tasks.run_book_import")(run_book_import)
+    refresh_cover_index = shared_task(name="library.tasks.refresh_cover_index")(refresh_cover_index)
@@ -1,11 +1,14 @@
 # tests/test_api_rules.py
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APITestCase, APITransactionTestCase, APIClient
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from library.models import Book, BookTransaction
 
 User = get_user_model()
 
 
+# One test process: its LocMemCache is shared by every request (tasks.shared_cache)
+@override_settings(LIBRARY_SHARED_CACHE=True)
 class LibraryAPIBusinessRuleTests(APITestCase):
     """Ensures API endpoints enforce the same R1–R8 rules as models."""
 
@@ -86,6 +89,414 @@ class LibraryAPIBusinessRuleTests(APITestCase):
         self.assertIn("results", response.data)
         self.assertGreaterEqual(response.data["count"], 3)
 
+    def test_transaction_history_cursor_pages_walk_both_ways(self):
+        for _ in range(3):
+            self.book.mark_issued(member=self.member, actor=self.admin)
+            self.book.mark_returned(actor=self.admin)
+        expected = list(
+            BookTransaction.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(len(expected), 6)
+
+        seen, url, params = [], "/api/v1/admin/transactions/all/", {"cursor": "", "page_size": 4}
+        response = self.client.get(url, params)
+        self.assertEqual(set(response.data), {"count", "next", "previous", "results"})
+        self.assertIsNone(response.data["count"])
+        self.assertIsNone(response.data["previous"])
+        seen += [r["id"] for r in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        seen += [r["id"] for r in response.data["results"]]
+        self.assertEqual(seen, expected)
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([r["id"] for r in response.data["results"]], expected[:4])
+
+        # Member-scoped history and page-number mode are unchanged
+        self.client.force_authenticate(self.member)
+        response = self.client.get("/api/v1/library/user/transactions/", {"cursor": "", "page_size": 5})
+        self.assertEqual([r["id"] for r in response.data["results"]], expected[:5])
+        response = self.client.get("/api/v1/library/user/transactions/")
+        self.assertEqual(response.data["count"], 6)
+        response = self.client.get("/api/v1/library/user/transactions/", {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_book_list_count_is_cached_until_catalog_changes(self):
+        url = "/api/v1/library/books/"
+        first = self.client.get(url, {"status": "avail"})
+        self.assertEqual(first.data["count"], 1)
+        self.assertNotIn("count_approximate", first.data)
+        with self.assertNumQueries(1):  # page only, no COUNT(*)
+            self.client.get(url, {"status": "avail"})
+
+        Book.objects.create(title="Another", author="Auth", isbn="CC01", category="Tech", shelf_location="S1")
+        self.assertEqual(self.client.get(url, {"status": "avail"}).data["count"], 2)
+
+    @override_settings(LIBRARY_SHARED_CACHE=False)
+    def test_book_list_count_not_cached_without_shared_cache(self):
+        url = "/api/v1/library/books/"
+        self.client.get(url, {"status": "avail"})
+        with self.assertNumQueries(2):  # COUNT(*) + page: other workers' writes would not invalidate a cached count
+            response = self.client.get(url, {"status": "avail"})
+        self.assertEqual(response.data["count"], 1)
+
+    def test_unfiltered_history_uses_planner_estimate(self):
+        from unittest import mock
+        self.book.mark_issued(member=self.member, actor=self.admin)
+        with mock.patch("library.pagination.estimate_count", return_value=250000):
+            response = self.client.get("/api/v1/admin/transactions/all/")
+        self.assertEqual(response.data["count"], 250000)
+        self.assertTrue(response.data["count_approximate"])
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_public_books_facets_in_one_cached_query(self):
+        for idx, (category, language) in enumerate([("Tech", "English"), ("Tech", "Kannada"), ("Maths", "English")]):
+            Book.objects.create(title=f"Facet {idx}", author="Auth", isbn=f"FC{idx}", category=category,
+                                language=language, shelf_location="S1")
+        params = {"q": "facet", "facets": "category,language"}
+        with self.assertNumQueries(3):  # count + page + one grouped facet query
+            response = self.client.get("/api/v1/public/books/", params)
+        self.assertEqual(set(response.data["facets"]), {"category", "language"})
+        self.assertEqual(response.data["facets"]["category"],
+                         [{"value": "Tech", "count": 2}, {"value": "Maths", "count": 1}])
+        self.assertEqual(response.data["facets"]["language"][0], {"value": "English", "count": 2})
+        with self.assertNumQueries(1):  # new page size: page only; count and facets cached
+            self.client.get("/api/v1/public/books/", {**params, "page_size": 2})
+
+        response = self.client.get("/api/v1/library/books/", {"facets": "1"})
+        self.assertEqual(sum(f["count"] for f in response.data["facets"]["status"]), 4)
+        self.assertNotIn("facets", self.client.get("/api/v1/public/books/").data)
+
+    def test_public_catalog_conditional_get(self):
+        self.client.force_authenticate(None)
+        for url in ("/api/v1/public/books/", "/api/v1/public/meta/"):
+            response = self.client.get(url, {"category": "Tech"})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("public", response["Cache-Control"])
+            self.assertIn("s-maxage=60", response["Cache-Control"])
+            etag, last_modified = response["ETag"], response["Last-Modified"]
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, {"category": "Tech"}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            response = self.client.get(url, {"category": "Tech"}, HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 304)
+            # Different query → different representation
+            response = self.client.get(url, {"category": "Maths"}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+        etag = self.client.get("/api/v1/public/books/")["ETag"]
+        self.book.title = "Renamed"
+        self.book.save()
+        response = self.client.get("/api/v1/public/books/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(LIBRARY_SHARED_CACHE=False)
+    def test_public_catalog_sends_no_validators_without_shared_cache(self):
+        self.client.force_authenticate(None)
+        response = self.client.get("/api/v1/public/books/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+        response = self.client.get("/api/v1/public/books/", HTTP_IF_NONE_MATCH='"stale"',
+                                   HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+
+    def test_meta_and_category_filter_use_category_dictionary(self):
+        Book.objects.create(title="Inactive", author="A", isbn="B90", category="Maths",
+                            shelf_location="S9", is_active=False)
+        self.client.force_authenticate(None)
+        with self.assertNumQueries(1):  # one read of the small dictionary table, no DISTINCT scan
+            response = self.client.get("/api/v1/public/meta/")
+        self.assertEqual(response.data["categories"], ["Maths", "Tech"])
+        self.assertEqual(response.data["category_counts"],
+                         [{"name": "Maths", "count": 0}, {"name": "Tech", "count": 1}])
+
+        response = self.client.get("/api/v1/public/books/", {"category": "tech"})
+        self.assertEqual([b["title"] for b in response.data["results"]], ["API Rule"])
+
+    def test_book_list_sparse_fieldsets_project_columns(self):
+        self.book.mark_issued(member=self.member, actor=self.admin)
+        url = "/api/v1/library/books/"
+        response = self.client.get(url, {"fields": "title,issued_to_name,cover_url"})
+        self.assertEqual(response.status_code, 200)
+        row = response.data["results"][0]
+        self.assertEqual(set(row), {"title", "issued_to_name", "cover_url"})
+        self.assertEqual(row["issued_to_name"], "member")
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, {"fields": "id,title"})
+        page_sql = ctx.captured_queries[-1]["sql"]
+        self.assertIn('"title"', page_sql)
+        self.assertNotIn('"description"', page_sql)
+
+        row = self.client.get(url, {"omit": "description,remarks,keywords"}).data["results"][0]
+        self.assertNotIn("description", row)
+        self.assertIn("subtitle", row)
+        self.assertEqual(self.client.get(url, {"fields": "title,nope"}).status_code, 400)
+
+    def _workbook(self, rows):
+        import io
+        import openpyxl
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["title", "author", "isbn", "category", "shelf_location"])
+        for row in rows:
+            ws.append(row)
+        buf = io.BytesIO()
+        wb.save(buf)
+        buf.seek(0)
+        buf.name = "books.xlsx"
+        return buf
+
+    def test_bulk_upload_job_streams_batches_and_reports_errors(self):
+        from library.models import Category
+        rows = [(f"Imported {i}", "Writer", f"IMP{i}", "Imported", "R1") for i in range(60)]
+        rows.insert(10, ("No Author", None, "IMPX", "Imported", "R1"))
+        rows.insert(20, (None, None, None, None, None))  # blank rows are skipped
+        with override_settings(LIBRARY_IMPORT_ASYNC=False, LIBRARY_IMPORT_BATCH_SIZE=7, LIBRARY_IMPORT_BATCH_MIN=5):
+            response = self.client.post(
+                "/api/v1/library/books/bulk-upload/", {"file": self._workbook(rows)}, format="multipart"
+            )
+        self.assertEqual(response.status_code, 202)
+        task_id = response.data["task_id"]
+
+        status = self.client.get(response.data["status_url"]).json()
+        self.assertEqual((status["status"], status["progress"], status["ready"]), ("COMPLETED", 100, True))
+        result = status["result"]
+        self.assertEqual((result["created"], result["failed"]), (60, 1))
+        self.assertEqual(result["errors"][0]["row"], 12)
+        self.assertIn("author", result["errors"][0]["message"])
+
+        report = self.client.get(result["errors_url"])
+        self.assertEqual(report.status_code, 200)
+        lines = b"".join(report.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "row,message")
+        self.assertTrue(lines[1].startswith("12,"))
+        self.assertEqual(self.client.get(f"/api/v1/library/books/bulk-upload/{task_id}x/errors/").status_code, 404)
+
+        books = Book.objects.filter(category="Imported")
+        self.assertEqual(books.count(), 60)
+        self.assertFalse(books.exclude(book_code__startswith="ILAS-").exists())
+        self.assertEqual(Category.objects.get(name="Imported").book_count, 60)
+
+    def test_task_status_is_admin_only_and_reads_the_job_status_file(self):
+        from django.core.cache import cache
+        rows = [("Status One", "Writer", "ST1", "Status", "R1")]
+        with override_settings(LIBRARY_IMPORT_ASYNC=False, LIBRARY_SHARED_CACHE=False):
+            response = self.client.post(
+                "/api/v1/library/books/bulk-upload/", {"file": self._workbook(rows)}, format="multipart"
+            )
+            status_url = response.data["status_url"]
+            cache.clear()  # another worker's LocMemCache: only status.json is left
+            status = self.client.get(status_url).json()
+            self.assertEqual((status["status"], status["result"]["created"]), ("COMPLETED", 1))
+
+        self.assertEqual(self.client.get("/api/tasks/status/ilas_catalog_generation/").status_code, 404)
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get(status_url).status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.get(status_url).status_code, (401, 403))
+
+    def test_bulk_upload_accepts_csv_and_json_lines(self):
+        import io
+        csv_file = io.BytesIO(
+            "\ufeffTitle , AUTHOR,isbn,category,shelf_location\n"
+            "CSV One,Writer,CSV1,Csv,R1\n"
+            "CSV Two,,CSV2,Csv,R1\n".encode()
+        )
+        csv_file.name = "books.csv"
+        jsonl_file = io.BytesIO(
+            b'{"Title": "JSON One", "author": "Writer", "isbn": "JS1", "category": "Json", "shelf_location": "R2"}\n'
+            b"\n"
+            b"{not json\n"
+            b'{"title": "JSON Two", "author": "Writer", "isbn": "JS2", "category": "Json", "shelf_location": "R2"}\n'
+        )
+        jsonl_file.name = "books.jsonl"
+
+        results = []
+        with override_settings(LIBRARY_IMPORT_ASYNC=False):
+            for upload in (csv_file, jsonl_file):
+                response = self.client.post("/api/v1/library/books/bulk-upload/", {"file": upload}, format="multipart")
+                self.assertEqual(response.status_code, 202)
+                results.append(response.data["result"])
+
+        self.assertEqual((results[0]["created"], results[0]["failed"]), (1, 1))
+        self.assertEqual(results[0]["errors"][0]["row"], 3)
+        self.assertIn("author", results[0]["errors"][0]["message"])
+        self.assertEqual((results[1]["created"], results[1]["failed"]), (2, 1))
+        self.assertEqual(results[1]["errors"][0]["row"], 3)
+        self.assertIn("Invalid JSON", results[1]["errors"][0]["message"])
+        self.assertTrue(Book.objects.filter(title="CSV One", category="Csv").exists())
+        self.assertEqual(Book.objects.filter(category="Json").count(), 2)
+
+    def test_bulk_upload_upsert_matches_isbn_and_accession(self):
+        import io
+        from library.models import Category
+
+        def upload(text, **extra):
+            f = io.BytesIO(text.encode())
+            f.name = "sync.csv"
+            with override_settings(LIBRARY_IMPORT_ASYNC=False):
+                response = self.client.post(
+                    "/api/v1/library/books/bulk-upload/", {"file": f, "mode": "upsert", **extra}, format="multipart"
+                )
+            self.assertEqual(response.status_code, 202)
+            return response.data["result"]
+
+        header = "title,author,isbn,category,shelf_location,accession_no\n"
+        first = header + "Sync A,W,978-1,SyncCat,R1,AC-1\nSync B,W,978-2,SyncCat,R1,AC-2\nSync C,W,978-3,SyncCat,R1,\n"
+        result = upload(first)
+        self.assertEqual((result["created"], result["updated"], result["unchanged"]), (3, 0, 0))
+
+        # Same bytes again: recognised by content hash, nothing touched
+        result = upload(first)
+        self.assertEqual((result["created"], result["unchanged"]), (0, 3))
+        self.assertIn("already_imported_at", result)
+
+        corrected = header + "Sync A2,W,9781,Moved,R1,ac-1\nSync B,W,978-2,SyncCat,R1,AC-2\nSync D,W,978-4,SyncCat,R1,AC-4\n"
+        result = upload(corrected)
+        self.assertEqual((result["created"], result["updated"], result["unchanged"], result["failed"]), (1, 1, 1, 0))
+        self.assertEqual(Book.objects.filter(accession_no__in=["AC-1", "ac-1"]).count(), 1)
+        self.assertEqual(Book.objects.get(isbn="9781").title, "Sync A2")
+        self.assertEqual(Category.objects.get(name="Moved").book_count, 1)
+        self.assertEqual(Category.objects.get(name="SyncCat").book_count, 3)
+
+        result = upload(corrected, force="1")
+        self.assertEqual((result["created"], result["updated"], result["unchanged"]), (0, 0, 3))
+
+    def test_batch_circulation_issues_and_returns_in_one_transaction(self):
+        from library.models import AuditLog, MemberCirculation
+        books = [self.book] + [
+            Book.objects.create(title=f"Desk {i}", author="Auth", isbn=f"DK{i}", category="Tech", shelf_location="S1")
+            for i in range(3)
+        ]
+        ids = [b.id for b in books]
+        url = "/api/v1/admin/transactions/batch/"
+
+        with override_settings(LIBRARY_MAX_ACTIVE_LOANS=3):
+            r = self.client.post(url, {"action": "issue", "member_id": self.member.id, "book_ids": ids}, format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("max active loans (3)", r.data["detail"])
+        self.assertFalse(BookTransaction.objects.exists())
+
+        # member, lock, held check, loan limit (summary UPDATE), txn INSERT, book UPDATE, audit INSERT + savepoint/release
+        with self.assertNumQueries(9):
+            r = self.client.post(url, {"action": "issue", "member_id": self.member.id, "book_ids": ids}, format="json")
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(len(r.data["transactions"]), 4)
+        self.assertEqual(Book.objects.filter(id__in=ids, status=Book.STATUS_ISSUED, issued_to=self.member).count(), 4)
+        self.assertEqual(AuditLog.objects.filter(action=AuditLog.ACTION_BOOK_ISSUE).count(), 4)
+
+        r = self.client.post(url, {"action": "issue", "member_id": self.member.id, "book_ids": ids[:1]}, format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn(self.book.book_code, r.data["detail"])
+
+        r = self.client.post(url, {"action": "return", "member_id": self.member.id, "book_ids": ids}, format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["total_fine"], "0.00")
+        self.assertFalse(BookTransaction.objects.filter(is_active=True).exists())
+        self.assertEqual(BookTransaction.objects.filter(txn_type=BookTransaction.TYPE_RETURN).count(), 4)
+        self.assertEqual(Book.objects.filter(id__in=ids, status=Book.STATUS_AVAILABLE, issued_to=None).count(), 4)
+        summary = MemberCirculation.objects.get(member=self.member)
+        self.assertEqual((summary.active_loans, summary.returned_count), (0, 4))
+
+    def test_member_summary_serves_user_search_and_dashboard(self):
+        from datetime import timedelta
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+        for i in range(4):
+            User.objects.create_user(username=f"reader{i}", email=f"reader{i}@a.com", password="pass")
+        other = Book.objects.create(title="Late", author="Auth", isbn="B02", category="Tech", shelf_location="S1")
+        self.book.mark_issued(member=self.member, actor=self.admin)
+        late = other.mark_issued(member=self.member, actor=self.admin)
+        BookTransaction.objects.filter(pk=late.pk).update(due_date=timezone.now() - timedelta(days=3))
+        # the due date moved outside the circulation code: recount this member
+        from library.member_summary import rebuild
+        rebuild([self.member.pk])
+
+        url = "/api/v1/admin/ajax/user-search/"
+        with CaptureQueriesContext(connection) as one:
+            r = self.client.get(url, {"q": "member"})
+        self.assertEqual(r.data["results"][0]["borrow_count"], 2)
+        with CaptureQueriesContext(connection) as many:
+            r = self.client.get(url, {"q": "@a.com"})
+        self.assertEqual(len(r.data["results"]), 6)
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
+
+        self.client.force_authenticate(self.member)
+        r = self.client.get("/api/v1/library/user/dashboard/")
+        self.assertEqual((r.data["active_count"], r.data["overdue_count"], r.data["returned_count"]), (2, 1, 0))
+
+        self.book.mark_returned(actor=self.member)
+        r = self.client.get("/api/v1/library/user/dashboard/")
+        self.assertEqual((r.data["active_count"], r.data["overdue_count"], r.data["returned_count"]), (1, 1, 1))
+
+    def test_bulk_upload_dry_run_reports_without_writing(self):
+        import io
+        Book.objects.create(title="Held", author="W", isbn="978-7", category="Dry", shelf_location="R1",
+                            accession_no="AC-7")
+        f = io.BytesIO(
+            "title,author,isbn,category,shelf_location,accession_no,colour\n"
+            "Dry A,W,978-5,Dry,R1,AC-5,red\n"
+            "Dry B,,978-6,Dry,R1,AC-6,\n"
+            "Dry C,W,9785,Dry,R1,ac-5,\n"
+            "Held again,W,9787,Dry,R1,AC-7,\n".encode()
+        )
+        f.name = "check.csv"
+        with override_settings(LIBRARY_IMPORT_ASYNC=False):
+            response = self.client.post("/api/v1/library/books/bulk-upload/validate/", {"file": f}, format="multipart")
+        self.assertEqual(response.status_code, 202)
+        result = response.data["result"]
+        self.assertTrue(result["dry_run"])
+        self.assertEqual(result["header_problems"], ["Unknown column(s), ignored: colour"])
+        self.assertEqual((result["created"], result["failed"]), (1, 3))
+
+        report = self.client.get(result["errors_url"])
+        lines = b"".join(report.streaming_content).decode().splitlines()
+        self.assertEqual(lines[1], "1,\"Unknown column(s), ignored: colour\"")
+        self.assertTrue(lines[2].startswith("3,author"))
+        self.assertEqual(lines[3], "4,Duplicate of row 2 (same ISBN and accession number)")
+        self.assertTrue(lines[4].startswith("5,Already in the catalog as ILAS-"))
+        self.assertEqual(Book.objects.filter(category="Dry").count(), 1)
+
+    def test_bulk_upload_rejects_unreadable_file_up_front(self):
+        import io
+        bad = io.BytesIO(b"not a workbook")
+        bad.name = "books.xlsx"
+        response = self.client.post("/api/v1/library/books/bulk-upload/", {"file": bad}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Excel parsing error", response.data["detail"])
+
+    def test_public_books_page_bytes_cached_per_generation(self):
+        from unittest import mock
+        self.client.force_authenticate(None)
+        url, params = "/api/v1/public/books/", {"category": "Tech", "page_size": 5}
+        first = self.client.get(url, params)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0), \
+                mock.patch("library.views.PublicBookSerializer.to_representation") as serialize:
+            repeat = self.client.get(url, params)
+        serialize.assert_not_called()
+        self.assertEqual(repeat.content, first.content)
+        self.assertEqual(repeat["Content-Type"], "application/json")
+
+        self.book.title = "Fresh Title"
+        self.book.save()
+        self.assertEqual(self.client.get(url, params).json()["results"][0]["title"], "Fresh Title")
+
+        with override_settings(LIBRARY_SHARED_CACHE=False), \
+                mock.patch("library.views.cache_page_response") as store:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        store.assert_not_called()
+
     def test_admin_ajax_search_endpoints_paginated(self):
         response = self.client.get("/api/v1/admin/ajax/book-search/", {"q": "API"})
         self.assertEqual(response.status_code, 200)
@@ -93,4 +504,112 @@ class LibraryAPIBusinessRuleTests(APITestCase):
 
         response = self.client.get("/api/v1/admin/ajax/user-search/", {"q": "admin"})
         self.assertEqual(response.status_code, 200)
-        self.assertIn("results", response.data)
\ No newline at end of file
+        self.assertIn("results", response.data)
+
+    def test_admin_ajax_fuzzy_search_tolerates_typos(self):
+        Book.objects.create(
+            title="Python Programming", author="Guido", isbn="FZ001", category="Tech", shelf_location="S1"
+        )
+        response = self.client.get("/api/v1/admin/ajax/book-search/", {"q": "Pyhton", "mode": "fuzzy"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["mode"], "fuzzy")
+        self.assertEqual(response.data["results"][0]["title"], "Python Programming")
+        self.assertGreater(response.data["results"][0]["similarity"], 0)
+
+        self.member.unique_id = "1DA21CS045"
+        self.member.save()
+        response = self.client.get("/api/v1/admin/ajax/user-search/", {"q": "1DA21C", "mode": "fuzzy"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["username"], "member")
+        self.assertEqual(response.data["results"][0]["borrow_count"], 0)
+
+    def test_public_suggest_is_served_from_memory(self):
+        from library import suggest
+        Book.objects.create(
+            title="Digital Signal Processing", author="Proakis", isbn="SG101", category="Tech", shelf_location="S1"
+        )
+        suggest.rebuild()
+        self.client.force_authenticate(None)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/public/books/suggest/", {"q": "signal pro"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["text"], "Digital Signal Processing")
+        self.assertEqual(response.data["results"][0]["field"], "title")
+
+
+# Covers are queued from transaction.on_commit: these imports must really commit
+@override_settings(LIBRARY_SHARED_CACHE=True)
+class BulkUploadCoverTests(APITransactionTestCase):
+    _workbook = LibraryAPIBusinessRuleTests._workbook
+
+    def setUp(self):
+        import tempfile
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(username="admin", email="admin@a.com", password="pass", is_staff=True)
+        )
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = media.name
+        settings = override_settings(
+            MEDIA_ROOT=self.media, LIBRARY_IMPORT_ASYNC=False, LIBRARY_IMPORT_BATCH_SIZE=10,
+            LIBRARY_COVER_STORAGE="library.covers.LocalCoverStorage", LIBRARY_COVER_UPLOAD_WORKERS=3,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _upload(self):
+        import io
+        import zipfile
+        from PIL import Image
+
+        photo = io.BytesIO()
+        Image.new("RGB", (1600, 1200), (200, 30, 30)).save(photo, "JPEG")
+        rows = [(f"Shipment {i}", "Writer", f"SHP{i}", "Shipment", "R9") for i in range(45)]
+        images = io.BytesIO()
+        with zipfile.ZipFile(images, "w") as z:
+            for i in range(40):  # five books come without a photo
+                z.writestr(f"covers/SHP{i}.jpg", photo.getvalue())
+            z.writestr("covers/SHP41.jpg", b"not an image")
+        images.seek(0)
+        images.name = "covers.zip"
+        response = self.client.post(
+            "/api/v1/library/books/bulk-upload/", {"file": self._workbook(rows), "images": images}, format="multipart",
+        )
+        self.assertEqual(response.status_code, 202)
+        return response.data["result"]
+
+    def _covered(self):
+        return Book.objects.filter(category="Shipment").exclude(cover_image__isnull=True).exclude(cover_image="")
+
+    def test_bulk_upload_with_covers_zip_uploads_concurrently(self):
+        import os
+        from PIL import Image
+
+        result = self._upload()
+        self.assertEqual((result["created"], result["failed"]), (45, 0))
+        self.assertEqual([e["message"] for e in result["errors"]], ["Book created, image upload failed"])
+
+        covered = self._covered()
+        self.assertEqual(covered.count(), 40)
+        book = covered.get(isbn="SHP3")
+        self.assertEqual(book.cover_thumbnail, f"covers/{book.book_code}_thumb.jpg")
+        with Image.open(os.path.join(self.media, book.cover_thumbnail)) as thumb:
+            self.assertEqual(thumb.size, (200, 150))
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "covers"))), 80)
+        listed = self.client.get("/api/v1/library/books/", {"search": "SHP3", "fields": "isbn,cover_thumb_url"})
+        row = next(r for r in listed.data["results"] if r["isbn"] == "SHP3")
+        self.assertTrue(row["cover_thumb_url"].endswith(book.cover_thumbnail))
+
+    def test_rolled_back_batch_uploads_no_covers(self):
+        import os
+        from unittest import mock
+        from library import importer
+
+        # The first batch (rows 2–11) fails after its bulk_create and is rolled back
+        failing = mock.Mock(side_effect=[RuntimeError("boom"), None])
+        with mock.patch.object(importer, "books_added", failing):
+            result = self._upload()
+        self.assertEqual((result["created"], result["failed"]), (35, 10))
+        self.assertEqual(self._covered().count(), 30)
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "covers"))), 60)
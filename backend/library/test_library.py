@@ -211,3 +211,454 @@ class LibraryModelBusinessRuleTests(TestCase):
         self.book.mark_issued(member=self.member, actor=self.admin)
         with self.assertRaises(ValueError):
             self.book.mark_issued(member=self.member, actor=self.admin)
+
+    # -------------------------------
+    # CIRCULATION QUERY BUDGET
+    # -------------------------------
+    def test_issue_and_return_run_in_a_fixed_number_of_queries(self):
+        """
+        Issue: savepoint, book lock + active-issue flag, member summary UPDATE, INSERT, audit, book UPDATE, release.
+        Return: savepoint, issue lock, issue UPDATE, INSERT, audit, book UPDATE, member summary UPDATE, release.
+        """
+        with self.assertNumQueries(7):
+            txn = self.book.mark_issued(member=self.member, actor=self.admin)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.status, Book.STATUS_ISSUED)
+        self.assertEqual(self.book.issued_to, self.member)
+        self.assertTrue(AuditLog.objects.filter(action=AuditLog.ACTION_BOOK_ISSUE, target_id=str(txn.pk)).exists())
+
+        with self.assertNumQueries(8):
+            ret = self.book.mark_returned(actor=self.admin, returned_by=self.member)
+        txn.refresh_from_db()
+        self.book.refresh_from_db()
+        self.assertFalse(txn.is_active)
+        self.assertEqual(ret.member, self.member)
+        self.assertEqual(self.book.status, Book.STATUS_AVAILABLE)
+        self.assertIsNone(self.book.issued_to)
+
+    def test_issue_decides_on_the_locked_row(self):
+        """A stale in-memory status does not let a lost book be issued."""
+        Book.objects.filter(pk=self.book.pk).update(status=Book.STATUS_LOST)
+        with self.assertRaises(ValueError):
+            self.book.mark_issued(member=self.member, actor=self.admin)
+        self.assertFalse(BookTransaction.objects.filter(book=self.book).exists())
+
+    @override_settings(LIBRARY_MAX_ACTIVE_LOANS=1)
+    def test_issue_enforces_the_loan_limit(self):
+        other = Book.objects.create(title="Other", author="T1", isbn="R002", category="Fiction", shelf_location="A1")
+        other.mark_issued(member=self.member, actor=self.admin)
+        with self.assertRaisesMessage(ValueError, "max active loans (1)"):
+            self.book.mark_issued(member=self.member, actor=self.admin)
+
+    def test_member_summary_follows_circulation_and_reconciles(self):
+        from library.member_summary import rebuild
+        from library.models import MemberCirculation
+        txn = self.book.mark_issued(member=self.member, actor=self.admin)
+        summary = MemberCirculation.objects.get(member=self.member)
+        self.assertEqual((summary.active_loans, summary.next_due_date), (1, txn.due_date))
+
+        BookTransaction.objects.filter(pk=txn.pk).update(due_date=timezone.now() - timedelta(days=2))
+        ret = self.book.mark_returned(actor=self.admin)
+        summary.refresh_from_db()
+        self.assertEqual((summary.active_loans, summary.returned_count, summary.next_due_date), (0, 1, None))
+        self.assertGreater(ret.fine_amount, 0)
+        self.assertEqual(summary.unpaid_fines, ret.fine_amount)
+        self.assertEqual(rebuild(), 0)
+
+        MemberCirculation.objects.filter(member=self.member).update(active_loans=3, unpaid_fines=0)
+        MemberCirculation.objects.filter(member=self.admin).delete()
+        self.assertEqual(rebuild(), 1)
+        summary.refresh_from_db()
+        self.assertEqual((summary.active_loans, summary.unpaid_fines), (0, ret.fine_amount))
+        self.assertEqual(rebuild([self.admin.pk]), 1)  # member without a row: created on demand
+        self.assertEqual(MemberCirculation.objects.get(member=self.admin).active_loans, 0)
+
+
+class CatalogSearchTests(TestCase):
+    """Full-text catalog search (FTS5 on SQLite / tsvector on PostgreSQL)."""
+
+    def setUp(self):
+        self.python = Book.objects.create(
+            title="Python Programming", author="Guido Rossum", isbn="978-0-13-468599-1",
+            category="Computers", shelf_location="C1",
+        )
+        self.networks = Book.objects.create(
+            title="Computer Networks", author="Andrew Tanenbaum", isbn="978-0-13-212695-3",
+            category="Computers", shelf_location="C2", keywords="python sockets",
+        )
+
+    def test_prefix_terms_match_and_rank_title_first(self):
+        from library.search import search_books
+        results = list(search_books(Book.objects.all(), "pyth"))
+        self.assertEqual(results, [self.python, self.networks])
+
+    def test_all_terms_required(self):
+        from library.search import search_books
+        results = list(search_books(Book.objects.all(), "computer tanen"))
+        self.assertEqual(results, [self.networks])
+
+    def test_isbn_matches_without_hyphens(self):
+        from library.search import search_books
+        results = list(search_books(Book.objects.all(), "9780134685991"))
+        self.assertEqual(results, [self.python])
+
+    def test_index_follows_updates_deletes_and_bulk_create(self):
+        from library.search import search_books
+        self.python.title = "Fluent Snakes"
+        self.python.save()
+        self.assertEqual(list(search_books(Book.objects.all(), "fluent")), [self.python])
+
+        self.networks.delete()
+        self.assertFalse(search_books(Book.objects.all(), "tanenbaum").exists())
+
+        Book.objects.bulk_create([
+            Book(title="Bulk Loaded", author="Batch", isbn="X1", category="Misc",
+                 shelf_location="Z", book_code="BULK-1"),
+        ])
+        self.assertEqual(search_books(Book.objects.all(), "bulk-1").count(), 1)
+
+    def test_punctuation_only_query_returns_nothing(self):
+        from library.search import search_books
+        self.assertFalse(search_books(Book.objects.all(), "--").exists())
+
+
+class SuggestIndexTests(TestCase):
+    """In-process type-ahead index (library/suggest.py)."""
+
+    def setUp(self):
+        from library import suggest
+        self.suggest = suggest
+        self.book = Book.objects.create(
+            title="Python Programming", author="Guido Rossum", isbn="SG001", category="Tech", shelf_location="S1"
+        )
+        suggest.rebuild()
+
+    def texts(self, query):
+        return [r["text"] for r in self.suggest.suggest(query)]
+
+    def test_completes_titles_authors_codes_and_inner_words(self):
+        self.assertEqual(self.texts("PYTH"), ["Python Programming"])
+        self.assertEqual(self.texts("prog"), ["Python Programming"])
+        self.assertEqual(self.texts("rossum"), ["Guido Rossum"])
+        self.assertEqual(self.texts(self.book.book_code[:-1]), [self.book.book_code])
+        self.assertEqual(self.texts("zzz"), [])
+
+    def test_signals_keep_index_current(self):
+        other = Book.objects.create(title="Pythonic Café", author="Luciano", isbn="SG002",
+                                    category="Tech", shelf_location="S2")
+        self.assertEqual(self.texts("pyth"), ["Python Programming", "Pythonic Café"])
+        self.assertEqual(self.texts("cafe"), ["Pythonic Café"])
+
+        self.book.title = "Fluent Snakes"
+        self.book.save()
+        self.assertEqual(self.texts("pyth"), ["Pythonic Café"])
+        self.assertEqual(self.texts("fluent")[0], "Fluent Snakes")
+
+        other.delete()
+        self.assertEqual(self.texts("pyth"), [])
+
+    def test_only_suggested_fields_move_the_suggest_generation(self):
+        from library.tasks import get_suggest_generation
+        index = self.suggest.get_index()
+        generation = get_suggest_generation()
+        self.assertEqual(index.generation, generation)
+
+        self.book.status = Book.STATUS_MAINTENANCE
+        self.book.shelf_location = "S2"
+        self.book.save()
+        self.assertEqual(get_suggest_generation(), generation)
+
+        self.book.title = "Python Tricks"
+        self.book.save()
+        self.assertEqual(get_suggest_generation(), generation + 1)
+        self.assertEqual(index.generation, generation + 1)  # applied here: no rebuild pending
+        self.assertEqual(self.texts("trick"), ["Python Tricks"])
+
+    @override_settings(LIBRARY_SUGGEST_REFRESH_SECONDS=0)
+    def test_issue_and_return_leave_the_index_current(self):
+        from unittest import mock
+        from library.tasks import get_suggest_generation
+        admin = User.objects.create_user(username="sg-admin", email="sg-admin@test.com", password="pass", is_staff=True)
+        index = self.suggest.get_index()
+        generation = get_suggest_generation()
+        self.book.mark_issued(member=admin, actor=admin)
+        self.book.mark_returned(actor=admin)
+        self.assertEqual(get_suggest_generation(), generation)
+        self.assertEqual(index.generation, generation)
+        with mock.patch.object(self.suggest.threading, "Thread") as thread:
+            self.assertEqual(self.texts("pyth"), ["Python Programming"])
+        thread.assert_not_called()  # no background rebuild
+
+    @override_settings(LIBRARY_SUGGEST_REFRESH_SECONDS=0)
+    def test_batch_circulation_leaves_the_index_current(self):
+        from unittest import mock
+        from library.circulation import issue_books, return_books
+        from library.tasks import get_suggest_generation
+        member = User.objects.create_user(username="sg-member", email="sg-member@test.com", password="pass")
+        index = self.suggest.get_index()
+        generation = get_suggest_generation()
+        issue_books(member, [self.book.pk])
+        return_books(member, [self.book.pk], actor=member)
+        self.assertEqual(get_suggest_generation(), generation)
+        self.assertEqual(index.generation, generation)
+        with mock.patch.object(self.suggest.threading, "Thread") as thread:
+            self.assertEqual(self.texts("pyth"), ["Python Programming"])
+        thread.assert_not_called()  # no background rebuild
+
+    def test_rebuild_replays_changes_seen_during_load(self):
+        def rows():
+            yield (self.book.pk, self.book.title, self.book.author, self.book.book_code)
+            self.suggest.book_deleted(self.book.pk)  # concurrent delete while loading
+        index = self.suggest.rebuild(rows())
+        self.assertEqual(index.suggest("pyth"), [])
+
+
+class CategoryDictionaryTests(TestCase):
+    """Category counts maintained by the Book signals (library/categories.py)."""
+
+    def counts(self):
+        from library.models import Category
+        return {c.name: (c.book_count, c.active_count) for c in Category.objects.all()}
+
+    def test_counts_follow_create_edit_deactivate_delete_and_bulk(self):
+        from library.categories import books_added, rebuild
+        book = Book.objects.create(title="A", author="X", isbn="CD001", category="Physics", shelf_location="P1")
+        Book.objects.create(title="B", author="Y", isbn="CD002", category="Physics", shelf_location="P2")
+        self.assertEqual(self.counts(), {"Physics": (2, 2)})
+
+        book = Book.objects.get(pk=book.pk)
+        book.category = "Chemistry"
+        book.save()
+        book.is_active = False
+        book.save()
+        self.assertEqual(self.counts(), {"Physics": (1, 1), "Chemistry": (1, 0)})
+
+        with self.assertNumQueries(0):
+            from library.categories import book_saved
+            book_saved(book, created=False)  # nothing changed since the last save
+
+        book.delete()
+        self.assertEqual(self.counts(), {"Physics": (1, 1), "Chemistry": (0, 0)})
+
+        objs = Book.objects.bulk_create([
+            Book(title="C", author="Z", isbn="CD003", category="Maths", shelf_location="M1", book_code="CD-3"),
+        ])
+        books_added(objs)
+        self.assertEqual(self.counts()["Maths"], (1, 1))
+
+        rebuild()
+        self.assertEqual(self.counts(), {"Physics": (1, 1), "Maths": (1, 1)})
+
+    def test_resolve_matches_stored_names(self):
+        from library.categories import resolve
+        Book.objects.create(title="A", author="X", isbn="CD010", category="Computer Science", shelf_location="C1")
+        self.assertEqual(resolve("computer science"), ["Computer Science"])
+        self.assertEqual(resolve("science", contains=True), ["Computer Science"])
+        self.assertEqual(resolve("science"), [])
+
+
+class BookCodeAllocationTests(TestCase):
+    """Books are inserted once with their final book_code (library/codes.py)."""
+
+    def test_single_create_writes_code_in_the_insert(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            book = Book.objects.create(title="A", author="X", isbn="BC001", category="C", shelf_location="S")
+        book_writes = [q["sql"] for q in ctx.captured_queries
+                       if '"library_book"' in q["sql"] and q["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(len(book_writes), 1)
+        self.assertTrue(book_writes[0].startswith("INSERT"))
+        self.assertRegex(book.book_code, r"^ILAS-ET-\d{4,}$")
+        self.assertEqual(Book.objects.get(pk=book.pk).book_code, book.book_code)
+
+    def test_bulk_create_allocates_increasing_unique_codes(self):
+        first = Book.objects.create(title="A", author="X", isbn="BC002", category="C", shelf_location="S")
+        objs = Book.objects.bulk_create([
+            Book(title=f"B{i}", author="Y", isbn=f"BC1{i}", category="C", shelf_location="S") for i in range(5)
+        ] + [Book(title="Kept", author="Z", isbn="BC2", category="C", shelf_location="S", book_code="OWN-1")])
+        codes = [b.book_code for b in objs]
+        self.assertEqual(codes[-1], "OWN-1")
+        numbers = [int(c.rsplit("-", 1)[1]) for c in codes[:-1]]
+        self.assertEqual(numbers, sorted(set(numbers)))
+        self.assertGreater(numbers[0], int(first.book_code.rsplit("-", 1)[1]))
+
+
+class ImportRowValidatorTests(TestCase):
+    """The compiled validator gives exactly BulkBookImportSerializer's results (library/import_validation.py)."""
+
+    def test_matches_serializer_results_and_messages(self):
+        from library.import_validation import RowValidator, validate_rows
+        from library.serializers import BulkBookImportSerializer
+
+        base = {"title": " T ", "author": "A", "isbn": "978-1", "category": "C", "shelf_location": "S"}
+        rows = [
+            base,
+            {**base, "publication_year": None, "book_cost": None, "subtitle": None, "language": None},
+            {**base, "publication_year": "1999", "book_cost": "12.5", "edition": 2, "remarks": "   "},
+            {**base, "publication_year": "abc"},
+            {**base, "publication_year": 3000, "book_cost": "1.234"},
+            {**base, "title": "x" * 401},
+            {**base, "title": "   "},
+            {**base, "author": None},
+            {k: v for k, v in base.items() if k != "isbn"},
+            {**base, "category": True, "keywords": "a\x00b"},
+            {**base, "shelf_location": 12},
+            {},
+        ]
+        validator = RowValidator()
+        for row in rows:
+            serializer = BulkBookImportSerializer(data=row)
+            expected = (serializer.validated_data, None) if serializer.is_valid() else (None, serializer.errors)
+            self.assertEqual(validator.validate(row), expected, row)
+        self.assertEqual(validate_rows(rows, processes=0), [validator.validate(r) for r in rows])
+
+        data, _ = validator.validate(rows[1])
+        self.assertEqual((data["publication_year"], data["book_cost"], data["subtitle"]), (None, None, ""))
+
+
+class ImportKeyTests(TestCase):
+    """Book.import_key: the ISBN + accession number identity used by upsert imports."""
+
+    def test_first_copy_claims_key_and_edits_follow(self):
+        a = Book.objects.create(title="A", author="X", isbn="978-0-1", category="C", shelf_location="S",
+                                accession_no=" acc-9 ")
+        self.assertEqual(a.import_key, "97801|ACC-9")
+        dup = Book.objects.create(title="A", author="X", isbn="97801", category="C", shelf_location="S",
+                                  accession_no="ACC-9")
+        self.assertIsNone(dup.import_key)
+        bulk = Book.objects.bulk_create([
+            Book(title="B", author="X", isbn="97801", category="C", shelf_location="S", accession_no="ACC-9"),
+            Book(title="B", author="X", isbn="97802", category="C", shelf_location="S", accession_no="ACC-10"),
+            Book(title="B", author="X", isbn="97803", category="C", shelf_location="S"),
+        ])
+        self.assertEqual([b.import_key for b in bulk], [None, "97802|ACC-10", None])
+
+        a = Book.objects.get(pk=a.pk)
+        a.accession_no = "ACC-11"
+        a.save()
+        dup = Book.objects.get(pk=dup.pk)
+        dup.title = "Renamed"
+        dup.save()
+        self.assertEqual(Book.objects.get(pk=a.pk).import_key, "97801|ACC-11")
+        self.assertIsNone(Book.objects.get(pk=dup.pk).import_key)
+
+
+class ImportBisectTests(TestCase):
+    """A row the database rejects is isolated by bisecting its batch; the rest of the batch is kept."""
+
+    def test_failing_row_is_isolated_and_codes_are_not_reused(self):
+        from library.codes import allocate_numbers
+        from library.importer import BookImporter
+
+        user = User.objects.create_user(username="bisect", email="bisect@test.com", password="pass")
+        following = allocate_numbers(1)[0] + 1
+        # The legacy book is given `following`; then it is moved onto the code row 3 will get
+        legacy = Book.objects.create(title="Legacy", author="X", isbn="L1", category="Old", shelf_location="S")
+        Book.objects.filter(pk=legacy.pk).update(book_code=Book.default_book_code(following + 2))
+
+        rows = [
+            (n, {"title": f"Row {n}", "author": "A", "isbn": f"B{n}", "category": "Bisect", "shelf_location": "S"})
+            for n in range(2, 10)
+        ]
+        result = BookImporter(user, batch_size=8).run(rows)
+
+        self.assertEqual((result.created, result.failed), (7, 1))
+        self.assertEqual(result.errors[0]["row"], 3)
+        self.assertTrue(result.errors[0]["message"].startswith("Not saved:"))
+        self.assertFalse(Book.objects.filter(title="Row 3").exists())
+        self.assertEqual(Book.objects.filter(category="Bisect").count(), 7)
+        # The codes handed out before the rollbacks stay used
+        self.assertGreater(allocate_numbers(1)[0], following + 8)
+
+
+class AdminBulkUploadTests(TestCase):
+    """The admin bulk upload page runs the same import jobs as the API."""
+
+    def test_admin_upload_runs_import_job_and_serves_report(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        staff = User.objects.create_superuser(username="staff", email="staff@test.com", password="pass")
+        self.client.force_login(staff)
+        upload = SimpleUploadedFile(
+            "books.csv", b"title,author,isbn,category,shelf_location\nAdm A,W,AD1,AdminCat,R1\nAdm B,,AD2,AdminCat,R1\n"
+        )
+        with override_settings(LIBRARY_IMPORT_ASYNC=False):
+            response = self.client.post("/admin/library/book/bulk-upload/", {"file": upload}, follow=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.context["result"]["created"], response.context["result"]["failed"]), (1, 1))
+        self.assertContains(response, "Failed: 1")
+        self.assertTrue(Book.objects.filter(isbn="AD1", category="AdminCat").exists())
+        self.assertTrue(AuditLog.objects.filter(action=AuditLog.ACTION_BULK_UPLOAD).exists())
+
+        report = self.client.get(f"/admin/library/book/bulk-upload/{response.context['task_id']}/errors/")
+        lines = b"".join(report.streaming_content).decode().splitlines()
+        self.assertTrue(lines[1].startswith("3,author"))
+
+
+class ImageNormalizationTests(TestCase):
+    """Covers and avatars are stored downsized (library/images.py)."""
+
+    def test_cover_variants_and_avatar_are_downsized_jpegs(self):
+        import io
+        from PIL import Image
+        from accounts.serializers import ProfileImageSerializer
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from library.images import cover_variants
+
+        png = io.BytesIO()
+        Image.new("RGBA", (3000, 1500), (0, 128, 0, 0)).save(png, "PNG")
+        cover, thumb = cover_variants(png.getvalue())
+        for data, size in ((cover, (800, 400)), (thumb, (200, 100))):
+            with Image.open(io.BytesIO(data)) as img:
+                self.assertEqual((img.format, img.mode, img.size), ("JPEG", "RGB", size))
+                self.assertEqual(img.getpixel((10, 10)), (255, 255, 255))  # transparency flattened on white
+
+        user = User.objects.create_user(username="avatar", email="avatar@test.com", password="pass")
+        upload = SimpleUploadedFile("me.png", png.getvalue(), content_type="image/png")
+        serializer = ProfileImageSerializer(user, data={"profile_image": upload}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        image = serializer.validated_data["profile_image"]
+        self.assertTrue(image.name.endswith(".jpg"))
+        with Image.open(image) as img:
+            self.assertEqual(img.size, (512, 256))
+
+
+class CoverIndexTests(TestCase):
+    """Cover URLs come from the local cover index, refreshed from Cloudinary in the background."""
+
+    def test_refresh_fills_index_and_serializers_read_it(self):
+        from unittest import mock
+        from django.conf import settings
+        from library import cover_index
+        from library.models import CoverIndex
+        from library.serializers import PublicBookSerializer
+
+        def resources_by_ids(ids):
+            self.assertIn("ilas/book_covers/9780001", ids)
+            return {"resources": [
+                {"public_id": "9780001", "secure_url": "https://img/9780001.jpg"},
+                {"public_id": "ilas/book_covers/9780001", "secure_url": "https://img/folder/9780001.jpg"},
+            ]}
+
+        with mock.patch("cloudinary.api.resources_by_ids", side_effect=resources_by_ids):
+            self.assertEqual(cover_index.refresh(["978-0001", "9780002"]), 2)
+        self.assertEqual(CoverIndex.objects.get(isbn="9780002").public_id, "")
+        self.assertEqual(cover_index.lookup(["978-0001", "9780002"]), {"9780001": "ilas/book_covers/9780001"})
+
+        books = [
+            Book.objects.create(title=f"T{i}", author="A", isbn=isbn, category="C", shelf_location="S")
+            for i, isbn in enumerate(["978-0001", "9780002", "9780003"])
+        ]
+        expected = ["https://img/folder/9780001.jpg", settings.DEFAULT_BOOK_COVER, settings.DEFAULT_BOOK_COVER]
+        with mock.patch.object(cover_index, "schedule_refresh") as schedule, self.assertNumQueries(1):
+            data = PublicBookSerializer(books, many=True).data  # one IN query for the page
+        self.assertEqual([row["cover_url"] for row in data], expected)
+        schedule.assert_called_once_with(["9780003"])  # never checked -> background refresh
+
+        page = cover_index.with_entries(Book.objects.order_by("title"))
+        with mock.patch.object(cover_index, "schedule_refresh") as schedule, self.assertNumQueries(1):
+            data = PublicBookSerializer(page, many=True).data  # entries come with the page query
+        self.assertEqual([row["cover_url"] for row in data], expected)
+        schedule.assert_called_once_with({"9780003"})
@@ -16,11 +16,13 @@ Structure:
     ├── library/books/               → CRUD + bulk upload
     ├── transactions/issue/          → Issue Book
     ├── transactions/return/         → Return Book (validated)
+    ├── transactions/batch/          → Issue / return several books for one member
 /api/v1/admin/
     ├── reports/active-issues/       → Admin Reports
     ├── dashboard/stats/             → Admin Dashboard
 /api/v1/public/
     ├── books/                       → Public catalog
+    ├── books/suggest/?q=            → Type-ahead (in-memory index)
     ├── lookup/<book_code>/          → Barcode lookup
 """
 
@@ -38,6 +40,7 @@ from .views import (
     IssueBookAPIView,
     LibraryMetaAPIView,
     ReturnBookAPIView,
+    BatchCirculationAPIView,
     UpdateBookStatusAPIView,
     MasterReportView,
     TransactionReportView,
@@ -49,6 +52,7 @@ from .views import (
     ActiveTransactionsView,
     AllTransactionsView,
     PublicBookListView,
+    BookSuggestView,
 )
 from .views_reports import (
     ActiveIssuesReport,
@@ -79,6 +83,7 @@ router.register(r"books", BookViewSet, basename="books")
 # ----------------------------------------------------------
 public_patterns = [
     path("books/", PublicBookListView.as_view(), name="public-book-list"),
+    path("books/suggest/", BookSuggestView.as_view(), name="public-book-suggest"),
     path("lookup/<str:book_code>/", BookLookupView.as_view(), name="book-lookup"),
     path("meta/", LibraryMetaAPIView.as_view(), name="library-meta")
 
@@ -91,6 +96,7 @@ admin_patterns = [
     # Transactions
     path("transactions/issue/", IssueBookAPIView.as_view(), name="transaction-issue"),
     path("transactions/return/", ReturnBookAPIView.as_view(), name="transaction-return"),
+    path("transactions/batch/", BatchCirculationAPIView.as_view(), name="transaction-batch"),
     path("transactions/status/", UpdateBookStatusAPIView.as_view(), name="transaction-status"),
 
     # Reports
@@ -15,16 +15,13 @@ import csv
 from unicodedata import category
 import logging
 logger = logging.getLogger(__name__)
-import zipfile
-import openpyxl
 from datetime import datetime, timezone as dt_timezone
 from typing import Optional
 
-from django.http import HttpResponse
-from django.db import transaction
+from django.http import HttpResponse, FileResponse
+from django.urls import reverse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from django.core.files.base import ContentFile
 from django.db.models import Q
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from .permissions import IsAdminOrReadOnly
@@ -39,15 +36,30 @@ from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
 
 from django.contrib.auth import get_user_model
-from .models import Book, BookTransaction, AuditLog, create_audit
+from .models import Book, BookTransaction, MemberCirculation
 from .serializers import (
     BookSerializer,
     BookTransactionSerializer,
     AuditLogSerializer,
-    BulkBookImportSerializer,
     PublicBookSerializer,
 )
-from .pagination import StandardResultsSetPagination, AdminResultsSetPagination
+from .pagination import StandardResultsSetPagination, AdminResultsSetPagination, AdminKeysetResultsSetPagination
+from .search import search_books
+from .facets import facet_counts, requested_facets
+from .http_cache import (
+    conditional_catalog_get,
+    public_page_cache_key,
+    cached_page_response,
+    cache_page_response,
+)
+from .autocomplete import fuzzy_books, fuzzy_members, default_limit as autocomplete_limit
+from . import cover_index
+from . import suggest as suggest_index
+from .tasks import get_task_progress
+from .importer import ImportFileError, ImportLimitError
+from .import_jobs import start_import_job, error_report_path
+from .categories import category_counts, resolve as resolve_categories
+from .circulation import issue_books, return_books
 from .models import BookTransaction  # add at top if not imported
 
 
@@ -124,22 +136,15 @@ class BookViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         qs = self.queryset
 
-        # --- Search Support ---
+        # --- Search Support (full-text, relevance-ordered) ---
         search = request.query_params.get("search", "").strip()
         if search:
-            qs = qs.filter(
-                Q(title__icontains=search)
-                | Q(author__icontains=search)
-                | Q(isbn__icontains=search)
-                | Q(book_code__icontains=search)
-                | Q(accession_no__icontains=search)
-                | Q(shelf_location__icontains=search)
-            )
+            qs = search_books(qs, search)
 
         # --- Category Filter ---
         category = request.query_params.get("category", "").strip()
         if category:
-            qs = qs.filter(category__icontains=category)
+            qs = qs.filter(category__in=resolve_categories(category, contains=True))
 
         # --- Status Filter ---
         status = request.query_params.get("status")
@@ -151,13 +156,19 @@ class BookViewSet(viewsets.ModelViewSet):
             qs = qs.filter(shelf_location__icontains=shelf)
 
 
-        # Pagination + serializer
-        page = self.paginate_queryset(qs)
+        # Pagination + serializer (+ optional ?facets= sidebar counts)
+        # ?fields= / ?omit= trim both the payload and the columns loaded
+        rows = cover_index.with_entries(BookSerializer.project(qs, request))
+        page = self.paginate_queryset(rows)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+            facets = requested_facets(request)
+            if facets:
+                response.data["facets"] = facet_counts(qs, facets)
+            return response
 
-        serializer = self.get_serializer(qs, many=True)
+        serializer = self.get_serializer(rows, many=True)
         return Response(serializer.data)
     
 
@@ -167,271 +178,54 @@ class BookViewSet(viewsets.ModelViewSet):
     # ------------------------
     @action(detail=False, methods=["post"], permission_classes=[IsAdminUser], url_path="bulk-upload")
     def bulk_upload(self, request):
-        import uuid # Local import to ensure availability
-        logger.warning("🔥 BULK UPLOAD HIT: request received")
+        return self._start_bulk_job(request, dry_run=False)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser], url_path="bulk-upload/validate")
+    def bulk_validate(self, request):
+        """Dry run: validate the whole file and report per-row errors without importing anything."""
+        return self._start_bulk_job(request, dry_run=True)
+
+    def _start_bulk_job(self, request, dry_run):
+        excel_file = request.FILES.get("file")
+        images_zip = request.FILES.get("images")
+
+        if not excel_file:
+            logger.warning("❌ Missing Excel file")
+            return Response({"detail": "Excel file is required."}, status=400)
+
+        # Store + quick checks here; the import itself runs as a background job
         try:
-            excel_file = request.FILES.get("file")
-            images_zip = request.FILES.get("images")
-            
-            if not excel_file:
-                logger.warning("❌ Missing Excel file")
-                return Response({"detail": "Excel file is required."}, status=400)
-
-            # 1. Parse Excel & Count Rows (Read-Only)
-            try:
-                # data_only=True to get values not formulas
-                wb = openpyxl.load_workbook(excel_file, data_only=True, read_only=True)
-                ws = wb.active
-                
-                # Get headers
-                rows_iter = ws.iter_rows(values_only=True)
-                try:
-                    header_row = next(rows_iter)
-                except StopIteration:
-                    return Response({"detail": "Empty Excel file."}, status=400)
-                
-                header = [str(c).strip().lower() if c else "" for c in header_row]
-                
-                # We need to list all rows to count them and process them
-                # Converting generator to list to allow counting + multiple iterations/lookups
-                all_rows = list(rows_iter)
-                row_count = len(all_rows)
-                logger.warning(f"📊 Excel loaded. Rows: {row_count}")
-
-            except Exception as e:
-                logger.error(f"❌ Excel error: {e}")
-                return Response({"detail": f"Excel parsing error: {str(e)}"}, status=400)
-
-            # 2. Limit Check
-            if images_zip and row_count > 20:
-                msg = f"Bulk upload with ZIP images is limited to 20 books (you have {row_count}). Use Excel-only upload for larger datasets."
-                logger.warning(f"❌ Limit exceeded: {msg}")
-                return Response({"error": msg}, status=400)
-
-            # 3. ZIP Extraction (if provided) OR Cloudinary Lookup (if Excel-only)
-            images_map = {}
-            valid_cloudinary_ids = {}
-
-            if images_zip:
-                # Mode B: Excel + ZIP
-                try:
-                    logger.warning("🗜️ Processing ZIP file...")
-                    with zipfile.ZipFile(images_zip) as z:
-                        for name in z.namelist():
-                            if name.endswith("/") or "__MACOSX" in name:
-                                continue
-                            base = name.split("/")[-1].lower().strip()
-                            if base and base.endswith((".jpg", ".jpeg", ".png")):
-                                images_map[base] = z.read(name)
-                    logger.warning(f"🖼️ Loaded {len(images_map)} images from ZIP")
-                except Exception as e:
-                    return Response({"detail": f"Invalid ZIP file: {str(e)}"}, status=400)
-            
-            else:
-                # Mode A: Excel-Only (Scalable)
-                # Optimization: Prefetch Cloudinary IDs for these ISBNs
-                logger.warning("☁️ Excel-only mode: Checking Cloudinary for existing covers...")
-                isbns = []
-                for row in all_rows:
-                    if not row: continue
-                    # Safe mapping
-                    row_data = dict(zip(header, row))
-                    # Assuming 'isbn' is key, handle case sensitivity
-                    isbn_val = row_data.get('isbn')
-                    if isbn_val:
-                        # cleanup isbn
-                        clean_isbn = str(isbn_val).strip().replace("-", "").upper()
-                        if clean_isbn:
-                            isbns.append(clean_isbn)
-                
-                # Batch check Cloudinary (chunked to be safe)
-                if isbns:
-                    try:
-                        import cloudinary.api
-                        # Dedup
-                        isbns = list(set(isbns))
-                        # Check in chunks of 50 to avoid URL length/API limits
-                        chunk_size = 50
-                        for i in range(0, len(isbns), chunk_size):
-                            chunk = isbns[i:i + chunk_size]
-                            try:
-                                # Start with ISBNs as public_ids (we assume public_id=ISBN for covers)
-                                # resources_by_ids returns details for found resources
-                                result = cloudinary.api.resources_by_ids(chunk)
-                                for res in result.get("resources", []):
-                                    pid = res["public_id"]
-                                    valid_cloudinary_ids[pid] = pid
-                                    # Also handle case where ISBN might be part of ID or loosely matched? 
-                                    # For now, strict match on public_id == ISBN
-                            except Exception as chunk_err:
-                                logger.warning(f"⚠️ Cloudinary chunk check failed: {chunk_err}")
-                                # Continue without failing
-                        logger.warning(f"✅ Found {len(valid_cloudinary_ids)} existing covers in Cloudinary")
-                    except Exception as cloud_err:
-                        logger.warning(f"⚠️ Cloudinary lookup skipped: {cloud_err}")
-
-
-            # 4. Processing Loop
-            created, failed, errors = 0, 0, []
-            
-            # --- PATH A: Bulk Create (Excel Only) ---
-            if not images_zip:
-                book_buffer = []
-                BATCH_SIZE = 25
-                
-                logger.warning(f"🚀 Starting optimized bulk insert (Batch Size: {BATCH_SIZE})")
-
-                def flush_buffer(buf):
-                    if not buf: return 0
-                    try:
-                        # 1. Bulk Create (DB Insert)
-                        # We use a temp UUID-based book_code to satisfy unique constraint during insert
-                        objs = Book.objects.bulk_create(buf)
-                        
-                        # 2. Fix Layout (book_code) via Bulk Update
-                        # We need PKs to generate standard book_code
-                        updates = []
-                        for b in objs:
-                            if b.pk:
-                                b.book_code = f"ILAS-ET-{b.pk:04d}"
-                                updates.append(b)
-                        
-                        if updates:
-                            Book.objects.bulk_update(updates, ['book_code'])
-                            
-                        return len(buf)
-                    except Exception as e:
-                        # If batch fails, we lose this chunk. 
-                        # In atomic block, this would rollback. Here we just log.
-                        logger.error(f"❌ Batch insert failed: {e}")
-                        # Ideally we'd re-try one by one, but for speed we fail the chunk
-                        # Or we could just catch and append to failed count
-                        return 0
-
-                for i, row in enumerate(all_rows, start=2):
-                    if not row or all(v in (None, "") for v in row):
-                        continue
-                    
-                    try:
-                        data = dict(zip(header, row))
-                        serializer = BulkBookImportSerializer(data=data)
-                        
-                        if serializer.is_valid():
-                            # Instantiate but DO NOT SAVE
-                            book = Book(**serializer.validated_data)
-                            book.last_modified_by = request.user
-                            book._suppress_audit = True
-                            
-                            # Temp unique code to satisfy constraint during insert
-                            book.book_code = uuid.uuid4().hex[:30]
-
-                            # Link Image
-                            raw_isbn = book.isbn or ""
-                            clean_isbn = raw_isbn.strip().replace("-", "").upper()
-                            if clean_isbn in valid_cloudinary_ids:
-                                book.cover_image = valid_cloudinary_ids[clean_isbn]
-                            
-                            book_buffer.append(book)
-                            
-                            # Flush if full
-                            if len(book_buffer) >= BATCH_SIZE:
-                                count = flush_buffer(book_buffer)
-                                created += count
-                                if count == 0:
-                                    failed += len(book_buffer)
-                                    errors.append({"row": i, "message": "Batch insert failed (check logs)"})
-                                book_buffer = [] # Reset
-                        else:
-                            failed += 1
-                            err_msg = "; ".join([f"{k}: {v[0]}" for k, v in serializer.errors.items()])
-                            errors.append({"row": i, "message": err_msg})
-                    except Exception as row_err:
-                        failed += 1
-                        errors.append({"row": i, "message": str(row_err)[:200]})
-                
-                # Flush remaining
-                if book_buffer:
-                    count = flush_buffer(book_buffer)
-                    created += count
-                    if count == 0:
-                        failed += len(book_buffer)
-                
-            # --- PATH B: Legacy Loop (ZIP + Atomic + Save) ---
-            else:
-                logger.warning("🐌 Legacy slow upload (ZIP mode)")
-                for i, row in enumerate(all_rows, start=2):
-                    if not row: continue
-
-                    try:
-                        with transaction.atomic():
-                            data = dict(zip(header, row))
-                            serializer = BulkBookImportSerializer(data=data)
-                            
-                            if serializer.is_valid():
-                                book = Book(**serializer.validated_data)
-                                book.last_modified_by = request.user
-                                book._suppress_audit = True
-                                
-                                # Image Logic (ZIP)
-                                raw_isbn = book.isbn or ""
-                                clean_isbn = raw_isbn.strip().replace("-", "").upper()
-                                match = None
-                                keys_to_try = [
-                                    f"{raw_isbn.strip().lower()}.jpg",
-                                    f"{(book.title or '').strip().lower()}.jpg",
-                                    f"{clean_isbn.lower()}.jpg"
-                                ]
-                                for k in keys_to_try:
-                                    if k in images_map:
-                                        match = images_map[k]
-                                        break
-                                
-                                # Save book (triggers signal for book_code)
-                                book.save()
-                                
-                                if match:
-                                    try:
-                                        fname = f"{book.book_code}.jpg"
-                                        book.cover_image.save(fname, ContentFile(match), save=True)
-                                    except Exception as img_err:
-                                        logger.warning(f"Row {i}: Image save failed: {img_err}")
-                                        errors.append({"row": i, "message": "Book created, image upload failed"})
-                                
-                                created += 1
-                            else:
-                                failed += 1
-                                msg = "; ".join([f"{k}: {v[0]}" for k, v in serializer.errors.items()])
-                                errors.append({"row": i, "message": msg})
-
-                    except Exception as row_err:
-                        failed += 1
-                        errors.append({"row": i, "message": str(row_err)[:200]})
-                        logger.error(f"Row {i} fatal: {row_err}")
-
-            # 5. Final Response
-            wb.close()
-            create_audit(
-                request.user,
-                AuditLog.ACTION_BULK_UPLOAD,
-                "Book",
-                "BulkImport",
-                new_values={"created": created, "failed": failed},
-                remarks=f"Bulk upload: {created} success, {failed} failed",
-                source="admin-ui",
+            task_id = start_import_job(
+                request.user, excel_file, images_zip,
+                mode=(request.data.get("mode") or "insert").strip().lower(),
+                force=str(request.data.get("force", "")).lower() in ("1", "true", "yes"),
+                dry_run=dry_run,
             )
-            
-            return Response({
-                "created": created,
-                "failed": failed,
-                "errors": errors[:50]
-            }, status=200)
-
+        except ImportLimitError as e:
+            logger.warning(f"❌ Limit exceeded: {e}")
+            return Response({"error": str(e)}, status=400)
+        except ImportFileError as e:
+            logger.error(f"❌ Upload error: {e}")
+            return Response({"detail": str(e)}, status=400)
         except Exception as e:
             logger.exception("🔥 BULK UPLOAD CRITICAL CRASH")
-            return Response(
-                {"error": "Bulk upload failed", "detail": str(e)},
-                status=200 
-            )
+            return Response({"error": "Bulk upload failed", "detail": str(e)}, status=500)
+
+        return Response({
+            "task_id": task_id,
+            "status_url": reverse("task-status", args=[task_id]),
+            **get_task_progress(task_id),
+        }, status=202)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser],
+            url_path=r"bulk-upload/(?P<task_id>[^/.]+)/errors")
+    def bulk_upload_errors(self, request, task_id=None):
+        """Per-row error report (CSV) of a finished bulk-upload job."""
+        path = error_report_path(task_id)
+        if not path:
+            return Response({"detail": "No error report for this task."}, status=404)
+        return FileResponse(open(path, "rb"), as_attachment=True,
+                            filename=f"{task_id}-errors.csv", content_type="text/csv")
 
     # ------------------------
     # Search API
@@ -441,7 +235,7 @@ class BookViewSet(viewsets.ModelViewSet):
         q = request.query_params.get("q", "").strip()
         qs = self.queryset
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(isbn__icontains=q) | Q(book_code__icontains=q))
+            qs = search_books(qs, q)
         page = self.paginate_queryset(qs)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -458,7 +252,8 @@ class BookViewSet(viewsets.ModelViewSet):
         search = request.query_params.get("q", "").strip()
         qs = Book.objects.filter(is_active=True)
         if search:
-            qs = qs.filter(Q(title__icontains=search) | Q(author__icontains=search))
+            qs = search_books(qs, search)
+        qs = cover_index.with_entries(qs)
         page = self.paginate_queryset(qs)
         if page is not None:
             serializer = PublicBookSerializer(page, many=True)
@@ -552,6 +347,51 @@ class ReturnBookAPIView(APIView):
             logger.exception("ReturnBookAPIView failed: %s", e)
             return Response({"detail": f"Unexpected error: {e}"}, status=500)
 
+class BatchCirculationAPIView(APIView):
+    """
+    Issue or return several books for one member in one transaction (library/circulation.py).
+    Body: {"action": "issue" | "return", "member_id": 7, "book_ids": [1, 2, 3], "remarks": ""}
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        action = str(request.data.get("action", "")).lower()
+        book_ids = request.data.get("book_ids")
+        if action not in ("issue", "return"):
+            return Response({"detail": "action must be 'issue' or 'return'."}, status=400)
+        if not isinstance(book_ids, list) or not book_ids or not all(str(i).isdigit() for i in book_ids):
+            return Response({"detail": "book_ids must be a non-empty list of book ids."}, status=400)
+        member = get_object_or_404(get_user_model(), pk=request.data.get("member_id"))
+        remarks = request.data.get("remarks", "")
+
+        try:
+            if action == "issue":
+                txns = issue_books(member, book_ids, actor=request.user, remarks=remarks)
+            else:
+                txns = return_books(member, book_ids, actor=request.user, remarks=remarks)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        except Exception as e:
+            logger.exception("BatchCirculationAPIView failed: %s", e)
+            return Response({"detail": f"Unexpected error: {e}"}, status=500)
+
+        return Response({
+            "action": action,
+            "member_id": member.id,
+            "transactions": [
+                {
+                    "id": txn.id,
+                    "book_id": txn.book_id,
+                    "book_code": txn.book.book_code,
+                    "due_date": txn.due_date,
+                    "fine_amount": str(txn.fine_amount),
+                }
+                for txn in txns
+            ],
+            "total_fine": str(sum(txn.fine_amount for txn in txns)),
+        }, status=201 if action == "issue" else 200)
+
+
 class UpdateBookStatusAPIView(APIView):
     """Handles Lost / Damaged / Maintenance / Available"""
     permission_classes = [IsAdminUser]
@@ -721,10 +561,39 @@ class InventoryReportView(APIView):
         return csv_response("inventory_report.csv", ({"status": s, "count": c} for s, c in data), headers)
 
 
+def _autocomplete_limit(request, default: int = None) -> int:
+    """?limit= for fuzzy pickers (bounded; defaults to LIBRARY_AUTOCOMPLETE_LIMIT)."""
+    try:
+        return max(1, min(int(request.query_params.get("limit")), 50))
+    except (TypeError, ValueError):
+        return default or autocomplete_limit()
+
+
+def _autocomplete_response(rows, mode):
+    """Top-N picker payload; keeps the paginated shape the frontend already reads."""
+    return Response({"count": len(rows), "next": None, "previous": None, "mode": mode, "results": rows})
+
+
 class AdminBookSearchView(APIView):
+    """
+    Circulation desk book picker.
+    ?mode=fuzzy → typo-tolerant top-N by trigram similarity (see library/autocomplete.py).
+    """
     permission_classes = [IsAdminUser]
     pagination_class = AdminResultsSetPagination
 
+    @staticmethod
+    def _row(b):
+        return {
+            "id": b.id,
+            "book_code": b.book_code,
+            "title": b.title,
+            "author": b.author or "",
+            "isbn": b.isbn or "",
+            "status": b.status,
+            "shelf": b.shelf_location or "",
+        }
+
     def get(self, request):
         query = request.query_params.get("q", "").strip()
         paginator = self.pagination_class()
@@ -732,26 +601,22 @@ class AdminBookSearchView(APIView):
             paginator.paginate_queryset(Book.objects.none(), request, view=self)
             return paginator.get_paginated_response([])
 
-        qs = Book.objects.filter(
-            Q(title__icontains=query) | Q(isbn__icontains=query) | Q(book_code__icontains=query)
-        ).order_by("title")
+        if request.query_params.get("mode") == "fuzzy":
+            books, mode = fuzzy_books(query, limit=_autocomplete_limit(request))
+            rows = [{**self._row(b), "similarity": b.similarity} for b in books]
+            return _autocomplete_response(rows, mode)
+
+        qs = search_books(Book.objects.all(), query)
         page = paginator.paginate_queryset(qs, request, view=self)
-        data = [
-            {
-                "id": b.id,
-                "book_code": b.book_code,
-                "title": b.title,
-                "author": b.author or "",
-                "isbn": b.isbn or "",
-                "status": b.status,
-                "shelf": b.shelf_location or "",
-            }
-            for b in page
-        ]
+        data = [self._row(b) for b in page]
         return paginator.get_paginated_response(data)
 
 
 class AdminUserSearchView(APIView):
+    """
+    Circulation desk member picker.
+    ?mode=fuzzy → typo-tolerant top-N by trigram similarity (names, USN, email).
+    """
     permission_classes = [IsAdminUser]
     pagination_class = AdminResultsSetPagination
 
@@ -762,6 +627,27 @@ class AdminUserSearchView(APIView):
             paginator.paginate_queryset(User.objects.none(), request, view=self)
             return paginator.get_paginated_response([])
 
+        if request.query_params.get("mode") == "fuzzy":
+            users, mode = fuzzy_members(query, limit=_autocomplete_limit(request))
+            loans = dict(
+                MemberCirculation.objects.filter(member__in=users).values_list("member_id", "active_loans")
+            )
+            rows = [
+                {
+                    "id": u.id,
+                    "username": u.username,
+                    "full_name": f"{u.first_name} {u.last_name}".strip(),
+                    "unique_id": u.unique_id,
+                    "role": u.role,
+                    "email": u.email,
+                    "phone": u.phone,
+                    "borrow_count": loans.get(u.id, 0),
+                    "similarity": u.similarity,
+                }
+                for u in users
+            ]
+            return _autocomplete_response(rows, mode)
+
         qs = User.objects.filter(
             Q(username__icontains=query) |
             Q(email__icontains=query) |
@@ -769,19 +655,16 @@ class AdminUserSearchView(APIView):
             Q(first_name__icontains=query) |
             Q(last_name__icontains=query) |
             Q(role__icontains=query)
-        ).order_by("username")
+        ).select_related("circulation").order_by("username")
 
 
         page = paginator.paginate_queryset(qs, request, view=self)
-        from .models import BookTransaction  # add at top if not imported
 
         data = []
         for u in page:
-            active_count = BookTransaction.objects.filter(
-                member=u,
-                txn_type=BookTransaction.TYPE_ISSUE,
-                is_active=True
-            ).count()
+            # No summary row: the member never borrowed
+            summary = getattr(u, "circulation", None)
+            active_count = summary.active_loans if summary else 0
 
             data.append({
                 "id": u.id,
@@ -828,13 +711,13 @@ from rest_framework.permissions import IsAdminUser
 from .serializers import BookTransactionSerializer  # already present above
 
 class AllTransactionsView(APIView):
-    """Paginated listing of all BookTransaction records for admin (history)."""
+    """Paginated listing of all BookTransaction records for admin (history). `?cursor=` opts into keyset paging."""
     permission_classes = [IsAdminUser]
-    pagination_class = AdminResultsSetPagination
+    pagination_class = AdminKeysetResultsSetPagination
 
     def get(self, request):
         # base qs with related joins for performance
-        qs = BookTransaction.objects.select_related("book", "member", "actor").order_by("-created_at")
+        qs = BookTransaction.objects.select_related("book", "member", "actor").order_by("-created_at", "-id")
 
         # Filters
         member_id = request.query_params.get("member_id")
@@ -1071,36 +954,66 @@ class PublicBookListView(APIView):
     permission_classes = [AllowAny]
     pagination_class = StandardResultsSetPagination
 
+    @conditional_catalog_get
     def get(self, request):
-        qs = Book.objects.filter(is_active=True)
+        cache_key = public_page_cache_key(request)
+        if cache_key:
+            cached = cached_page_response(cache_key)
+            if cached is not None:
+                return cached
 
-        # 🔍 Search
-        search = request.query_params.get("q", "").strip()
-        if search:
-            qs = qs.filter(
-                Q(title__icontains=search) |
-                Q(author__icontains=search)
-            )
+        qs = Book.objects.filter(is_active=True).select_related("issued_to")
 
         # 📚 CATEGORY FILTER (✅ FIXED POSITION)
         category = request.query_params.get("category", "").strip()
         if category:
-            qs = qs.filter(category__iexact=category)
+            qs = qs.filter(category__in=resolve_categories(category))
 
-        qs = qs.order_by("title")
+        # 🔍 Search (relevance-ordered); plain listing stays alphabetical
+        search = request.query_params.get("q", "").strip()
+        if search:
+            qs = search_books(qs, search)
+        else:
+            qs = qs.order_by("title")
 
         # 📄 Pagination AFTER all filters
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(qs, request, view=self)
+        page = paginator.paginate_queryset(cover_index.with_entries(qs), request, view=self)
 
         serializer = PublicBookSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        response = paginator.get_paginated_response(serializer.data)
+        facets = requested_facets(request)
+        if facets:
+            response.data["facets"] = facet_counts(qs, facets)
+        if cache_key:
+            return cache_page_response(cache_key, response)
+        return response
+
+class BookSuggestView(APIView):
+    """
+    Type-ahead completions for titles, authors and book codes.
+    Served from this worker's in-memory prefix index (library/suggest.py); no DB queries.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []  # JWT auth would load the user row
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        limit = _autocomplete_limit(request, default=suggest_index.default_limit())
+        return Response({"query": query, "results": suggest_index.suggest(query, limit)})
+
 
 class LibraryMetaAPIView(APIView):
     permission_classes = [AllowAny]
+
+    @conditional_catalog_get
     def get(self, request):
-        categories = Book.objects.values_list("category", flat=True).distinct()
-        return Response({"categories": sorted(list(set(categories)))})
+        # Served from the Category dictionary (library/categories.py), not a DISTINCT scan
+        counts = category_counts()
+        return Response({
+            "categories": [name for name, _ in counts],
+            "category_counts": [{"name": name, "count": n} for name, n in counts],
+        })
 
 from django.core.cache import cache
 from rest_framework.response import Response
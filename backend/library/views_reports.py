@@ -16,7 +16,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
 from .models import Book, BookTransaction, AuditLog
-from .pagination import StandardResultsSetPagination, AdminResultsSetPagination
+from .pagination import AdminResultsSetPagination, KeysetResultsSetPagination
 
 
 # =========================================================
@@ -111,7 +111,7 @@ class OverdueReport(APIView):
 
 class MemberHistoryReport(APIView):
     permission_classes = [IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
 
     def get(self, request, member_id):
         if not (request.user.is_staff or request.user.id == int(member_id)):
@@ -119,8 +119,8 @@ class MemberHistoryReport(APIView):
 
         qs = (
             BookTransaction.objects.filter(member_id=member_id)
-            .select_related("book")
-            .order_by("-created_at")
+            .select_related("book", "member")
+            .order_by("-created_at", "-id")
         )
 
         paginator = self.pagination_class()
@@ -1,48 +1,33 @@
 """
 library/views_task_status.py
 
-Simple view to check background task status.
-Supports Celery's AsyncResult if Celery is available; otherwise returns a helpful message.
+Status of a background bulk-import job (admins only).
+- Only IMPORT-<uuid> task ids are accepted; anything else is a 404.
+- The answer is the entry published by import_jobs.publish_progress: the progress
+  cache key, or the job's status.json when workers don't share the cache.
 """
 
-from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
-try:
-    from celery.result import AsyncResult  # type: ignore
-    CELERY_AVAILABLE = True
-except Exception:
-    CELERY_AVAILABLE = False
+from .import_jobs import job_status
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
 def task_status_view(request, task_id: str):
     """
-    Returns status information for a background task.
-    - If Celery is available, returns AsyncResult status + result (if ready).
-    - If not available, returns informative fallback JSON.
+    Returns status information for a bulk-import job:
+    progress, status, message, and the summary (result) once it has finished.
     """
-    if CELERY_AVAILABLE:
-        try:
-            res = AsyncResult(task_id)
-            data = {
-                "task_id": task_id,
-                "status": res.status,
-                "ready": res.ready(),
-                "successful": res.successful(),
-            }
-            if res.ready():
-                try:
-                    data["result"] = res.result
-                except Exception:
-                    data["result"] = "Unserializable result or retrieval error."
-            return JsonResponse(data)
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
-    else:
-        # Celery not installed — return a stable message so frontend can handle it gracefully.
-        return JsonResponse({
-            "task_id": task_id,
-            "status": "CELERY_NOT_AVAILABLE",
-            "ready": False,
-            "message": "Celery (or AsyncResult) is not available in this environment. "
-                       "If you expected async tasks, install/configure Celery or run tasks synchronously."
-        }, status=200)
+    progress = job_status(task_id)
+    if progress is None:
+        return Response({"detail": "Unknown task id."}, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        "task_id": task_id,
+        "ready": progress["status"] in ("COMPLETED", "FAILED"),
+        "successful": progress["status"] == "COMPLETED",
+        **progress,
+    })
@@ -1,14 +1,14 @@
 # library/views_user.py
 from datetime import datetime, timezone as dt_timezone
 from django.db.models import Q
-from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from .member_summary import summary_for
 from .models import BookTransaction
 from .serializers import BookTransactionSerializer
-from .pagination import StandardResultsSetPagination
+from .pagination import KeysetResultsSetPagination
 
 
 # ----------------------------------------------------------
@@ -42,37 +42,22 @@ class UserDashboardAPIView(APIView):
     def get(self, request):
         user = request.user
 
-        # Active issues
-        active_qs = BookTransaction.objects.filter(
-            member=user,
-            txn_type=BookTransaction.TYPE_ISSUE,
-            is_active=True
-        )
-        active_count = active_qs.count()
-
-        # Returned
-        returned_count = BookTransaction.objects.filter(
-            member=user,
-            txn_type=BookTransaction.TYPE_RETURN
-        ).count()
-
-        # Overdue
-        now = timezone.now()
-        overdue_count = active_qs.filter(due_date__lt=now).count()
+        # Active / returned / overdue counts (member circulation summary)
+        summary = summary_for(user)
 
         # Last 5 transactions
         last_qs = (
             BookTransaction.objects
             .select_related("book", "actor")
             .filter(member=user)
-            .order_by("-created_at")[:5]
+            .order_by("-created_at", "-id")[:5]
         )
         serializer = BookTransactionSerializer(last_qs, many=True, context={"request": request})
 
         return Response({
-            "active_count": active_count,
-            "returned_count": returned_count,
-            "overdue_count": overdue_count,
+            "active_count": summary.active_loans,
+            "returned_count": summary.returned_count,
+            "overdue_count": summary.overdue_loans(),
             "last_transactions": serializer.data
         }, status=200)
 
@@ -88,10 +73,10 @@ class UserTransactionHistoryAPIView(APIView):
       - start_date
       - end_date
       - search
-      - pagination
+      - pagination (page numbers, or keyset via ?cursor=)
     """
     permission_classes = [IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
 
     def get(self, request):
         user = request.user
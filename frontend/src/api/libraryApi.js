@@ -85,9 +85,11 @@ export async function deleteBook(bookId) {
   return res.data;
 }
 
-export async function bulkUploadBooks(formData, onUploadProgress) {
-  // backend endpoint: /api/v1/library/books/bulk-upload/
-  const res = await api.post(`${LIBRARY}/books/bulk-upload/`, formData, {
+export async function bulkUploadBooks(formData, onUploadProgress, dryRun = false) {
+  // backend endpoint: /api/v1/library/books/bulk-upload/ (dry run: .../bulk-upload/validate/)
+  // Returns 202 { task_id, status_url, status, progress } — poll getTaskStatus(task_id)
+  const url = dryRun ? `${LIBRARY}/books/bulk-upload/validate/` : `${LIBRARY}/books/bulk-upload/`;
+  const res = await api.post(url, formData, {
     headers: { "Content-Type": "multipart/form-data" },
     timeout: 600000, // 10 minutes for large ZIP uploads
     ...(onUploadProgress && { onUploadProgress }),
@@ -95,6 +97,14 @@ export async function bulkUploadBooks(formData, onUploadProgress) {
   return res.data;
 }
 
+export async function downloadBulkUploadErrors(taskId) {
+  // Per-row error report (CSV) of a finished bulk-upload job
+  const res = await api.get(`${LIBRARY}/books/bulk-upload/${encodeURIComponent(taskId)}/errors/`, {
+    responseType: "blob",
+  });
+  return res.data;
+}
+
 /* ------------------------------
   Admin AJAX helpers (quick search)
 -------------------------------*/
@@ -177,7 +187,7 @@ export async function getDashboardStats() {
 }
 
 /* ------------------------------
-  Task status (Celery task status endpoint)
+  Task status (bulk-import jobs, admin only)
   - endpoint mounted at: /api/tasks/status/<task_id>/  (see project root urls)
 -------------------------------*/
 export async function getTaskStatus(taskId) {
@@ -1,31 +1,79 @@
 // src/components/admin/books/BulkUploadManager.jsx
 import React, { useState } from "react";
 import toast from "react-hot-toast";
-import { bulkUploadBooks } from "../../../api/libraryApi";
+import { bulkUploadBooks, getTaskStatus, downloadBulkUploadErrors } from "../../../api/libraryApi";
 import { motion, AnimatePresence } from "framer-motion";
 
+// Import status polling: back off from 1s to 10s, give up on a job that never
+// leaves PENDING (2 min) or runs past 30 min
+const POLL_START_MS = 1000;
+const POLL_MAX_MS = 10000;
+const PENDING_LIMIT_MS = 2 * 60 * 1000;
+const IMPORT_LIMIT_MS = 30 * 60 * 1000;
+
 export default function BulkUploadManager({ onUploaded }) {
   const [show, setShow] = useState(false);
   const [excelFile, setExcelFile] = useState(null);
   const [zipFile, setZipFile] = useState(null);
+  const [upsert, setUpsert] = useState(false);
   const [uploading, setUploading] = useState(false);
   const [progress, setProgress] = useState(0);
   const [uploadSummary, setUploadSummary] = useState(null);
 
+  const waitForImport = async (taskId) => {
+    // The import runs as a background job: poll its progress (backing off) until it finishes
+    const started = Date.now();
+    let delay = POLL_START_MS;
+    for (;;) {
+      const status = await getTaskStatus(taskId);
+      setProgress(status.progress || 0);
+      if (status.status === "COMPLETED") return status.result || {};
+      if (status.status === "FAILED") throw new Error(status.message || "Import failed");
+      if (status.status === "CELERY_NOT_AVAILABLE") {
+        throw new Error(status.message || "Background imports are not available on the server");
+      }
+      const elapsed = Date.now() - started;
+      if (status.status === "PENDING" && elapsed > PENDING_LIMIT_MS) {
+        throw new Error("The import did not start. Check the background workers and try again.");
+      }
+      if (elapsed > IMPORT_LIMIT_MS) {
+        throw new Error(`Still importing after ${IMPORT_LIMIT_MS / 60000} minutes; check the task later (${taskId}).`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, delay));
+      delay = Math.min(delay * 1.5, POLL_MAX_MS);
+    }
+  };
+
+  const handleDownloadErrors = async () => {
+    try {
+      const blob = await downloadBulkUploadErrors(uploadSummary.task_id);
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement("a");
+      link.href = url;
+      link.download = `${uploadSummary.task_id}-errors.csv`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      toast.error("❌ Could not download the error report.");
+    }
+  };
+
   const handleFileChange = (e, setter) => {
     const file = e.target.files?.[0];
     if (file) setter(file);
   };
 
-  const handleUpload = async () => {
+  const handleUpload = async (dryRun = false) => {
     if (!excelFile) {
-      toast.error("⚠️ Please select an Excel (.xlsx) file!");
+      toast.error("⚠️ Please select an Excel (.xlsx), CSV or JSON-Lines file!");
       return;
     }
 
     const formData = new FormData();
     formData.append("file", excelFile);
-    if (zipFile) formData.append("images", zipFile);
+    if (zipFile && !dryRun) formData.append("images", zipFile);
+    // Upsert imports take no cover images ZIP (the backend rejects the pair)
+    if (upsert && !zipFile) formData.append("mode", "upsert");
 
     try {
       setUploading(true);
@@ -33,24 +81,37 @@ export default function BulkUploadManager({ onUploaded }) {
       setUploadSummary(null);
 
       // Warning user about time
-      if (zipFile) {
+      if (zipFile && !dryRun) {
         toast("⏳ Uploading images... this may take a few minutes.", { icon: "🕒", duration: 5000 });
       }
 
       // Pass high timeout config implicitly by ensuring backend handles it 
       // or relying on browser default. Ideally API function allows config injection.
-      const response = await bulkUploadBooks(formData, (evt) => {
+      const job = await bulkUploadBooks(formData, (evt) => {
         const percent = Math.round((evt.loaded / evt.total) * 100);
         setProgress(percent);
-      });
+      }, dryRun);
 
+      toast(dryRun ? "🔎 Upload received, checking..." : "⚙️ Upload received, importing...", { duration: 3000 });
+      const response = { ...(await waitForImport(job.task_id)), task_id: job.task_id };
       setProgress(100);
 
       const created = response.created || 0;
+      const updated = response.updated || 0;
       const failed = response.failed || 0;
 
+      if (dryRun) {
+        // Nothing was written: report what a real import would do
+        setUploadSummary(response);
+        if (failed > 0) toast.error(`⚠️ Check found ${failed} problem rows`);
+        else toast.success(`✅ File is valid: ${created} new, ${updated} to update`);
+        return;
+      }
+
       if (failed > 0) {
-        toast.error(`⚠️ Uploaded ${created}, Failed ${failed}`);
+        toast.error(`⚠️ Uploaded ${created}, Updated ${updated}, Failed ${failed}`);
+      } else if (upsert && !zipFile) {
+        toast.success(`🎉 ${created} added, ${updated} updated, ${response.unchanged || 0} unchanged`);
       } else {
         toast.success(`🎉 All ${created} books uploaded!`);
       }
@@ -69,7 +130,7 @@ export default function BulkUploadManager({ onUploaded }) {
     } catch (err) {
       console.error("Bulk upload error:", err);
       // Show actual server error if available
-      const backendErr = err.response?.data?.detail || err.response?.data?.error;
+      const backendErr = err.response?.data?.detail || err.response?.data?.error || err.message;
       console.error("BACKEND RESPONSE:", err.response?.data);
       const msg = backendErr || "Upload failed. Server Error.";
       toast.error(`❌ ${msg}`);
@@ -112,10 +173,10 @@ export default function BulkUploadManager({ onUploaded }) {
             <div className="space-y-3 text-xs">
               {/* Excel File */}
               <div>
-                <label className="font-medium text-gray-600">Excel File (.xlsx)</label>
+                <label className="font-medium text-gray-600">Book List (.xlsx, .csv or .jsonl)</label>
                 <input
                   type="file"
-                  accept=".xlsx"
+                  accept=".xlsx,.csv,.jsonl,.ndjson"
                   onChange={(e) => handleFileChange(e, setExcelFile)}
                   className="w-full border rounded-md px-2 py-1 mt-1"
                 />
@@ -127,7 +188,12 @@ export default function BulkUploadManager({ onUploaded }) {
                 <input
                   type="file"
                   accept=".zip"
-                  onChange={(e) => handleFileChange(e, setZipFile)}
+                  onChange={(e) =>
+                    handleFileChange(e, (file) => {
+                      setZipFile(file);
+                      setUpsert(false);
+                    })
+                  }
                   className="w-full border rounded-md px-2 py-1 mt-1"
                 />
                 <p className="text-gray-400 mt-1 italic">
@@ -135,6 +201,17 @@ export default function BulkUploadManager({ onUploaded }) {
                 </p>
               </div>
 
+              {/* Upsert mode */}
+              <label className="flex items-center gap-2 text-gray-600">
+                <input
+                  type="checkbox"
+                  checked={upsert}
+                  disabled={!!zipFile}
+                  onChange={(e) => setUpsert(e.target.checked)}
+                />
+                Update existing books (match ISBN + accession no.)
+              </label>
+
               {/* Progress Bar */}
               {uploading && (
                 <div>
@@ -153,9 +230,20 @@ export default function BulkUploadManager({ onUploaded }) {
               {uploadSummary && !uploading && (
                 <div className={`p-2 rounded-md border ${uploadSummary.failed > 0 ? "bg-red-50 border-red-200" : "bg-green-50 border-green-200"
                   }`}>
+                  {uploadSummary.dry_run && (
+                    <p className="text-gray-500 italic mb-1">Dry run: nothing was imported</p>
+                  )}
+                  {uploadSummary.header_problems?.map((problem) => (
+                    <p key={problem} className="text-amber-600 mb-1">⚠ {problem}</p>
+                  ))}
                   <p className="text-green-700 font-bold mb-1">
-                    ✔ Created: {uploadSummary.created || 0}
+                    ✔ {uploadSummary.dry_run ? "Would create" : "Created"}: {uploadSummary.created || 0}
                   </p>
+                  {(uploadSummary.updated > 0 || uploadSummary.unchanged > 0) && (
+                    <p className="text-gray-600">
+                      ↻ Updated: {uploadSummary.updated || 0} · Unchanged: {uploadSummary.unchanged || 0}
+                    </p>
+                  )}
 
                   {uploadSummary.failed > 0 && (
                     <div className="mt-2">
@@ -169,6 +257,14 @@ export default function BulkUploadManager({ onUploaded }) {
                           </div>
                         ))}
                       </div>
+                      {uploadSummary.errors_url && (
+                        <button
+                          onClick={handleDownloadErrors}
+                          className="mt-1 text-xs text-blue-600 underline"
+                        >
+                          ⬇ Download full error report
+                        </button>
+                      )}
                     </div>
                   )}
                 </div>
@@ -176,16 +272,25 @@ export default function BulkUploadManager({ onUploaded }) {
 
               {/* Buttons */}
               <div className="flex justify-between items-center mt-3">
-                <button
-                  onClick={handleUpload}
-                  disabled={uploading}
-                  className={`px-3 py-1.5 text-xs text-white rounded-md ${uploading
-                    ? "bg-gray-400 cursor-not-allowed"
-                    : "bg-blue-600 hover:bg-blue-700"
-                    }`}
-                >
-                  {uploading ? "Uploading..." : "⬆ Upload"}
-                </button>
+                <div className="flex gap-2">
+                  <button
+                    onClick={() => handleUpload()}
+                    disabled={uploading}
+                    className={`px-3 py-1.5 text-xs text-white rounded-md ${uploading
+                      ? "bg-gray-400 cursor-not-allowed"
+                      : "bg-blue-600 hover:bg-blue-700"
+                      }`}
+                  >
+                    {uploading ? "Uploading..." : "⬆ Upload"}
+                  </button>
+                  <button
+                    onClick={() => handleUpload(true)}
+                    disabled={uploading}
+                    className="px-3 py-1.5 text-xs border border-blue-300 text-blue-700 rounded-md hover:bg-blue-50"
+                  >
+                    🔎 Check only
+                  </button>
+                </div>
 
                 <button
                   onClick={handleTemplateClick}
@@ -14,7 +14,7 @@ export default function BookCard({ book }) {
     <div className="w-full h-[360px] bg-white rounded-xl shadow-sm border border-gray-100 hover:shadow-md transition-all p-3 flex flex-col">
       <div className="w-full h-44 rounded-md overflow-hidden bg-gray-50 mb-3">
         <img
-          src={book.cover_url || DEFAULT_COVER}
+          src={book.cover_thumb_url || book.cover_url || DEFAULT_COVER}
           alt={title}
           className="w-full h-full object-contain"
           loading="lazy"